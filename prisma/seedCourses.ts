@@ -3,6 +3,9 @@
  * Populates Course records and builds PrereqExpression/PrereqNode for prerequisites.
  *
  * Run: npx tsx prisma/seedCourses.ts
+ * Delta: npx tsx prisma/seedCourses.ts --delta
+ *   only upserts / rebuilds prereqs for the added and changed ids in
+ *   cs_courses.delta.json (written by scrape.py next to cs_courses.json).
  */
 
 import "dotenv/config";
@@ -28,6 +31,13 @@ type CourseEntry = {
 
 type CoursesJson = Record<string, CourseEntry>;
 
+type CoursesDelta = {
+  complete: boolean;
+  added: string[];
+  changed: string[];
+  removed: string[];
+};
+
 /** Normalize course key "CS 0011" -> id "CS0011", subject "CS", number "0011" */
 function parseCourseKey(key: string): { id: string; subject: string; number: string } | null {
   const match = key.match(/^([A-Za-z]+)\s+(\d+)$/);
@@ -90,6 +100,21 @@ function buildPrereqRawText(entry: CourseEntry): string {
   return parts.join(". ");
 }
 
+/** With --delta, the course keys to touch (added + changed); null means seed everything. */
+function loadDeltaKeys(): Set<string> | null {
+  if (!process.argv.includes("--delta")) return null;
+  const deltaPath = path.join(process.cwd(), "cs_courses.delta.json");
+  if (!fs.existsSync(deltaPath)) {
+    console.error("cs_courses.delta.json not found at", deltaPath);
+    process.exit(1);
+  }
+  const delta = JSON.parse(fs.readFileSync(deltaPath, "utf-8")) as CoursesDelta;
+  if (delta.removed.length > 0) {
+    console.log(`Delta lists ${delta.removed.length} removed courses; leaving them in place`);
+  }
+  return new Set([...delta.added, ...delta.changed]);
+}
+
 /** Generate a CUID-like id */
 function genId(): string {
   return `c${Date.now().toString(36)}${Math.random().toString(36).slice(2, 11)}`;
@@ -153,14 +178,24 @@ async function main() {
 
   const data = JSON.parse(fs.readFileSync(jsonPath, "utf-8")) as CoursesJson;
   const entries = Object.entries(data).filter(([k]) => parseCourseKey(k) !== null);
+  const deltaKeys = loadDeltaKeys();
 
-  console.log(`Found ${entries.length} courses to seed`);
+  console.log(
+    deltaKeys
+      ? `Found ${entries.length} courses, ${deltaKeys.size} added or changed to seed`
+      : `Found ${entries.length} courses to seed`
+  );
 
   const createdIds = new Set<string>();
 
   for (const [key, entry] of entries) {
     const parsed = parseCourseKey(key);
     if (!parsed) continue;
+    if (deltaKeys && !deltaKeys.has(key)) {
+      // Unchanged since the last seed; still a valid prereq target
+      createdIds.add(parsed.id);
+      continue;
+    }
 
     const { id, subject, number } = parsed;
     const credits = parseCredits(entry.units);
@@ -182,11 +217,12 @@ async function main() {
     createdIds.add(id);
   }
 
-  console.log(`Upserted ${createdIds.size} courses`);
+  console.log(`Upserted ${deltaKeys ? deltaKeys.size : createdIds.size} courses`);
 
   for (const [key, entry] of entries) {
     const parsed = parseCourseKey(key);
     if (!parsed) continue;
+    if (deltaKeys && !deltaKeys.has(key)) continue;
     const { id } = parsed;
 
     const rawText = buildPrereqRawText(entry);
@@ -0,0 +1,38 @@
+/**
+ * Canonical course-id registry (src/data/course_registry.json, built by
+ * src/scripts/python/course_registry.py from the scraped catalog and degree templates).
+ * Every id form ("CS 11", "CS0011", "cs 0011", "CS/MATH 61") resolves with one map lookup;
+ * cross-listed courses (CS 61 / MATH 61) share a group.
+ */
+
+import registryData from "@/data/course_registry.json";
+
+type CourseRegistryData = {
+  version: number;
+  /** interned id -> canonical DB id ("CS0011") */
+  ids: string[];
+  /** interned id -> interned id of its cross-listing group's representative */
+  group: number[];
+  /** every alias, upper case -> interned id */
+  aliases: Record<string, number>;
+};
+
+const registry = registryData as CourseRegistryData;
+const aliases = new Map<string, number>(Object.entries(registry.aliases));
+
+/** Interned id for any known alias, or undefined if the registry hasn't seen the course. */
+export function resolveCourse(id: string): number | undefined {
+  return aliases.get(id) ?? aliases.get(id.trim().toUpperCase());
+}
+
+/** "CS 11" / "cs11" / "CS0011" -> "CS0011"; "CS/MATH 61" -> "CS0061"; null if unknown. */
+export function canonicalCourseId(id: string): string | null {
+  const i = resolveCourse(id);
+  return i === undefined ? null : registry.ids[i];
+}
+
+/** Cross-listing group of a course (same number for CS 61 and MATH 61), or undefined if unknown. */
+export function courseGroup(id: string): number | undefined {
+  const i = resolveCourse(id);
+  return i === undefined ? undefined : registry.group[i];
+}
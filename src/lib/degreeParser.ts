@@ -5,7 +5,7 @@
 
 import Course from "../types/Course";
 import CourseTag from "../types/CourseTag";
-import { evaluatePrereqNode, hasCoursePrereqs } from "./prereqEval";
+import { completedCourseGroups, evaluatePrereqNode, hasCoursePrereqs } from "./prereqEval";
 
 // Degree JSON types (from degree.json structure)
 type DegreeGroup = {
@@ -320,6 +320,7 @@ export function parseDegreeToCourses(
   for (const c of courses) {
     if (c.started) completedIds.add(c.id.replace(/\s/g, ""));
   }
+  const completedGroups = completedCourseGroups(completedIds);
   for (const c of courses) {
     if (c.started) continue;
     const code = c.id.replace(/\s/g, "");
@@ -328,7 +329,7 @@ export function parseDegreeToCourses(
     if (CURRICULUM_PREREQS[baseCode]) {
       c.eligible = isCurriculumPrereqSatisfied(baseCode, completedIds);
     } else if (prereqRoot !== undefined && prereqRoot !== null && hasCoursePrereqs(prereqRoot)) {
-      c.eligible = evaluatePrereqNode(prereqRoot, completedIds);
+      c.eligible = evaluatePrereqNode(prereqRoot, completedIds, completedGroups);
     } else if (prereqRoot !== undefined && prereqRoot !== null && !hasCoursePrereqs(prereqRoot)) {
       const prereqIndex = PREREQ_ORDER.findIndex((p) => p.replace(/\s/g, "") === code || p.replace(/\s/g, "") === baseCode);
       if (prereqIndex > 0) {
@@ -375,6 +376,7 @@ export function recomputeCourseEligibility(
   for (const c of courses) {
     if (c.started) completedIds.add(c.id.replace(/\s/g, ""));
   }
+  const completedGroups = completedCourseGroups(completedIds);
   return courses.map((c) => {
     if (c.started) return { ...c, eligible: true };
     const code = c.id.replace(/\s/g, "");
@@ -384,7 +386,7 @@ export function recomputeCourseEligibility(
     if (CURRICULUM_PREREQS[baseCode]) {
       eligible = isCurriculumPrereqSatisfied(baseCode, completedIds);
     } else if (prereqRoot !== undefined && prereqRoot !== null && hasCoursePrereqs(prereqRoot)) {
-      eligible = evaluatePrereqNode(prereqRoot, completedIds);
+      eligible = evaluatePrereqNode(prereqRoot, completedIds, completedGroups);
     } else if (prereqRoot !== undefined && prereqRoot !== null && !hasCoursePrereqs(prereqRoot)) {
       const prereqIndex = PREREQ_ORDER.findIndex((p) => p.replace(/\s/g, "") === code || p.replace(/\s/g, "") === baseCode);
       eligible = prereqIndex > 0 ? completedIds.has(PREREQ_ORDER[prereqIndex - 1].replace(/\s/g, "")) : true;
@@ -4,6 +4,7 @@
  */
 
 import type { PrereqNodeType } from "@prisma/client";
+import { courseGroup } from "./courseRegistry";
 
 export type PrereqNodeData = {
   id: string;
@@ -19,11 +20,21 @@ export function normalizeCourseId(id: string): string {
   return id.replace(/\s/g, "");
 }
 
+/**
+ * Registry groups of the completed ids. Build once per evaluation (completedIds can
+ * change between evaluations) and pass it to evaluatePrereqNode.
+ */
+export function completedCourseGroups(completedIds: Set<string>): Set<number> {
+  const groups = new Set<number>();
+  for (const id of completedIds) {
+    const group = courseGroup(id);
+    if (group !== undefined) groups.add(group);
+  }
+  return groups;
+}
+
 /** Check if completedIds contains a course, trying multiple ID formats (CS11 vs CS0011). */
-function isCourseCompleted(
-  courseId: string,
-  completedIds: Set<string>
-): boolean {
+function hasCourseId(courseId: string, completedIds: Set<string>): boolean {
   const norm = normalizeCourseId(courseId);
   if (completedIds.has(norm)) return true;
   // Try alternate format: CS11 <-> CS0011 (pad or strip leading zeros)
@@ -37,6 +48,21 @@ function isCourseCompleted(
   return false;
 }
 
+/**
+ * Check if a course is completed in any id format (CS11, CS0011) or through a course
+ * cross-listed with it (MATH 61 for CS 61): one registry lookup per leaf.
+ */
+function isCourseCompleted(
+  courseId: string,
+  completedIds: Set<string>,
+  completedGroups: Set<number>
+): boolean {
+  const group = courseGroup(courseId);
+  if (group !== undefined && completedGroups.has(group)) return true;
+  // Not in the registry (a subject that hasn't been scraped), or completed under an unregistered id
+  return hasCourseId(courseId, completedIds);
+}
+
 /** Returns true if the tree contains any COURSE nodes (evaluable prereqs). */
 export function hasCoursePrereqs(node: PrereqNodeData): boolean {
   if (node.nodeType === "COURSE") return true;
@@ -53,15 +79,18 @@ export function hasCoursePrereqs(node: PrereqNodeData): boolean {
  * - AND: all children must be satisfied
  * - OR: at least one child satisfied
  * - MIN_K: at least kValue children satisfied
+ * completedGroups defaults to completedCourseGroups(completedIds); pass it in when
+ * evaluating many trees against the same set.
  */
 export function evaluatePrereqNode(
   node: PrereqNodeData,
-  completedIds: Set<string>
+  completedIds: Set<string>,
+  completedGroups: Set<number> = completedCourseGroups(completedIds)
 ): boolean {
   switch (node.nodeType) {
     case "COURSE":
       if (node.courseId) {
-        return isCourseCompleted(node.courseId, completedIds);
+        return isCourseCompleted(node.courseId, completedIds, completedGroups);
       }
       return true;
 
@@ -71,18 +100,18 @@ export function evaluatePrereqNode(
 
     case "AND": {
       const children = node.children ?? [];
-      return children.every((c) => evaluatePrereqNode(c, completedIds));
+      return children.every((c) => evaluatePrereqNode(c, completedIds, completedGroups));
     }
 
     case "OR": {
       const children = node.children ?? [];
-      return children.some((c) => evaluatePrereqNode(c, completedIds));
+      return children.some((c) => evaluatePrereqNode(c, completedIds, completedGroups));
     }
 
     case "MIN_K": {
       const k = node.kValue ?? 1;
       const children = node.children ?? [];
-      const satisfied = children.filter((c) => evaluatePrereqNode(c, completedIds));
+      const satisfied = children.filter((c) => evaluatePrereqNode(c, completedIds, completedGroups));
       return satisfied.length >= k;
     }
 
@@ -3,29 +3,24 @@
  */
 
 import { prisma } from "./prisma";
+import { canonicalCourseId } from "./courseRegistry";
 import { evaluatePrereqNode, normalizeCourseId } from "./prereqEval";
 import type { PrereqNodeData } from "./prereqEval";
 
-/** Resolve course ID to DB format. Tries "CS11" and "CS0011" etc. */
+/**
+ * Resolve course ID to DB format via the course registry ("CS 11" -> "CS0011").
+ * Also matches the id as given, for rows created before the registry ("MATH34").
+ */
 export async function resolveCourseId(id: string): Promise<string | null> {
   const norm = normalizeCourseId(id);
-  const course = await prisma.course.findUnique({
-    where: { id: norm },
+  const canonical = canonicalCourseId(id);
+  const candidates = canonical && canonical !== norm ? [canonical, norm] : [norm];
+  const courses = await prisma.course.findMany({
+    where: { id: { in: candidates } },
     select: { id: true },
   });
-  if (course) return course.id;
-  const match = norm.match(/^([A-Za-z\/]+)(\d+)$/i);
-  if (match) {
-    const [, subject, num] = match;
-    const padded = `${subject}${num.padStart(4, "0")}`;
-    const stripped = `${subject}${parseInt(num, 10)}`;
-    const alt = await prisma.course.findFirst({
-      where: { id: { in: [padded, stripped] } },
-      select: { id: true },
-    });
-    return alt?.id ?? null;
-  }
-  return null;
+  const found = new Set(courses.map((c) => c.id));
+  return candidates.find((c) => found.has(c)) ?? null;
 }
 
 type NodeRow = { id: string; nodeType: string; kValue: number | null; courseId: string | null; conditionText: string | null };
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+batch_degree_pdfs.py
+
+Parse a whole directory of degree sheet PDFs (every program and class year)
+with parse_degree_pdf.py, across a process pool.
+
+Caching, two levels:
+  - Per page: extracted text and tables live under --cache-dir keyed by the
+    PDF's sha256 and page index (see parse_degree_pdf.extract_pages), so
+    a PDF is only opened for pages it has never seen.
+  - Per sheet: <out-dir>/manifest.json records the hash, --profile and
+    --compress each output was built with. A sheet whose hash and settings are
+    unchanged and whose output still exists is skipped without being opened
+    (use --force to rebuild anyway).
+
+USAGE:
+  python3 batch_degree_pdfs.py degree_sheets/ [more dirs or globs ...] \
+      [--out-dir degree_templates] [--cache-dir .degree_cache] [--workers N] [--force] \
+      [--profile prod|debug] [--compress gzip,br] [--backend pdfium|pdfplumber]
+
+Prints one timing line per sheet and totals at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from parse_degree_pdf import EXTRACT_BACKENDS, PROFILES, build_template, extract_pages, pdf_hash, write_template
+
+
+MANIFEST = "manifest.json"
+
+
+def find_pdfs(inputs: List[str]) -> List[Path]:
+    found: Dict[str, Path] = {}
+    for spec in inputs:
+        p = Path(spec)
+        if p.is_dir():
+            matches = sorted(p.rglob("*.pdf"))
+        else:
+            matches = sorted(Path(m) for m in glob.glob(spec, recursive=True))
+        for m in matches:
+            if m.suffix.lower() == ".pdf":
+                found[str(m.resolve())] = m
+    return list(found.values())
+
+
+def output_name(pdf: Path) -> str:
+    # "2027 BSCS (1).pdf" -> "2027_bscs_1.json"
+    slug = re.sub(r"[^a-z0-9]+", "_", pdf.stem.lower()).strip("_")
+    return f"{slug or 'sheet'}.json"
+
+
+def ingest_one(pdf_path: str, out_paths: List[str], cache_dir: str, digest: str,
+               profile: str = "prod", compress: Tuple[str, ...] = (), backend: str = "pdfium") -> Dict[str, Any]:
+    """
+    Worker: extract (through the page cache), build, write. Byte-identical
+    sheets (same digest) are parsed once and written to every out path.
+    Returns timings in ms.
+    """
+    t0 = time.perf_counter()
+    extracted = extract_pages(pdf_path, cache_dir, digest=digest, backend=backend)
+    t1 = time.perf_counter()
+    template = build_template(extracted)
+    t2 = time.perf_counter()
+    for out_path in out_paths:
+        write_template(template, out_path, profile, compress)
+    t3 = time.perf_counter()
+    return {
+        "pages": len(extracted["pagesText"]),
+        "cachedPages": extracted["cachedPages"],
+        "extract_ms": (t1 - t0) * 1000,
+        "build_ms": (t2 - t1) * 1000,
+        "write_ms": (t3 - t2) * 1000,
+    }
+
+
+def main(inputs: List[str], out_dir: str, cache_dir: str, workers: int, force: bool,
+         profile: str = "prod", compress: Tuple[str, ...] = (), backend: str = "pdfium") -> int:
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest_path = out / MANIFEST
+    manifest: Dict[str, Dict[str, Any]] = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    pdfs = find_pdfs(inputs)
+    if not pdfs:
+        print(f"No PDFs found in {', '.join(inputs)}")
+        return 1
+
+    started = time.perf_counter()
+    rows: List[Dict[str, Any]] = []
+    jobs = []
+    names: Dict[str, Path] = {}
+    for pdf in pdfs:
+        t0 = time.perf_counter()
+        digest = pdf_hash(str(pdf))
+        hash_ms = (time.perf_counter() - t0) * 1000
+        name = output_name(pdf)
+        if name in names and names[name] != pdf:
+            # Two sheets slugging to the same name: keep both
+            name = f"{Path(name).stem}_{digest[:8]}.json"
+        names[name] = pdf
+        out_path = out / name
+        key = str(pdf)
+        prev = manifest.get(key)
+        if (not force and prev and prev.get("hash") == digest and prev.get("profile") == profile
+                and prev.get("compress") == sorted(compress) and out_path.exists()):
+            rows.append({"pdf": key, "status": "unchanged", "hash_ms": hash_ms})
+            continue
+        jobs.append((key, str(out_path), digest, hash_ms))
+
+    by_digest: Dict[str, List[tuple]] = {}
+    for job in jobs:
+        by_digest.setdefault(job[2], []).append(job)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(ingest_one, group[0][0], [j[1] for j in group], cache_dir, digest, profile, compress,
+                        backend): group
+            for digest, group in by_digest.items()
+        }
+        for fut in as_completed(futures):
+            group = futures[fut]
+            try:
+                timing = fut.result()
+            except Exception as e:
+                failed += len(group)
+                rows.extend({"pdf": key, "status": f"error: {e}", "hash_ms": hash_ms}
+                            for key, _, _, hash_ms in group)
+                continue
+            for n, (key, out_path, digest, hash_ms) in enumerate(group):
+                manifest[key] = {"hash": digest, "out": out_path, "profile": profile,
+                                 "compress": sorted(compress)}
+                status = "parsed" if n == 0 else "duplicate"
+                rows.append(dict(timing, pdf=key, status=status, hash_ms=hash_ms))
+
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    wall = (time.perf_counter() - started) * 1000
+
+    # -----------------------------
+    # Timing summary
+    # -----------------------------
+    print(f"{'sheet':40} {'status':10} {'pages':>5} {'cached':>6} {'hash':>8} {'extract':>9} {'build':>7} {'write':>7}")
+    for r in sorted(rows, key=lambda r: r["pdf"]):
+        name = Path(r["pdf"]).name[:40]
+        if r["status"] in ("parsed", "duplicate"):
+            print(f"{name:40} {r['status']:10} {r['pages']:5} {r['cachedPages']:6} {r['hash_ms']:6.1f}ms "
+                  f"{r['extract_ms']:7.1f}ms {r['build_ms']:5.1f}ms {r['write_ms']:5.1f}ms")
+        else:
+            print(f"{name:40} {r['status'][:40]:10} {'':5} {'':6} {r['hash_ms']:6.1f}ms")
+    parsed = [r for r in rows if r["status"] == "parsed"]
+    print(f"{len(pdfs)} sheets: {len(parsed)} parsed, "
+          f"{sum(r['status'] == 'duplicate' for r in rows)} duplicate, "
+          f"{sum(r['status'] == 'unchanged' for r in rows)} unchanged, "
+          f"{failed} failed; extract {sum(r['extract_ms'] for r in parsed):.0f} ms total (cpu), "
+          f"wall {wall:.0f} ms with {workers} worker(s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse every degree sheet PDF in a directory or glob.")
+    parser.add_argument("inputs", nargs="+", help="directories (searched recursively) or glob patterns")
+    parser.add_argument("--out-dir", default="degree_templates", help="where the JSON templates go")
+    parser.add_argument("--cache-dir", default=".degree_cache", help="per-page extraction cache")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--force", action="store_true", help="rebuild sheets even if unchanged")
+    parser.add_argument("--profile", choices=PROFILES, default="prod", help="output profile (see parse_degree_pdf.py)")
+    parser.add_argument("--compress", default="", help="comma list of pre-compressed siblings: gzip,br")
+    parser.add_argument("--backend", choices=EXTRACT_BACKENDS, default="pdfium",
+                        help="text extraction backend (see parse_degree_pdf.py)")
+    args = parser.parse_args()
+    raise SystemExit(main(args.inputs, args.out_dir, args.cache_dir, args.workers, args.force,
+                          args.profile, tuple(m for m in args.compress.split(",") if m), args.backend))
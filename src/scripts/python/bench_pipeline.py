@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+bench_pipeline.py
+
+Offline benchmark of the scrape -> export -> parse pipeline, so a change to
+scrape.py / sis_replay.py / parse_degree_pdf.py can be timed without SIS or a
+real degree sheet, and a slowdown shows up before the nightly catalog refresh.
+
+Stages (each reports items/sec and the peak RSS while it ran):
+  crawl           the --mode replay HTTP path (sis_replay.ReplaySession) against a
+                  local PeopleSoft stand-in, one course at a time like the real
+                  session; records built with scrape.build_record
+  sis_parse       parse_ps_page on every detail response, no HTTP (parser cost alone)
+  export          the artifacts scrape.py writes per run: <subject>_courses.json,
+                  .cols, .search and the course registry
+  prereq_compile  prereq_compiler.compile_catalog over the crawled catalog
+  pdf_<n>p        parse_degree_pdf extract_pages + build_template on the sample
+                  sheet tiled to n pages (synthetic sheets of increasing size)
+Per-step latency (p50/p95/p99 per course fetch, per list load, per PDF phase)
+comes from crawl_metrics spans.
+
+Stand-in server:
+  A stdlib HTTP server on 127.0.0.1 that renders the recorded responses in
+  fixtures/sis with the catalog's values: the course list (list_cs.html), then per
+  row, cycling through the three shapes SIS answers a course link with:
+    ajax     AJAX detail fragment (detail_single_ajax.html)
+    modal    AJAX showModal redirect (offering_list_modal.html), then the detail page
+    chooser  campus offering list (offering_chooser.html), then the detail page
+  plus "Return to ..." posts, with ICStateNum advancing per request.
+  --latency-ms adds a fixed delay per response to mimic SIS; the default 0
+  measures our own overhead. --import-har turns a HAR saved from a browser
+  session on SIS into a fresh set of those fixtures, in a --fixtures directory
+  that must be given explicitly (existing fixture files are never overwritten).
+
+Every crawled record is checked against the catalog it was rendered from;
+"mismatches" in the results must stay 0.
+
+Results (--out, default pipeline_bench.json):
+  {"label", "createdAt", "python", "platform", "config": {...}, "peakRssMB",
+   "stages": {stage: {"seconds", "items", "unit", "perSecond", "peakRssMB"}},
+   "steps": {step: {"n", "p50", "p95", "p99", ...}},      # crawl_metrics format
+   "mismatches": 0}
+--compare OLD NEW prints the change per stage and exits 1 when throughput fell
+or peak memory grew by more than --threshold.
+
+USAGE:
+  python3 bench_pipeline.py                                  # 1000 courses, sheets of 3/12/48 pages
+  python3 bench_pipeline.py --courses 5000 --pdf-copies 1,4,16,64 --label my-branch --out new.json
+  python3 bench_pipeline.py --compare main.json new.json [--threshold 0.15]
+  python3 bench_pipeline.py --import-har sis_session.har --fixtures my_fixtures/
+
+DEPENDENCIES:
+  pip install httpx selectolax playwright pypdfium2 pdfplumber numpy
+  (playwright only because scrape.py imports it; no browser is started)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import html
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+from urllib.parse import parse_qsl
+
+import httpx
+
+import catalog_columns
+import course_registry
+import course_search
+import crawl_metrics
+import parse_degree_pdf
+import sis_replay
+from prereq_compiler import compile_catalog
+from scrape import build_record
+from sis_replay import DETAIL_FIELDS
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+DEFAULT_CATALOG = Path(__file__).resolve().parents[3] / "cs_courses.json"
+DEFAULT_SHEET = FIXTURES / "degree" / "bscs_2027_sample.pdf"
+
+# stand-in role -> recorded response it is rendered from
+TEMPLATE_FILES = {
+    "list": "list_cs.html",
+    "ajax": "detail_single_ajax.html",
+    "detail": "detail_nested.html",
+    "chooser": "offering_chooser.html",
+    "modal": "offering_list_modal.html",
+}
+ROW_KINDS = ("ajax", "ajax", "ajax", "modal", "chooser")
+LIST_PATH = "/psc/paprd/EMPLOYEE/HRMS/c/COMMUNITY_ACCESS.SSS_BROWSE_CATLG.GBL"
+LIST_CONTAINER = "COURSE_LIST$scroll$21"
+CHECKED_FIELDS = ("title", "units", "requirements", "description")
+
+# The first course row of the list table, and the link texts inside it
+LIST_ROW_RE = re.compile(r"<tr>(?:(?!<tr>).)*?CRSE_NBR\$0.*?</tr>\n?", re.S)
+ROW_LINK_RE = re.compile(r'(id="CRSE_(NBR|TITLE)\$0"[^>]*>)[^<]*')
+STATE_INPUT_RE = re.compile(r'(id="ICStateNum" value=")\d+')
+STATE_SCRIPT_RE = re.compile(r"(ICStateNum\.value\s*=\s*)\d+")
+RETURN_BODY = ("<?xml version='1.0' encoding='utf-8'?>\n<PAGE id='SSS_BROWSE_CATLG'>\n"
+               "<GENSCRIPT id='script'><![CDATA[document.win0.ICStateNum.value=0;]]></GENSCRIPT>\n</PAGE>\n")
+
+
+# -----------------------------
+# Stand-in server
+# -----------------------------
+
+def load_templates(fixtures_dir: Path) -> Dict[str, str]:
+    missing = [f for f in TEMPLATE_FILES.values() if not (fixtures_dir / f).exists()]
+    if missing:
+        raise SystemExit(f"{fixtures_dir} is missing {', '.join(missing)}")
+    return {role: (fixtures_dir / f).read_text(encoding="utf-8") for role, f in TEMPLATE_FILES.items()}
+
+
+def fill_fields(template: str, fields: Dict[str, str]) -> str:
+    """Put each detail field's value into its element, the way SIS renders it (<br /> for newlines)."""
+    for key, dom_id in DETAIL_FIELDS.items():
+        value = html.escape(fields.get(key, "")).replace("\n", "<br />")
+        template = re.sub(rf'(id="{re.escape(dom_id)}"[^>]*>).*?(</span>)',
+                          lambda m: m.group(1) + value + m.group(2), template, count=1, flags=re.S)
+    return template
+
+
+class StandInSite:
+    """Server-side state of one PeopleSoft catalog session, serving a catalog dict."""
+
+    def __init__(self, catalog: Dict[str, Any], templates: Dict[str, str], latency: float = 0.0):
+        self.keys = sorted(catalog)
+        self.catalog = catalog
+        self.templates = templates
+        self.latency = latency
+        self.state = 1
+        self.current = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def fields(self, i: int) -> Dict[str, str]:
+        key = self.keys[i]
+        rec = self.catalog[key]
+        fields = {k: rec.get(k, "") for k in DETAIL_FIELDS}
+        fields["course_id"] = f"{key} - {rec.get('title', '')}"
+        return fields
+
+    def list_page(self) -> str:
+        body = self.templates["list"]
+        first = LIST_ROW_RE.search(body)
+        rows = []
+        for i, key in enumerate(self.keys):
+            text = {"NBR": key.split()[-1], "TITLE": html.escape(self.catalog[key].get("title", ""))}
+            row = ROW_LINK_RE.sub(lambda m: m.group(1) + text[m.group(2)], first.group(0))
+            rows.append(row.replace("CRSE_NBR$0", f"CRSE_NBR${i}").replace("CRSE_TITLE$0", f"CRSE_TITLE${i}"))
+        end = body.index("</tbody>", first.end())
+        return body[:first.start()] + "".join(rows) + body[end:]
+
+    def respond(self, method: str, path: str, action: str) -> str:
+        with self.lock:
+            self.requests += 1
+            self.state += 1
+            if method == "GET" and "Page=SSS_CRSE_OFFER_DTL" in path:
+                body = fill_fields(self.templates["detail"], self.fields(self.current))
+            elif method == "GET":
+                body = self.list_page()
+            elif action.startswith("CRSE_NBR$"):
+                self.current = int(action.split("$")[1])
+                kind = ROW_KINDS[self.current % len(ROW_KINDS)]
+                body = fill_fields(self.templates["ajax"], self.fields(self.current)) if kind == "ajax" \
+                    else self.templates[kind]
+            elif action.startswith("CAMPUS_TBL_DESCR$"):
+                body = fill_fields(self.templates["detail"], self.fields(self.current))
+            else:
+                # Return to ... : back on the list
+                body = RETURN_BODY
+            body = STATE_INPUT_RE.sub(rf"\g<1>{self.state}", body)
+            return STATE_SCRIPT_RE.sub(rf"\g<1>{self.state}", body)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"    # keep-alive, like SIS
+
+    def setup(self) -> None:
+        super().setup()
+        # Headers and body go out as separate writes; without this, delayed ACKs cap a
+        # keep-alive session at a few requests per 100 ms
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def _send(self, body: str) -> None:
+        site: StandInSite = self.server.site
+        if site.latency:
+            time.sleep(site.latency)
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        self._send(self.server.site.respond("GET", self.path, ""))
+
+    def do_POST(self) -> None:
+        n = int(self.headers.get("Content-Length") or 0)
+        form = dict(parse_qsl(self.rfile.read(n).decode("utf-8"), keep_blank_values=True))
+        self._send(self.server.site.respond("POST", self.path, form.get("ICAction", "")))
+
+
+def start_stand_in(site: StandInSite) -> Tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.site = site
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}{LIST_PATH}"
+
+
+def import_har(har_path: Path, out_dir: Path) -> None:
+    """Pick one recorded response per stand-in role out of a HAR and save it as a fixture."""
+    entries = json.loads(har_path.read_text(encoding="utf-8"))["log"]["entries"]
+    found: Dict[str, str] = {}
+    for entry in entries:
+        content = entry.get("response", {}).get("content", {})
+        body = content.get("text") or ""
+        if content.get("encoding") == "base64":
+            body = base64.b64decode(body).decode("utf-8", "replace")
+        if "win0" not in body and "<PAGE" not in body:
+            continue
+        page = sis_replay.parse_ps_page(body, entry["request"]["url"])
+        if "COURSE_LIST$scroll$" in body:
+            role = "list"
+        elif page.fields["course_id"]:
+            role = "ajax" if sis_replay.CDATA_RE.search(body) else "detail"
+        elif page.campus_action:
+            role = "chooser"
+        elif page.modal_url:
+            role = "modal"
+        else:
+            continue
+        found.setdefault(role, body)
+    existing = [str(out_dir / TEMPLATE_FILES[role]) for role in found if (out_dir / TEMPLATE_FILES[role]).exists()]
+    if existing:
+        raise SystemExit(f"Refusing to overwrite {', '.join(existing)}: pick an empty --fixtures directory")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for role, body in found.items():
+        (out_dir / TEMPLATE_FILES[role]).write_text(body, encoding="utf-8")
+        print(f"  {role:8} -> {out_dir / TEMPLATE_FILES[role]}")
+    missing = sorted(set(TEMPLATE_FILES) - set(found))
+    if missing:
+        print(f"No response in {har_path.name} for: {', '.join(missing)} (copy those from fixtures/sis)")
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return crawl_metrics.self_peak_rss()
+
+
+class PeakRss:
+    """Samples this process's RSS every few ms while the block runs (the stand-in server is in-process)."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakRss":
+        self.peak = current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def run_stage(results: Dict[str, Any], name: str, unit: str, fn: Callable[[], Tuple[Any, int]],
+              repeat: int = 1) -> Any:
+    """Best of `repeat` runs of fn() -> (value, items); records seconds, items/sec and peak RSS."""
+    best = float("inf")
+    value, items, peak = None, 0, 0
+    for _ in range(repeat):
+        with PeakRss() as rss:
+            t0 = time.perf_counter()
+            value, items = fn()
+            best = min(best, time.perf_counter() - t0)
+        peak = max(peak, rss.peak)
+    results[name] = {"seconds": round(best, 4), "items": items, "unit": unit,
+                     "perSecond": round(items / best, 1) if best else 0.0, "peakRssMB": round(peak / 2 ** 20, 1)}
+    print(f"  {name:<16} {items:6} {unit:<8} {best:8.2f} s {results[name]['perSecond']:10.1f} {unit}/s "
+          f"{results[name]['peakRssMB']:7.0f} MB")
+    return value
+
+
+# -----------------------------
+# Stages
+# -----------------------------
+
+async def crawl(url: str, metrics: crawl_metrics.CrawlMetrics) -> Dict[str, Any]:
+    """scrape.py's replay path minus the browser: the list page, then every row over one session."""
+    with metrics.span("list_fetch"):
+        async with httpx.AsyncClient() as client:
+            resp = await client.get(url)
+        list_page = sis_replay.parse_ps_page(resp.text, str(resp.url))
+        actions = sis_replay.list_row_actions(resp.text, LIST_CONTAINER)
+    recorded = sis_replay.RecordedPost(url=list_page.form_action, form=dict(list_page.hidden, ICAction=""),
+                                       headers={})
+    session = sis_replay.ReplaySession(recorded, list_page, httpx.Cookies())
+    records: Dict[str, Any] = {}
+    try:
+        for action in actions:
+            with metrics.span("replay_fetch"):
+                fields = await session.fetch_course(action)
+            key, record = build_record(fields["course_id"], fields)
+            records[key] = record
+    finally:
+        await session.aclose()
+    return records
+
+
+def mismatches(crawled: Dict[str, Any], catalog: Dict[str, Any]) -> int:
+    bad = len(set(catalog) ^ set(crawled))
+    for key in set(catalog) & set(crawled):
+        bad += any((crawled[key].get(f) or "").strip() != (catalog[key].get(f) or "").strip()
+                   for f in CHECKED_FIELDS)
+    return bad
+
+
+def export(records: Dict[str, Any], out_dir: Path, metrics: crawl_metrics.CrawlMetrics) -> None:
+    """What scrape.py writes after a subject, plus the registry it rebuilds at the end."""
+    json_path = out_dir / "bench_courses.json"
+    with metrics.span("export_json"):
+        json_path.write_text(json.dumps(records, indent=2), encoding="utf-8")
+    with metrics.span("export_columns"):
+        catalog_columns.write_columns(records, out_dir / "bench_courses.cols")
+    with metrics.span("export_search"):
+        course_search.build_index(records, out_dir / "bench_courses.search")
+    with metrics.span("export_registry"):
+        course_registry.build_from_files([json_path], out_path=out_dir / "course_registry.json")
+
+
+def pdf_stage(path: Path, backend: str, metrics: crawl_metrics.CrawlMetrics) -> Tuple[Any, int]:
+    with metrics.span("pdf_extract"):
+        extracted = parse_degree_pdf.extract_pages(str(path), backend=backend)
+    with metrics.span("pdf_template"):
+        template = parse_degree_pdf.build_template(extracted)
+    return template, len(extracted["pagesText"])
+
+
+def git_label() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).parent)
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def bench_catalog(base_path: Path, courses: int) -> Dict[str, Any]:
+    base = {k: v for k, v in json.loads(base_path.read_text(encoding="utf-8")).items() if isinstance(v, dict)}
+    subjects = max(1, -(-courses // len(base)))
+    catalog = base if subjects == 1 else catalog_columns.synthetic_catalog(base, subjects)
+    return {k: catalog[k] for k in sorted(catalog)[:courses]}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    catalog = bench_catalog(Path(args.catalog), args.courses)
+    templates = load_templates(Path(args.fixtures))
+    copies = [int(c) for c in args.pdf_copies.split(",") if c]
+    metrics = crawl_metrics.CrawlMetrics()
+    stages: Dict[str, Any] = {}
+    print(f"{len(catalog)} courses, {args.latency_ms:g} ms stand-in latency, sheets x{args.pdf_copies}")
+
+    site = StandInSite(catalog, templates, latency=args.latency_ms / 1000)
+    server, url = start_stand_in(site)
+    try:
+        records = run_stage(stages, "crawl", "courses", lambda: (r := asyncio.run(crawl(url, metrics)), len(r)))
+    finally:
+        server.shutdown()
+        server.server_close()
+    bad = mismatches(records, catalog)
+
+    bodies = [fill_fields(templates["ajax"], site.fields(i)) for i in range(len(site.keys))]
+    run_stage(stages, "sis_parse", "pages",
+              lambda: ([sis_replay.parse_ps_page(b, url) for b in bodies], len(bodies)), args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run_stage(stages, "export", "courses", lambda: (export(records, Path(tmp), metrics), len(records)))
+        run_stage(stages, "prereq_compile", "courses", lambda: (compile_catalog([records]), len(records)))
+        for n in copies:
+            tiled = Path(tmp) / f"sheet_x{n}.pdf"
+            pages = parse_degree_pdf.tile_pdf(str(args.sheet), n, tiled)
+            run_stage(stages, f"pdf_{pages}p", "pages", lambda: pdf_stage(tiled, args.backend, metrics), args.repeat)
+
+    steps = metrics.report()["steps"]
+    for row in steps.values():
+        row.pop("paths", None)
+    return {
+        "label": args.label or git_label(),
+        "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"courses": len(catalog), "latencyMs": args.latency_ms, "pdfCopies": copies,
+                   "backend": args.backend, "repeat": args.repeat, "standInRequests": site.requests},
+        "peakRssMB": round(max(s["peakRssMB"] for s in stages.values()), 1),
+        "stages": stages,
+        "steps": steps,
+        "mismatches": bad,
+    }
+
+
+# -----------------------------
+# Comparison
+# -----------------------------
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float) -> int:
+    """Print per-stage change; returns how many stages regressed beyond threshold."""
+    differ = {k: (old["config"].get(k), v) for k, v in new["config"].items()
+              if k != "standInRequests" and old["config"].get(k) != v}
+    if differ:
+        print("Runs used different settings, numbers aren't comparable: "
+              + ", ".join(f"{k} {a} -> {b}" for k, (a, b) in differ.items()))
+    print(f"{'stage':<16} {old['label']:>12} {new['label']:>12} {'change':>8}  {'RSS MB':>15}")
+    regressions = 0
+    for name in list(dict.fromkeys([*old["stages"], *new["stages"]])):
+        a, b = old["stages"].get(name), new["stages"].get(name)
+        if not a or not b:
+            print(f"{name:<16} {'-' if not a else a['perSecond']:>12} {'-' if not b else b['perSecond']:>12}")
+            continue
+        change = b["perSecond"] / a["perSecond"] - 1 if a["perSecond"] else 0.0
+        grew = b["peakRssMB"] / a["peakRssMB"] - 1 if a["peakRssMB"] else 0.0
+        flags = []
+        if change < -threshold:
+            flags.append("SLOWER")
+        if grew > threshold:
+            flags.append("MORE MEMORY")
+        regressions += bool(flags)
+        print(f"{name:<16} {a['perSecond']:12.1f} {b['perSecond']:12.1f} {change:+8.0%}  "
+              f"{a['peakRssMB']:6.0f} -> {b['peakRssMB']:<6.0f} {' '.join(flags)}")
+    if new.get("mismatches"):
+        print(f"{new['label']}: {new['mismatches']} crawled courses differ from the catalog")
+        regressions += 1
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the scraping and parsing pipeline.")
+    parser.add_argument("--courses", type=int, default=1000, help="courses served by the stand-in (default: 1000)")
+    parser.add_argument("--catalog", default=str(DEFAULT_CATALOG), help="catalog the stand-in renders (tiled as needed)")
+    parser.add_argument("--fixtures", default=None,
+                        help="recorded SIS responses to render (default: fixtures/sis); "
+                             "with --import-har, the new directory to write")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay per stand-in response")
+    parser.add_argument("--sheet", default=str(DEFAULT_SHEET), help="degree sheet PDF to tile")
+    parser.add_argument("--pdf-copies", default="1,4,16", help="sheet sizes, in copies of --sheet")
+    parser.add_argument("--backend", choices=parse_degree_pdf.EXTRACT_BACKENDS, default="pdfium")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N for the parse stages")
+    parser.add_argument("--label", default=None, help="name of this run in the results (default: git HEAD)")
+    parser.add_argument("--out", default="pipeline_bench.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two results files and exit")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="with --compare, the throughput drop / memory growth that counts as a regression")
+    parser.add_argument("--import-har", metavar="HAR", help="write --fixtures from a HAR of a SIS session and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        loaded = [json.loads(Path(p).read_text(encoding="utf-8")) for p in args.compare]
+        raise SystemExit(1 if compare(*loaded, args.threshold) else 0)
+    if args.import_har:
+        if not args.fixtures:
+            parser.error("--import-har needs --fixtures DIR (a new directory; fixtures/sis is never overwritten)")
+        import_har(Path(args.import_har), Path(args.fixtures))
+        raise SystemExit(0)
+    args.fixtures = args.fixtures or str(FIXTURES / "sis")
+
+    results = run(args)
+    Path(args.out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"peak RSS {results['peakRssMB']:.0f} MB, {results['mismatches']} mismatches; results in {args.out}")
+    if results["mismatches"]:
+        raise SystemExit(1)
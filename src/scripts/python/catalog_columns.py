@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+catalog_columns.py
+
+Columnar, memory-mapped form of the scraped catalog (<subject>_courses.json).
+The JSON exports have to be parsed in full by every consumer; once the whole
+catalog is scraped that is tens of MB per load. This artifact lets a tool look
+up one course or scan one column while touching only those bytes.
+
+File layout (little-endian):
+  b"JPCOLS\\0\\1"  magic + format version
+  u32              header length, then the header as UTF-8 JSON:
+                   {"count": n, "columns": {name: {...}}}
+  sections         each 8-byte aligned, offsets in the header are absolute
+
+Rows are sorted by canonical id ("CS0011", same as seedCourses.ts), so the
+"id" column doubles as the lookup index (binary search, no parse).
+Column kinds:
+  - str:  u32 offsets[n + 1] + a UTF-8 blob; row i is blob[offsets[i]:offsets[i+1]]
+          (id, key, title, requirements, description)
+  - enum: u8/u16 codes[n] + the distinct values in the header
+          (subject, units, typically_offered, grading_basis, attributes)
+
+USAGE:
+  python3 catalog_columns.py cs_courses.json [math_courses.json ...] --out catalog.cols
+  python3 catalog_columns.py --read catalog.cols --get "CS 15"
+  python3 catalog_columns.py --read catalog.cols --where grading_basis=Graded
+  python3 catalog_columns.py --bench 200
+  (scrape.py also writes <subject>_courses.cols next to each JSON export)
+
+DEPENDENCIES:
+  pip install numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from eligibility import canonical_course_id
+from prereq_compiler import catalog_key_to_id
+
+
+MAGIC = b"JPCOLS\x00\x01"
+ENUM_FIELDS = ("subject", "units", "typically_offered", "grading_basis", "attributes")
+STRING_FIELDS = ("title", "requirements", "description")
+# Record field order, as scrape.build_record writes it
+RECORD_FIELDS = ("subject", "title", "units", "typically_offered", "requirements",
+                 "attributes", "description", "grading_basis")
+
+
+# -----------------------------
+# Writer
+# -----------------------------
+
+def string_section(values: Sequence[str]) -> List[bytes]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return [offsets.tobytes(), b"".join(encoded)]
+
+
+def write_columns(catalog: Dict[str, Any], out_path: Path) -> int:
+    """
+    Write {key: record} (an export or checkpoint records; non-course keys are skipped) as a columnar file.
+    Returns the number of courses written.
+    """
+    rows = sorted(
+        (cid, key, rec) for key, rec in catalog.items()
+        if isinstance(rec, dict) and (cid := catalog_key_to_id(key))
+    )
+    n = len(rows)
+    columns: Dict[str, Dict[str, Any]] = {}
+    sections: List[bytes] = []
+
+    def add(name: str, spec: Dict[str, Any], parts: List[bytes], keys: Sequence[str]) -> None:
+        for key, part in zip(keys, parts):
+            spec[key] = len(sections)   # section index; made absolute below
+            sections.append(part)
+        columns[name] = spec
+
+    add("id", {"kind": "str"}, string_section([r[0] for r in rows]), ("offsets", "blob"))
+    add("key", {"kind": "str"}, string_section([r[1] for r in rows]), ("offsets", "blob"))
+    for field in STRING_FIELDS:
+        add(field, {"kind": "str"}, string_section([r[2].get(field, "") for r in rows]), ("offsets", "blob"))
+    for field in ENUM_FIELDS:
+        index: Dict[str, int] = {}
+        codes = [index.setdefault(r[2].get(field, ""), len(index)) for r in rows]
+        dtype = "<u1" if len(index) <= 1 << 8 else "<u2" if len(index) <= 1 << 16 else "<u4"
+        add(field, {"kind": "enum", "dtype": dtype, "values": list(index)},
+            [np.asarray(codes, dtype=dtype).tobytes()], ("codes",))
+
+    # Lay out: magic, header length, header, then sections 8-byte aligned. The
+    # header holds absolute offsets, so size it with placeholders first.
+    def header_bytes(offsets: List[int]) -> bytes:
+        cols = {}
+        for name, spec in columns.items():
+            cols[name] = {k: ([offsets[v], len(sections[v])] if k in ("offsets", "blob", "codes") else v)
+                          for k, v in spec.items()}
+        return json.dumps({"count": n, "columns": cols}, ensure_ascii=False).encode("utf-8")
+
+    def place(header_len: int) -> List[int]:
+        pos = len(MAGIC) + 4 + header_len
+        offsets = []
+        for part in sections:
+            pos += -pos % 8
+            offsets.append(pos)
+            pos += len(part)
+        return offsets
+
+    header = header_bytes(place(0))
+    while True:
+        offsets = place(len(header))
+        new = header_bytes(offsets)
+        if len(new) == len(header):
+            header = new
+            break
+        header = new
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for off, part in zip(offsets, sections):
+            f.write(b"\0" * (off - f.tell()))
+            f.write(part)
+    tmp.replace(out_path)
+    return n
+
+
+# -----------------------------
+# Reader
+# -----------------------------
+
+class ColumnarCatalog:
+    """
+    Read-only view over a .cols file. Opening parses only the header; columns
+    are mapped on first use and strings decoded per row.
+
+        with ColumnarCatalog("catalog.cols") as cat:
+            cat.get("CS 15")["title"]
+            rows = cat.where("grading_basis", "Graded")
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._f = self.path.open("rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path}: not a catalog columns file")
+        (hlen,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mm[start:start + hlen].decode("utf-8"))
+        self.count: int = header["count"]
+        self.spec: Dict[str, Dict[str, Any]] = header["columns"]
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "ColumnarCatalog":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # numpy views pin the map; drop them before closing it
+        self._arrays.clear()
+        self._mm.close()
+        self._f.close()
+
+    # -- column access --
+
+    def _array(self, name: str, part: str) -> np.ndarray:
+        key = f"{name}.{part}"
+        arr = self._arrays.get(key)
+        if arr is None:
+            spec = self.spec[name]
+            offset, length = spec[part]
+            dtype = np.dtype("<u4" if part == "offsets" else spec["dtype"])
+            arr = self._arrays[key] = np.frombuffer(self._mm, dtype=dtype, count=length // dtype.itemsize,
+                                                    offset=offset)
+        return arr
+
+    def _string(self, name: str, row: int) -> str:
+        offsets = self._array(name, "offsets")
+        base = self.spec[name]["blob"][0]
+        return self._mm[base + int(offsets[row]):base + int(offsets[row + 1])].decode("utf-8")
+
+    def value(self, name: str, row: int) -> str:
+        spec = self.spec[name]
+        if spec["kind"] == "enum":
+            return spec["values"][int(self._array(name, "codes")[row])]
+        return self._string(name, row)
+
+    def column(self, name: str) -> List[str]:
+        """Every row's value of one column (only that column is read)."""
+        spec = self.spec[name]
+        if spec["kind"] == "enum":
+            values = spec["values"]
+            return [values[c] for c in self._array(name, "codes").tolist()]
+        offsets = self._array(name, "offsets").tolist()
+        base = spec["blob"][0]
+        blob = self._mm[base:base + offsets[-1]]
+        return [blob[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+    def codes(self, name: str) -> np.ndarray:
+        """Raw enum codes of a column, indexes into self.spec[name]["values"]."""
+        return self._array(name, "codes")
+
+    def where(self, name: str, value: str) -> np.ndarray:
+        """Row numbers whose enum column equals value."""
+        values = self.spec[name]["values"]
+        if value not in values:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.codes(name) == values.index(value))
+
+    # -- rows --
+
+    def index_of(self, course: str) -> Optional[int]:
+        """Row of a course id in any common spelling, by binary search over the sorted id column."""
+        cid = canonical_course_id(course)
+        if cid is None:
+            return None
+        target = cid.encode("ascii")
+        offsets = self._array("id", "offsets")
+        base = self.spec["id"]["blob"][0]
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = self._mm[base + int(offsets[mid]):base + int(offsets[mid + 1])]
+            if probe < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._string("id", lo) == cid:
+            return lo
+        return None
+
+    def record(self, row: int) -> Dict[str, str]:
+        """The row as the JSON export's record dict."""
+        return {f: self.value(f, row) for f in RECORD_FIELDS}
+
+    def get(self, course: str) -> Optional[Dict[str, str]]:
+        row = self.index_of(course)
+        return None if row is None else self.record(row)
+
+    def items(self) -> Iterator[tuple]:
+        """(export key, record) for every row, in id order."""
+        for row in range(self.count):
+            yield self._string("key", row), self.record(row)
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def synthetic_catalog(base: Dict[str, Any], subjects: int) -> Dict[str, Any]:
+    """The real catalog's records copied under `subjects` made-up subject codes."""
+    records = {k: v for k, v in base.items() if isinstance(v, dict)}
+    out: Dict[str, Any] = {}
+    for s in range(subjects):
+        code = "".join(chr(65 + (s // 26 ** i) % 26) for i in range(3))
+        for key, rec in records.items():
+            number = key.split()[-1]
+            out[f"{code} {number}"] = dict(rec, subject=code)
+    return out
+
+
+def bench(catalog_path: str, subjects: int, workdir: Path) -> None:
+    base = json.loads(Path(catalog_path).read_text(encoding="utf-8"))
+    catalog = synthetic_catalog(base, subjects)
+    workdir.mkdir(parents=True, exist_ok=True)
+    json_path = workdir / "bench_courses.json"
+    cols_path = workdir / "bench_courses.cols"
+    json_path.write_text(json.dumps(catalog, indent=2), encoding="utf-8")
+    write_columns(catalog, cols_path)
+    probe = sorted(catalog)[len(catalog) // 2]
+    print(f"{len(catalog)} courses: json {json_path.stat().st_size / 1e6:.1f} MB, "
+          f"cols {cols_path.stat().st_size / 1e6:.1f} MB")
+
+    def timed(label: str, fn: Any, repeat: int = 5) -> Any:
+        best, out = float("inf"), None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = fn()
+            best = min(best, time.perf_counter() - t0)
+        print(f"  {label:40} {best * 1000:9.2f} ms")
+        return out
+
+    def json_get() -> Any:
+        return json.loads(json_path.read_text(encoding="utf-8"))[probe]
+
+    def cols_get() -> Any:
+        with ColumnarCatalog(cols_path) as cat:
+            return cat.get(probe)
+
+    def json_scan() -> int:
+        data = json.loads(json_path.read_text(encoding="utf-8"))
+        return sum(1 for v in data.values() if v["grading_basis"] == "Graded")
+
+    def cols_scan() -> int:
+        with ColumnarCatalog(cols_path) as cat:
+            return len(cat.where("grading_basis", "Graded"))
+
+    a = timed("json: load + get one course", json_get)
+    b = timed("cols: open + get one course", cols_get)
+    c = timed("json: load + count Graded", json_scan)
+    d = timed("cols: open + count Graded", cols_scan)
+    print(f"  results agree: {a == b and c == d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the columnar catalog artifact.")
+    parser.add_argument("catalogs", nargs="*", help="<subject>_courses.json exports to combine")
+    parser.add_argument("--out", default="catalog.cols", help="output .cols file")
+    parser.add_argument("--read", default=None, help="query an existing .cols file")
+    parser.add_argument("--get", default=None, help='with --read: print one course, e.g. "CS 15"')
+    parser.add_argument("--where", default=None, help="with --read: list ids where FIELD=VALUE (enum fields)")
+    parser.add_argument("--bench", type=int, default=0, metavar="SUBJECTS",
+                        help="compare JSON and columnar loads on a synthetic catalog of this many subjects")
+    parser.add_argument("--base", default="cs_courses.json", help="catalog the --bench data is copied from")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.base, args.bench, Path(args.out).resolve().parent)
+    elif args.read:
+        with ColumnarCatalog(Path(args.read)) as cat:
+            if args.get:
+                print(json.dumps(cat.get(args.get), indent=2))
+            if args.where:
+                field, _, value = args.where.partition("=")
+                ids = cat.column("id")
+                for row in cat.where(field, value):
+                    print(ids[row])
+    else:
+        merged: Dict[str, Any] = {}
+        for path in args.catalogs or ["cs_courses.json"]:
+            merged.update(json.loads(Path(path).read_text(encoding="utf-8")))
+        n = write_columns(merged, Path(args.out))
+        print(f"Wrote {n} courses to {args.out} ({Path(args.out).stat().st_size} bytes)")
@@ -0,0 +1,208 @@
+"""
+catalog_store.py
+
+On-disk state for catalog crawls.
+
+Each subject gets an append-only JSONL checkpoint (one scraped course per line),
+written as soon as a course is scraped, so a crash loses at most the course
+in flight. On restart scrape.py skips every list row whose course number is
+already in the checkpoint. The <subject>_courses.json files the rest of the
+app reads (cs_courses.json, ...) are exports of these checkpoints, each with a
+memory-mappable columnar copy (cs_courses.cols, see catalog_columns.py) and a
+search index (cs_courses.search, see course_search.py) next to it.
+
+Checkpoint line format:
+  {"nbr": "0011", "id": "CS 0011", "title": "Intro to CS", "scraped_at": 1760000000,
+   "record": {"subject": "CS", "title": ..., ...}}
+("title" is the list-level title, used to decide whether a refresh can reuse the row.)
+
+Incremental refresh (scrape.py --refresh):
+  The finished checkpoint is rotated to <SUBJECT>.prev.jsonl and a new one is
+  started. Rows whose list-level number and title are unchanged and whose
+  previous scrape is inside the freshness window are carried over without
+  opening the modal. After export, the new JSON is diffed against the previous
+  generation (the .prev checkpoint) by record fingerprint and written as
+  <subject>_courses.delta.json:
+    {"complete": true, "added": [...], "changed": [...], "removed": [...]}
+  While a refresh is unfinished the export is the previous generation with the
+  new rows laid over it, so courses still waiting to be refetched don't drop
+  out of the JSON the app reads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# Everything a downstream consumer reads; subject is implied by the id
+FINGERPRINT_FIELDS = (
+    "title",
+    "units",
+    "typically_offered",
+    "requirements",
+    "attributes",
+    "description",
+    "grading_basis",
+)
+
+
+class Checkpoint:
+    """Append-only JSONL record of the courses scraped for one subject."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # nbr -> checkpoint line
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            for entry in read_entries(self.path):
+                self.entries[entry["nbr"]] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("a", encoding="utf-8")
+        if self._fh.tell() > 0 and not self.path.read_bytes().endswith(b"\n"):
+            # Start fresh after a torn line instead of gluing the next record onto it
+            self._fh.write("\n")
+
+    @property
+    def done_nbrs(self):
+        return self.entries.keys()
+
+    @property
+    def records(self) -> Dict[str, Dict[str, Any]]:
+        return {e["id"]: e["record"] for e in self.entries.values()}
+
+    def append(self, nbr: str, id: str, record: Dict[str, Any], title: str = "",
+               scraped_at: Optional[float] = None) -> None:
+        entry = {
+            "nbr": nbr,
+            "id": id,
+            "title": title,
+            "scraped_at": int(time.time() if scraped_at is None else scraped_at),
+            "record": record,
+        }
+        self._write(entry)
+
+    def carry(self, entry: Dict[str, Any]) -> None:
+        """Copy a line from a previous checkpoint as-is (keeping its scraped_at)."""
+        self._write(entry)
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._fh.write(json.dumps(entry) + "\n")
+        self._fh.flush()
+        self.entries[entry["nbr"]] = entry
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def export(self, out_path: Path, base: Optional[Dict[str, Dict[str, Any]]] = None) -> int:
+        """
+        Write the checkpoint as the classic {id: record} JSON. Returns the course count.
+        With base (the previous generation during an unfinished refresh), the checkpoint's
+        records are laid over it, so rows not refetched yet stay in the export.
+        """
+        records = {**base, **self.records} if base else self.records
+        courses: Dict[str, Any] = {id: records[id] for id in sorted(records)}
+        with open(out_path, "w") as f:
+            json.dump(courses, f, indent=2)
+        return len(records)
+
+
+def read_entries(path: Path) -> Iterator[Dict[str, Any]]:
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Torn last line from a crash mid-write; that course is simply redone
+                continue
+
+
+def checkpoint_path(checkpoint_dir: Path, subject: str) -> Path:
+    return Path(checkpoint_dir) / f"{subject.upper()}.jsonl"
+
+
+def previous_checkpoint_path(checkpoint_dir: Path, subject: str) -> Path:
+    return Path(checkpoint_dir) / f"{subject.upper()}.prev.jsonl"
+
+
+def rotate_for_refresh(checkpoint_dir: Path, subject: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Move the current checkpoint aside so a refresh starts a new one, and return
+    the previous entries by nbr. If a .prev file already exists, an earlier
+    refresh was interrupted: keep both files and resume it.
+    """
+    current = checkpoint_path(checkpoint_dir, subject)
+    prev = previous_checkpoint_path(checkpoint_dir, subject)
+    if not prev.exists():
+        if not current.exists():
+            return {}
+        current.rename(prev)
+    return {e["nbr"]: e for e in read_entries(prev)}
+
+
+def generation_records(entries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """{id: record} of checkpoint entries by nbr, e.g. the .prev generation rotate_for_refresh returned."""
+    return {e["id"]: e["record"] for e in entries.values()}
+
+
+def finish_refresh(checkpoint_dir: Path, subject: str) -> None:
+    previous_checkpoint_path(checkpoint_dir, subject).unlink(missing_ok=True)
+
+
+def export_path(out_dir: Path, subject: str) -> Path:
+    # CS -> cs_courses.json, the name seedCourses.ts already reads
+    return Path(out_dir) / f"{subject.lower()}_courses.json"
+
+
+def delta_path(out_dir: Path, subject: str) -> Path:
+    return Path(out_dir) / f"{subject.lower()}_courses.delta.json"
+
+
+def columns_path(out_dir: Path, subject: str) -> Path:
+    # Columnar copy of the export, see catalog_columns.py
+    return Path(out_dir) / f"{subject.lower()}_courses.cols"
+
+
+def search_path(out_dir: Path, subject: str) -> Path:
+    # Full-text index of the export, see course_search.py
+    return Path(out_dir) / f"{subject.lower()}_courses.search"
+
+
+# -----------------------------
+# Change detection
+# -----------------------------
+
+def fingerprint(record: Dict[str, Any]) -> str:
+    payload = json.dumps([record.get(f, "") for f in FINGERPRINT_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def load_snapshot(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Read an exported <subject>_courses.json, dropping the template header keys older exports carry."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {k: v for k, v in data.items() if isinstance(v, dict)}
+
+
+def diff_snapshots(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]],
+                   complete: bool = True) -> Dict[str, Any]:
+    """
+    Added / changed / removed course ids between two snapshots. Removals are
+    only reported for a complete crawl; a partial one can't tell a removed
+    course from one it didn't reach.
+    """
+    old_fp = {id: fingerprint(r) for id, r in old.items()}
+    added: List[str] = []
+    changed: List[str] = []
+    for id in sorted(new):
+        if id not in old_fp:
+            added.append(id)
+        elif old_fp[id] != fingerprint(new[id]):
+            changed.append(id)
+    removed = sorted(id for id in old if id not in new) if complete else []
+    return {"complete": complete, "added": added, "changed": changed, "removed": removed}
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+course_registry.py
+
+One canonical course-id registry for the whole pipeline. Course ids show up as
+"CS 0011" (catalog keys), "CS 11" / "CS/MATH 61" (degree sheets, transcripts,
+requirement text) and "CS0011" (database); instead of every consumer
+re-normalizing with its own regex, the registry is built once and every lookup
+is one dict get.
+
+Built in a single pass over the catalogs and degree templates:
+  - every catalog key, every course named by a template, every course ref in
+    requirement text gets a canonical id in the database form ("CS0011",
+    prereq_compiler.db_course_id) and an interned integer (index into "ids")
+  - cross-listings are linked: "(Cross-listed as MATH 61.)" / "(Cross-listed w/ EE 25)"
+    / "(Cross-listed with EE 109)" in a description,
+    "CS/MATH 61" in a template or requirement text
+  - aliases: padded and unpadded numbers, with and without the space, and the
+    slash forms of cross-listed courses ("CS/MATH 61", "MATH/CS61", ...), all
+    upper case. Plain aliases resolve to their own course, slash aliases to
+    the group's representative.
+
+Cross-listed courses form a group; "group" maps every id to its
+representative (the first one in the catalog, by id), so "are these the same
+course" is group[a] == group[b].
+
+Artifact (src/data/course_registry.json, bundled into the app like degree.json):
+  {"version": 1,
+   "ids": ["CS0011", ...],                  # interned id -> canonical id
+   "group": [0, ...],                       # interned id -> group representative
+   "aliases": {"CS 11": 0, "CS0011": 0, "CS 0011": 0, "CS/MATH 61": 7, ...},
+   "stats": {...}}
+
+Consumers: eligibility.canonical_course_id (and through it degree_audit,
+schedule_planner, prereq_index), scrape.py (rebuilds it after every crawl),
+src/lib/courseRegistry.ts (prereqEval, prereqService).
+
+USAGE:
+  python3 course_registry.py ../../../cs_courses.json ../../data/math.json          # write the default artifact
+  python3 course_registry.py cs_courses.json --degree degree.json --out registry.json
+  python3 course_registry.py --resolve "CS 11" "cs/math 61" "MATH0061"
+  python3 course_registry.py --bench 200000
+  python3 course_registry.py ../../../cs_courses.json ../../data/math.json --check  # cross-listings resolve
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from functools import lru_cache
+from itertools import permutations
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from prereq_compiler import db_course_id
+
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+DEFAULT_REGISTRY = DATA_DIR / "course_registry.json"
+DEFAULT_TEMPLATES = (DATA_DIR / "degree.json",)
+VERSION = 1
+
+# Build time only; lookups never run a regex
+COURSE_RE = re.compile(r"^([A-Za-z]+(?:\s*/\s*[A-Za-z]+)*)\s*(\d+)([A-Za-z]?)$")
+TEXT_REF_RE = re.compile(r"\b([A-Z]{2,5}(?:/[A-Za-z]{2,5})*)\s+(\d{1,4})([A-Z]?)\b")
+# "(Cross-listed as MATH 61)", "(Cross-listed w/ EE 25)", "(Cross listed with BIO 0040)"
+CROSS_LISTED_RE = re.compile(r"Cross[- ]listed\s+(?:as|w/|with)\s+([^)]*)", re.IGNORECASE)
+
+
+def number_variants(digits: str, suffix: str) -> List[str]:
+    """"0061", "" -> ["61", "061", "0061"] (deduplicated, in that order)."""
+    n = str(int(digits))
+    return list(dict.fromkeys(v + suffix.upper() for v in (n, n.zfill(3), n.zfill(4))))
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+
+class CourseRegistry:
+    def __init__(self, ids: List[str], group: List[int], aliases: Dict[str, int],
+                 stats: Optional[Dict[str, Any]] = None):
+        self.ids = ids
+        self.group = group
+        self.aliases = aliases
+        self.stats = stats or {}
+        self._members: Optional[Dict[int, List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def resolve(self, raw: str) -> Optional[int]:
+        """Any alias -> interned id, None if unknown. Exact key first, then upper-cased and trimmed."""
+        i = self.aliases.get(raw)
+        if i is None:
+            i = self.aliases.get(raw.strip().upper())
+        return i
+
+    def canonical(self, raw: str) -> Optional[str]:
+        i = self.resolve(raw)
+        return None if i is None else self.ids[i]
+
+    def group_of(self, raw: str) -> Optional[int]:
+        i = self.resolve(raw)
+        return None if i is None else self.group[i]
+
+    def equivalents(self, raw: str) -> List[str]:
+        """Canonical ids of the course and everything cross-listed with it ([] if unknown)."""
+        i = self.resolve(raw)
+        if i is None:
+            return []
+        if self._members is None:
+            self._members = {}
+            for j, g in enumerate(self.group):
+                self._members.setdefault(g, []).append(j)
+        return [self.ids[j] for j in self._members[self.group[i]]]
+
+    def same_course(self, a: str, b: str) -> bool:
+        ga = self.group_of(a)
+        return ga is not None and ga == self.group_of(b)
+
+    # -- artifact --
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"version": VERSION, "ids": self.ids, "group": self.group, "aliases": self.aliases,
+                "stats": self.stats}
+
+    def write(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Compact like the bundled degree.json; the app imports it
+        path.write_text(json.dumps(self.to_json(), separators=(",", ":")), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "CourseRegistry":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if data.get("version") != VERSION:
+            raise ValueError(f"{path}: registry version {data.get('version')}, expected {VERSION}")
+        return cls(data["ids"], data["group"], data["aliases"], data.get("stats"))
+
+
+@lru_cache(maxsize=1)
+def default_registry() -> Optional[CourseRegistry]:
+    """The bundled artifact, loaded once; None if it hasn't been built."""
+    return CourseRegistry.load(DEFAULT_REGISTRY) if DEFAULT_REGISTRY.exists() else None
+
+
+# -----------------------------
+# Builder
+# -----------------------------
+
+class RegistryBuilder:
+    def __init__(self):
+        self.parts: Dict[str, Tuple[str, str, str]] = {}    # canonical -> (subject, digits, suffix)
+        self.parent: Dict[str, str] = {}
+        self.in_catalog: Set[str] = set()
+        self.stats = {"catalogCourses": 0, "templateCourses": 0, "textRefs": 0, "crossListings": 0}
+
+    def add(self, subject: str, digits: str, suffix: str = "") -> str:
+        subject, suffix = subject.upper(), suffix.upper()
+        cid = db_course_id(subject, digits + suffix)
+        if cid not in self.parts:
+            self.parts[cid] = (subject, digits, suffix)
+            self.parent[cid] = cid
+        return cid
+
+    def find(self, cid: str) -> str:
+        while self.parent[cid] != cid:
+            self.parent[cid] = self.parent[self.parent[cid]]
+            cid = self.parent[cid]
+        return cid
+
+    def link(self, a: str, b: str) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+            self.stats["crossListings"] += 1
+
+    def add_ref(self, subjects: str, digits: str, suffix: str = "") -> List[str]:
+        """"CS/MATH", "61" -> both ids, linked."""
+        ids = [self.add(s.strip(), digits, suffix) for s in subjects.split("/") if s.strip()]
+        for other in ids[1:]:
+            self.link(ids[0], other)
+        return ids
+
+    def add_text(self, text: str) -> List[str]:
+        ids: List[str] = []
+        for m in TEXT_REF_RE.finditer(text or ""):
+            ids.extend(self.add_ref(m.group(1), m.group(2), m.group(3)))
+            self.stats["textRefs"] += 1
+        return ids
+
+    def add_catalog(self, catalog: Dict[str, Any]) -> None:
+        for key, entry in catalog.items():
+            m = COURSE_RE.match(key)
+            if not m or not isinstance(entry, dict):
+                continue
+            cid = self.add_ref(*m.groups())[0]
+            self.in_catalog.add(cid)
+            self.stats["catalogCourses"] += 1
+            self.add_text(entry.get("requirements", ""))
+            for listed in CROSS_LISTED_RE.findall(entry.get("description") or ""):
+                for other in self.add_text(listed):
+                    self.link(cid, other)
+
+    def add_template(self, node: Any) -> None:
+        """Every "course" string anywhere in a degree template."""
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "course" and isinstance(value, str):
+                    m = COURSE_RE.match(value.strip())
+                    if m:
+                        self.add_ref(*m.groups())
+                        self.stats["templateCourses"] += 1
+                else:
+                    self.add_template(value)
+        elif isinstance(node, list):
+            for value in node:
+                self.add_template(value)
+
+    def build(self) -> CourseRegistry:
+        ids = sorted(self.parts)
+        index = {cid: i for i, cid in enumerate(ids)}
+        groups: Dict[str, List[str]] = {}
+        for cid in ids:
+            groups.setdefault(self.find(cid), []).append(cid)
+        group = [0] * len(ids)
+        aliases: Dict[str, int] = {}
+        for members in groups.values():
+            rep = index[next((c for c in members if c in self.in_catalog), members[0])]
+            for cid in members:
+                group[index[cid]] = rep
+                subject, digits, suffix = self.parts[cid]
+                for number in number_variants(digits, suffix):
+                    aliases[f"{subject}{number}"] = index[cid]
+                    aliases[f"{subject} {number}"] = index[cid]
+            # Slash forms, for cross-listings that share a number ("CS/MATH 61")
+            by_number: Dict[Tuple[str, str], List[str]] = {}
+            for cid in members:
+                subject, digits, suffix = self.parts[cid]
+                by_number.setdefault((str(int(digits)), suffix), []).append(subject)
+            for (digits, suffix), subjects in by_number.items():
+                if len(subjects) < 2:
+                    continue
+                orders = permutations(subjects) if len(subjects) <= 3 else [sorted(subjects)]
+                for order in orders:
+                    for number in number_variants(digits, suffix):
+                        aliases.setdefault(f"{'/'.join(order)}{number}", rep)
+                        aliases.setdefault(f"{'/'.join(order)} {number}", rep)
+        stats = dict(self.stats, ids=len(ids), aliases=len(aliases),
+                     groups=sum(len(m) > 1 for m in groups.values()))
+        return CourseRegistry(ids, group, aliases, stats)
+
+
+def build_registry(catalogs: Iterable[Dict[str, Any]], templates: Iterable[Dict[str, Any]] = ()) -> CourseRegistry:
+    builder = RegistryBuilder()
+    for catalog in catalogs:
+        builder.add_catalog(catalog)
+    for template in templates:
+        builder.add_template(template)
+    return builder.build()
+
+
+def build_from_files(catalog_paths: Iterable[Path], template_paths: Iterable[Path] = DEFAULT_TEMPLATES,
+                     out_path: Path = DEFAULT_REGISTRY) -> CourseRegistry:
+    catalogs = [json.loads(Path(p).read_text(encoding="utf-8")) for p in catalog_paths]
+    templates = [json.loads(Path(p).read_text(encoding="utf-8")) for p in template_paths if Path(p).exists()]
+    registry = build_registry(catalogs, templates)
+    registry.write(out_path)
+    s = registry.stats
+    print(f"Course registry: {s['ids']} ids, {s['aliases']} aliases, {s['groups']} cross-listed groups -> {out_path}")
+    return registry
+
+
+def check_cross_listings(registry: CourseRegistry, catalogs: Iterable[Dict[str, Any]]) -> List[str]:
+    """Every "Cross-listed ..." pair in the catalog descriptions must share a group. Returns misses."""
+    problems = []
+    for catalog in catalogs:
+        for key, entry in catalog.items():
+            if not COURSE_RE.match(key) or not isinstance(entry, dict):
+                continue
+            for listed in CROSS_LISTED_RE.findall(entry.get("description") or ""):
+                for m in TEXT_REF_RE.finditer(listed):
+                    other = f"{m.group(1)} {m.group(2)}{m.group(3)}"
+                    if not registry.same_course(key, other):
+                        problems.append(f"{key} / {other}: {registry.canonical(key)} and "
+                                        f"{registry.canonical(other)} are not in one group")
+    return problems
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def bench(registry: CourseRegistry, n: int) -> None:
+    """Registry lookups vs the regex normalization they replace, on aliases as users type them."""
+    rng = random.Random(0)
+    keys = list(registry.aliases)
+    queries = [rng.choice((str.lower, str.upper, str.title))(rng.choice(keys)) for _ in range(n)]
+
+    single = re.compile(r"^([A-Za-z]+)\s*(\d+[A-Za-z]?)$")
+
+    def by_regex(raw: str) -> Optional[str]:
+        m = single.match(raw.strip())
+        return db_course_id(m.group(1), m.group(2)) if m else None
+
+    t = time.perf_counter()
+    regex_ids = [by_regex(q) for q in queries]
+    regex_s = time.perf_counter() - t
+    t = time.perf_counter()
+    registry_ids = [registry.canonical(q) for q in queries]
+    registry_s = time.perf_counter() - t
+
+    slash = sum("/" in q for q in queries)
+    agree = sum(a == b for a, b, q in zip(regex_ids, registry_ids, queries) if "/" not in q)
+    print(f"{n} lookups over {len(keys)} aliases ({slash} cross-listed slash forms)")
+    print(f"  regex + db_course_id  {regex_s / n * 1e9:7.0f} ns/lookup, "
+          f"{sum(r is None for r in regex_ids)} unresolved")
+    print(f"  registry              {registry_s / n * 1e9:7.0f} ns/lookup, "
+          f"{sum(r is None for r in registry_ids)} unresolved")
+    print(f"  agreement on single-subject ids: {agree}/{n - slash}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the canonical course-id registry.")
+    parser.add_argument("catalogs", nargs="*", help="<subject>_courses.json exports")
+    parser.add_argument("--degree", nargs="*", default=[str(p) for p in DEFAULT_TEMPLATES],
+                        help="degree templates (default: src/data/degree.json)")
+    parser.add_argument("--out", default=str(DEFAULT_REGISTRY))
+    parser.add_argument("--resolve", nargs="+", metavar="ID", help="look ids up in --out instead of building")
+    parser.add_argument("--bench", type=int, metavar="N", help="time N lookups against --out")
+    parser.add_argument("--check", action="store_true",
+                        help="check that the catalogs' cross-listings resolve to one group in --out")
+    args = parser.parse_args()
+
+    if args.check:
+        if not args.catalogs:
+            parser.error("--check needs the catalogs to check against")
+        reg = CourseRegistry.load(Path(args.out))
+        problems = check_cross_listings(reg, [json.loads(Path(p).read_text(encoding="utf-8")) for p in args.catalogs])
+        for p in problems:
+            print(f"  ! {p}")
+        print(f"Cross-listings: {len(problems)} not linked in {args.out}")
+        raise SystemExit(1 if problems else 0)
+    if args.resolve or args.bench:
+        reg = CourseRegistry.load(Path(args.out))
+        for raw in args.resolve or []:
+            print(f"{raw!r:>16} -> {reg.canonical(raw)}  (same course: {', '.join(reg.equivalents(raw)) or '-'})")
+        if args.bench:
+            bench(reg, args.bench)
+    elif args.catalogs:
+        build_from_files([Path(p) for p in args.catalogs], [Path(p) for p in args.degree], Path(args.out))
+    else:
+        parser.error("give catalogs to build, or --resolve / --bench")
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+course_search.py
+
+Full-text search over the scraped catalog (title, description, attributes),
+with typo tolerance. Built once at scrape time, then queried from a
+memory-mapped artifact so a lookup only touches the postings it needs.
+
+Scoring is BM25F: a term's frequency is summed across fields with
+FIELD_WEIGHTS (a title hit counts more than a description hit), then run
+through BM25 saturation and length normalization. The per-(term, course)
+impact is precomputed at build time, so a query is a sum over postings.
+
+Typo tolerance: a query term that isn't in the vocabulary is matched against
+a trigram table ("$algoritm$" shares most trigrams with "algorithms") and the
+candidates within MAX_EDITS of it count at FUZZY_WEIGHT per edit. The last
+query term also matches as a prefix ("data struct"), for search-as-you-type.
+A query that is itself a course id ("CS 15", "cs15") puts that course first.
+
+File layout (little-endian), same shape as catalog_columns.py:
+  b"JPSRCH\\0\\1"  magic + format version
+  u32              header length, then the header as UTF-8 JSON
+  sections         8-byte aligned, offsets relative to the first section:
+    doc_id / doc_title        string tables (u32 offsets[n + 1] + UTF-8 blob), by id
+    term                      sorted vocabulary, string table
+    post_offsets              u32[terms + 1] into post_docs / post_impact
+    post_docs, post_impact    u32 course rows, f16 BM25F impact
+    tri_codes                 sorted u32 trigram codes
+    tri_offsets, tri_terms    u32[trigrams + 1] into u32 term ids
+
+USAGE:
+  python3 course_search.py cs_courses.json [math_courses.json ...] --out catalog.search
+  python3 course_search.py --read catalog.search "data structres"
+  python3 course_search.py --bench 200
+  (scrape.py also writes <subject>_courses.search next to each JSON export)
+
+DEPENDENCIES:
+  pip install numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import mmap
+import re
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from catalog_columns import string_section, synthetic_catalog
+from eligibility import canonical_course_id
+from prereq_compiler import catalog_key_to_id
+
+
+MAGIC = b"JPSRCH\x00\x01"
+FIELD_WEIGHTS = {"title": 3.0, "attributes": 1.5, "description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+FUZZY_WEIGHT = 0.6      # score multiplier per edit
+PREFIX_WEIGHT = 0.8     # score multiplier for a prefix completion
+MAX_PREFIX_TERMS = 32
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or that the this to with "
+    "will students course courses".split()
+)
+
+
+# -----------------------------
+# Tokenizer
+# -----------------------------
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def trigrams(term: str) -> List[int]:
+    """Trigram codes of "$term$"; terms are ASCII, so three bytes pack into a u32."""
+    padded = f"${term}$".encode("ascii")
+    return sorted({padded[i] << 16 | padded[i + 1] << 8 | padded[i + 2] for i in range(len(padded) - 2)})
+
+
+def max_edits(term: str) -> int:
+    return 0 if len(term) <= 3 else 1 if len(term) <= 6 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance, giving up (returning limit + 1) once it can't be <= limit.
+    Only the diagonal band |i - j| <= limit can stay under the limit, so only it is filled.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        cur = [over] * (len(b) + 1)
+        if lo == 1:
+            cur[0] = i
+        best = cur[lo - 1]
+        for j in range(lo, hi + 1):
+            cost = prev[j - 1] + (ca != b[j - 1])
+            if prev[j] + 1 < cost:
+                cost = prev[j] + 1
+            if cur[j - 1] + 1 < cost:
+                cost = cur[j - 1] + 1
+            cur[j] = cost
+            if cost < best:
+                best = cost
+        if best > limit:
+            return over
+        prev = cur
+    return min(prev[-1], over)
+
+
+# -----------------------------
+# Build
+# -----------------------------
+
+def build_index(catalog: Dict[str, Any], out_path: Path) -> Dict[str, int]:
+    """
+    Index {key: record} (an export or checkpoint records) into out_path.
+    Returns {"docs": n, "terms": m, "postings": p, "bytes": size}.
+    """
+    docs = sorted(
+        (cid, rec) for key, rec in catalog.items()
+        if isinstance(rec, dict) and (cid := catalog_key_to_id(key))
+    )
+    n = len(docs)
+
+    # term -> {row: weighted tf}, plus weighted doc lengths
+    tf: Dict[str, Dict[int, float]] = {}
+    lengths = np.zeros(n, dtype=np.float64)
+    for row, (_, rec) in enumerate(docs):
+        for field, weight in FIELD_WEIGHTS.items():
+            tokens = tokenize(rec.get(field, ""))
+            lengths[row] += weight * len(tokens)
+            for t in tokens:
+                per_doc = tf.setdefault(t, {})
+                per_doc[row] = per_doc.get(row, 0.0) + weight
+    avg_length = float(lengths.mean()) if n else 0.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (avg_length or 1.0))
+
+    vocab = sorted(tf)
+    post_offsets = np.zeros(len(vocab) + 1, dtype="<u4")
+    post_docs: List[np.ndarray] = []
+    post_impact: List[np.ndarray] = []
+    for i, term in enumerate(vocab):
+        per_doc = tf[term]
+        rows = np.fromiter(per_doc.keys(), dtype=np.int64, count=len(per_doc))
+        freqs = np.fromiter(per_doc.values(), dtype=np.float64, count=len(per_doc))
+        order = np.argsort(rows)
+        rows, freqs = rows[order], freqs[order]
+        idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+        post_docs.append(rows.astype("<u4"))
+        post_impact.append((idf * freqs * (BM25_K1 + 1) / (freqs + norm[rows])).astype("<f2"))
+        post_offsets[i + 1] = post_offsets[i] + len(rows)
+
+    pairs = sorted((code, tid) for tid, term in enumerate(vocab) for code in trigrams(term))
+    tri_codes, tri_counts = np.unique(np.asarray([c for c, _ in pairs], dtype="<u4"), return_counts=True)
+    tri_offsets = np.zeros(len(tri_codes) + 1, dtype="<u4")
+    np.cumsum(tri_counts, out=tri_offsets[1:])
+
+    sections: Dict[str, Tuple[bytes, str]] = {}
+    for name, values in (("doc_id", [d[0] for d in docs]),
+                         ("doc_title", [d[1].get("title", "") for d in docs]),
+                         ("term", vocab)):
+        offsets, blob = string_section(values)
+        sections[f"{name}_offsets"] = (offsets, "<u4")
+        sections[f"{name}_blob"] = (blob, "|u1")
+    empty_u4, empty_f2 = np.zeros(0, dtype="<u4"), np.zeros(0, dtype="<f2")
+    sections["post_offsets"] = (post_offsets.tobytes(), "<u4")
+    sections["post_docs"] = (np.concatenate(post_docs or [empty_u4]).tobytes(), "<u4")
+    sections["post_impact"] = (np.concatenate(post_impact or [empty_f2]).tobytes(), "<f2")
+    sections["tri_codes"] = (tri_codes.astype("<u4").tobytes(), "<u4")
+    sections["tri_offsets"] = (tri_offsets.tobytes(), "<u4")
+    sections["tri_terms"] = (np.asarray([t for _, t in pairs], dtype="<u4").tobytes(), "<u4")
+
+    layout: Dict[str, List[Any]] = {}
+    pos = 0
+    for name, (data, dtype) in sections.items():
+        pos += -pos % 8
+        layout[name] = [pos, len(data), dtype]
+        pos += len(data)
+    header = json.dumps({
+        "docs": n, "terms": len(vocab), "avgLength": avg_length,
+        "params": {"fields": FIELD_WEIGHTS, "k1": BM25_K1, "b": BM25_B},
+        "sections": layout,
+    }).encode("utf-8")
+    start = len(MAGIC) + 4 + len(header)
+    start += -start % 8
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for name, (data, _) in sections.items():
+            f.write(b"\0" * (start + layout[name][0] - f.tell()))
+            f.write(data)
+    tmp.replace(out_path)
+    return {"docs": n, "terms": len(vocab), "postings": int(post_offsets[-1]), "bytes": out_path.stat().st_size}
+
+
+# -----------------------------
+# Query
+# -----------------------------
+
+class SearchIndex:
+    """
+    Read-only view over a .search file. Opening parses only the header.
+
+        with SearchIndex("catalog.search") as index:
+            for course_id, title, score in index.search("machine learnign"):
+                ...
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._f = self.path.open("rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path}: not a course search index")
+        (hlen,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mm[start:start + hlen].decode("utf-8"))
+        self._base = start + hlen + (-(start + hlen) % 8)
+        self.docs: int = header["docs"]
+        self.terms: int = header["terms"]
+        self._layout: Dict[str, List[Any]] = header["sections"]
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # numpy views pin the map; drop them before closing it
+        self._arrays.clear()
+        self._mm.close()
+        self._f.close()
+
+    def _array(self, name: str) -> np.ndarray:
+        arr = self._arrays.get(name)
+        if arr is None:
+            offset, length, dtype = self._layout[name]
+            dtype = np.dtype(dtype)
+            arr = self._arrays[name] = np.frombuffer(self._mm, dtype=dtype, count=length // dtype.itemsize,
+                                                     offset=self._base + offset)
+        return arr
+
+    def _bytes(self, table: str, i: int) -> bytes:
+        offsets = self._array(f"{table}_offsets")
+        base = self._base + self._layout[f"{table}_blob"][0]
+        return self._mm[base + int(offsets[i]):base + int(offsets[i + 1])]
+
+    def _lower_bound(self, table: str, count: int, target: bytes) -> int:
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._bytes(table, mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    # -- lookups --
+
+    def term_id(self, term: str) -> Optional[int]:
+        target = term.encode("ascii")
+        i = self._lower_bound("term", self.terms, target)
+        return i if i < self.terms and self._bytes("term", i) == target else None
+
+    def term(self, tid: int) -> str:
+        return self._bytes("term", tid).decode("ascii")
+
+    def doc_row(self, course: str) -> Optional[int]:
+        cid = canonical_course_id(course)
+        if cid is None:
+            return None
+        target = cid.encode("ascii")
+        i = self._lower_bound("doc_id", self.docs, target)
+        return i if i < self.docs and self._bytes("doc_id", i) == target else None
+
+    def prefix_terms(self, prefix: str) -> List[int]:
+        target = prefix.encode("ascii")
+        lo = self._lower_bound("term", self.terms, target)
+        hi = min(self._lower_bound("term", self.terms, target + b"\x7f"), lo + MAX_PREFIX_TERMS)
+        return list(range(lo, hi))
+
+    def fuzzy_terms(self, term: str) -> List[Tuple[int, int]]:
+        """(term id, edits) for vocabulary terms within max_edits(term) of term."""
+        limit = max_edits(term)
+        if not limit:
+            return []
+        codes = self._array("tri_codes")
+        offsets = self._array("tri_offsets")
+        tri_terms = self._array("tri_terms")
+        query = np.asarray(trigrams(term), dtype="<u4")
+        at = np.searchsorted(codes, query)
+        hit = at < len(codes)
+        hit[hit] = codes[at[hit]] == query[hit]
+        if not hit.any():
+            return []
+        ranges = [tri_terms[offsets[i]:offsets[i + 1]] for i in at[hit]]
+        candidates, shared = np.unique(np.concatenate(ranges), return_counts=True)
+        # One edit breaks at most three trigrams, and changes the length by at most one
+        term_offsets = self._array("term_offsets")
+        lengths = term_offsets[candidates + 1].astype(np.int64) - term_offsets[candidates]
+        keep = (shared >= max(1, len(query) - 3 * limit)) & (np.abs(lengths - len(term)) <= limit)
+        out = []
+        for tid in candidates[keep][np.argsort(-shared[keep], kind="stable")][:32].tolist():
+            edits = edit_distance(term, self.term(tid), limit)
+            if edits <= limit:
+                out.append((tid, edits))
+        return out
+
+    # -- search --
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, str, float]]:
+        """Top `limit` courses as (course id, title, score), best first."""
+        post_offsets = self._array("post_offsets")
+        expanded: List[Tuple[int, float]] = []
+        tokens = tokenize(query)
+        for i, token in enumerate(tokens):
+            tid = self.term_id(token)
+            if tid is not None:
+                expanded.append((tid, 1.0))
+            prefixed = self.prefix_terms(token) if i == len(tokens) - 1 and len(token) >= 3 else []
+            expanded.extend((t, PREFIX_WEIGHT) for t in prefixed if t != tid)
+            if tid is None and not prefixed:
+                expanded.extend((t, FUZZY_WEIGHT ** edits) for t, edits in self.fuzzy_terms(token))
+
+        scores = np.zeros(self.docs, dtype=np.float32)
+        if expanded:
+            post_docs = self._array("post_docs")
+            post_impact = self._array("post_impact")
+            for tid, weight in expanded:
+                a, b = int(post_offsets[tid]), int(post_offsets[tid + 1])
+                scores[post_docs[a:b]] += weight * post_impact[a:b].astype(np.float32)
+        exact = self.doc_row(query)
+        if exact is not None:
+            scores[exact] = scores.max() + 1.0
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > limit:
+            hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self._bytes("doc_id", r).decode("ascii"), self._bytes("doc_title", r).decode("utf-8"),
+                 float(scores[r])) for r in hits.tolist()]
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+BENCH_QUERIES = [
+    "data structures", "machine learning", "operating systems", "algorithms",
+    "computer graphics", "probability", "security", "databases", "compilers",
+    "algoritms", "machin learnign", "dta structres", "oprating systms",
+    "netw", "program", "CS 15", "cs160", "SOE-Computing", "artificial intelligence",
+    "software engineering",
+]
+
+
+def bench(catalog_path: str, subjects: int, workdir: Path, repeat: int) -> None:
+    base = json.loads(Path(catalog_path).read_text(encoding="utf-8"))
+    catalog = synthetic_catalog(base, subjects) if subjects > 1 else base
+    workdir.mkdir(parents=True, exist_ok=True)
+    out_path = workdir / "bench_courses.search"
+
+    t0 = time.perf_counter()
+    stats = build_index(catalog, out_path)
+    build_ms = (time.perf_counter() - t0) * 1000
+    print(f"{stats['docs']} courses, {stats['terms']} terms, {stats['postings']} postings: "
+          f"built in {build_ms:.0f} ms, {stats['bytes'] / 1e6:.2f} MB")
+
+    t0 = time.perf_counter()
+    index = SearchIndex(out_path)
+    print(f"  open: {(time.perf_counter() - t0) * 1000:.3f} ms")
+    with index:
+        first = {}
+        for q in BENCH_QUERIES:     # warm up: maps the sections
+            first[q] = index.search(q, limit=3)
+        timings: Dict[str, List[float]] = {q: [] for q in BENCH_QUERIES}
+        for _ in range(repeat):
+            for q in BENCH_QUERIES:
+                t0 = time.perf_counter()
+                index.search(q)
+                timings[q].append((time.perf_counter() - t0) * 1000)
+        print(f"  {'query':24} {'p50 ms':>8} {'p99 ms':>8}  top hit")
+        for q in BENCH_QUERIES:
+            p50, p99 = np.percentile(timings[q], [50, 99])
+            top = first[q][0][:2] if first[q] else ("-", "")
+            print(f"  {q:24} {p50:8.3f} {p99:8.3f}  {top[0]} {top[1][:36]}")
+        every = np.concatenate([timings[q] for q in BENCH_QUERIES])
+        p50, p95, p99 = np.percentile(every, [50, 95, 99])
+        print(f"  all queries: p50 {p50:.3f} ms, p95 {p95:.3f} ms, p99 {p99:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the course search index.")
+    parser.add_argument("catalogs", nargs="*", help="<subject>_courses.json exports to index (or, with --read, the query)")
+    parser.add_argument("--out", default="catalog.search", help="output .search file")
+    parser.add_argument("--read", default=None, help="query an existing .search file")
+    parser.add_argument("--limit", type=int, default=10, help="results per query")
+    parser.add_argument("--bench", type=int, default=0, metavar="SUBJECTS",
+                        help="build and query a synthetic catalog of this many subjects")
+    parser.add_argument("--base", default="cs_courses.json", help="catalog the --bench data is copied from")
+    parser.add_argument("--repeat", type=int, default=50, help="query repetitions for --bench")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.base, args.bench, Path(args.out).resolve().parent, args.repeat)
+    elif args.read:
+        with SearchIndex(Path(args.read)) as index:
+            query = " ".join(args.catalogs)
+            t0 = time.perf_counter()
+            results = index.search(query, args.limit)
+            elapsed = (time.perf_counter() - t0) * 1000
+            for course_id, title, score in results:
+                print(f"{score:7.2f}  {course_id:10} {title}")
+            print(f"{len(results)} results in {elapsed:.3f} ms")
+    else:
+        merged: Dict[str, Any] = {}
+        for path in args.catalogs or ["cs_courses.json"]:
+            merged.update(json.loads(Path(path).read_text(encoding="utf-8")))
+        stats = build_index(merged, Path(args.out))
+        print(f"Indexed {stats['docs']} courses ({stats['terms']} terms) into {args.out} ({stats['bytes']} bytes)")
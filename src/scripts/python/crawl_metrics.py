@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+crawl_metrics.py
+
+Timing spans for scrape.py, so a slow crawl can be pinned on SIS latency,
+modal rendering or our own waits.
+
+Every phase of a course runs inside a span:
+  navigate         goto the catalog and open the alpha letter
+  expand_group     click the subject group and wait for its course list
+  course           one row, end to end (holds the spans below)
+  open_modal       click the course link until the modal shows content
+  campus_link      multi-offering courses only: pick the Medford/Somerville offering
+  extract_fields   read the detail fields out of the modal
+  back_navigation  return to the list; path says which way (back_link,
+                   back_link_x2, ptpopupclose, escape)
+  replay_fetch     --mode replay: one course over HTTP
+A span also keeps its retry count and every fallback taken inside it: readiness
+waits that fell through on their bound (see scrape.wait_until) land on the
+innermost open span as "timeout:<wait step>".
+
+Spans nest per asyncio task (contextvars), so parallel workers don't mix.
+
+Memory: peak RSS is sampled after every course across this process and all
+its descendants (the Playwright driver and every Chromium process), read from
+/proc. Where /proc isn't available it falls back to this process's own peak,
+and the report says so in "rssScope".
+
+Report (written by scrape.py at the end of a run):
+  <stem>.json  {"wallSeconds", "courses", "coursesPerMinute", "peakRssMB", "rssScope",
+                "subjects": {...}, "meta": {"profile", ...},
+                "steps": {step: {"n", "errors", "retries", "p50", "p95", "p99",
+                                 "mean", "max", "paths", "fallbacks"}}}
+  <stem>.csv   one row per step with the same numbers (ms)
+
+USAGE:
+  python3 scrape.py --subjects CS --progress --metrics crawl_metrics
+  python3 crawl_metrics.py crawl_metrics.json     # print a saved report
+  python3 crawl_metrics.py full.json lean.json    # compare runs side by side
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+PERCENTILES = (50, 95, 99)
+CSV_COLUMNS = ["step", "n", "errors", "retries", "p50", "p95", "p99", "mean", "max", "fallbacks"]
+
+
+@dataclass
+class Span:
+    step: str
+    subject: str = ""
+    course: str = ""
+    ms: float = 0.0
+    ok: bool = True
+    retries: int = 0
+    path: str = ""
+    fallbacks: List[str] = field(default_factory=list)
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("crawl_span", default=None)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Linear interpolation between closest ranks (numpy's default)."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def process_tree_rss() -> Optional[int]:
+    """RSS in bytes of this process plus every descendant, or None without /proc."""
+    proc = Path("/proc")
+    if not (proc / "self" / "status").exists():
+        return None
+    children: Dict[int, List[int]] = {}
+    for d in proc.iterdir():
+        if not d.name.isdigit():
+            continue
+        try:
+            stat = (d / "stat").read_text()
+        except OSError:
+            continue
+        # Fields after "(comm)": state, ppid, ...; comm itself may contain spaces
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(d.name))
+    total = 0
+    stack = [os.getpid()]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            pass
+        stack.extend(children.get(pid, []))
+    return total
+
+
+def self_peak_rss() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# -----------------------------
+# Recorder
+# -----------------------------
+
+class CrawlMetrics:
+    def __init__(self, show_progress: bool = False):
+        self.spans: List[Span] = []
+        self.show_progress = show_progress
+        self._t0 = time.perf_counter()
+        self._progress: Optional[Dict[str, Any]] = None
+        # Run settings and counters the report carries verbatim (profile, blocked requests, ...)
+        self.meta: Dict[str, Any] = {}
+        self.peak_rss = 0
+        self.rss_scope = "process tree"
+
+    def sample_memory(self) -> None:
+        rss = process_tree_rss()
+        if rss is None:
+            self.rss_scope = "python only"
+            rss = self_peak_rss()
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def count(self, key: str, n: int = 1) -> None:
+        self.meta[key] = self.meta.get(key, 0) + n
+
+    @contextmanager
+    def span(self, step: str, subject: str = "", course: str = "", retries: int = 0) -> Iterator[Span]:
+        s = Span(step, subject=subject, course=course, retries=retries)
+        token = _current.set(s)
+        start = time.perf_counter()
+        try:
+            yield s
+        except BaseException:
+            s.ok = False
+            raise
+        finally:
+            s.ms = (time.perf_counter() - start) * 1000
+            _current.reset(token)
+            self.spans.append(s)
+
+    @staticmethod
+    def current() -> Optional[Span]:
+        return _current.get()
+
+    def fallback(self, what: str) -> None:
+        """Note a fallback on the innermost open span of this task, if any."""
+        s = _current.get()
+        if s is not None:
+            s.fallbacks.append(what)
+
+    # -- progress --
+
+    def start_subject(self, subject: str, total: int) -> None:
+        self._progress = {"subject": subject, "total": total, "done": 0, "t0": time.perf_counter()}
+
+    def course_done(self) -> None:
+        self.sample_memory()
+        p = self._progress
+        if p is None:
+            return
+        p["done"] += 1
+        if not self.show_progress:
+            return
+        elapsed = time.perf_counter() - p["t0"]
+        rate = p["done"] / elapsed * 60 if elapsed else 0.0
+        left = p["total"] - p["done"]
+        eta = left / rate * 60 if rate else 0.0
+        line = (f"[progress] {p['subject']} {p['done']}/{p['total']} courses, "
+                f"{rate:.1f}/min, ETA {int(eta // 60)}m{int(eta % 60):02d}s")
+        # A full line every time: per-course log lines interleave with it, so
+        # redrawing in place would glue them onto the progress text
+        print(line, flush=True)
+
+    # -- report --
+
+    def report(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self._t0
+        self.sample_memory()
+        by_step: Dict[str, List[Span]] = {}
+        for s in self.spans:
+            by_step.setdefault(s.step, []).append(s)
+
+        steps: Dict[str, Dict[str, Any]] = {}
+        for step, spans in by_step.items():
+            times = sorted(s.ms for s in spans)
+            paths: Dict[str, int] = {}
+            fallbacks: Dict[str, int] = {}
+            for s in spans:
+                if s.path:
+                    paths[s.path] = paths.get(s.path, 0) + 1
+                for f in s.fallbacks:
+                    fallbacks[f] = fallbacks.get(f, 0) + 1
+            row: Dict[str, Any] = {
+                "n": len(spans),
+                "errors": sum(not s.ok for s in spans),
+                "retries": sum(s.retries for s in spans),
+            }
+            for p in PERCENTILES:
+                row[f"p{p}"] = round(percentile(times, p), 1)
+            row["mean"] = round(sum(times) / len(times), 1)
+            row["max"] = round(times[-1], 1)
+            row["paths"] = paths
+            row["fallbacks"] = fallbacks
+            steps[step] = row
+
+        finished = [s for s in self.spans if s.step in ("course", "replay_fetch") and s.ok]
+        subjects: Dict[str, Dict[str, Any]] = {}
+        for s in finished:
+            subjects.setdefault(s.subject, {"courses": 0})["courses"] += 1
+        return {
+            "wallSeconds": round(wall, 2),
+            "courses": len(finished),
+            "coursesPerMinute": round(len(finished) / wall * 60, 2) if wall else 0.0,
+            "peakRssMB": round(self.peak_rss / 2 ** 20, 1),
+            "rssScope": self.rss_scope,
+            "subjects": subjects,
+            "meta": self.meta,
+            "steps": steps,
+        }
+
+    def write_report(self, stem: Path) -> Dict[str, Any]:
+        """Write <stem>.json and <stem>.csv; returns the report."""
+        report = self.report()
+        stem = Path(stem)
+        stem.parent.mkdir(parents=True, exist_ok=True)
+        json_path = stem.with_name(stem.name + ".json")
+        csv_path = stem.with_name(stem.name + ".csv")
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        with csv_path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for step, row in report["steps"].items():
+                writer.writerow([step] + [row[c] for c in CSV_COLUMNS[1:-1]] + [sum(row["fallbacks"].values())])
+        print(f"Crawl metrics written to {json_path} and {csv_path}")
+        return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{report['courses']} courses in {report['wallSeconds']:.0f} s "
+          f"({report['coursesPerMinute']:.1f} courses/min), peak RSS {report.get('peakRssMB', 0):.0f} MB "
+          f"({report.get('rssScope', '?')})")
+    if report.get("meta"):
+        print("  " + ", ".join(f"{k}={v}" for k, v in report["meta"].items()))
+    print(f"  {'step':<16} {'n':>5} {'err':>4} {'retry':>5} {'p50':>8} {'p95':>8} {'p99':>8}  fallbacks / paths")
+    for step, row in report["steps"].items():
+        extra = ", ".join(f"{k}={v}" for k, v in {**row["paths"], **row["fallbacks"]}.items())
+        print(f"  {step:<16} {row['n']:5} {row['errors']:4} {row['retries']:5} "
+              f"{row['p50']:8.0f} {row['p95']:8.0f} {row['p99']:8.0f}  {extra}")
+
+
+def compare_reports(reports: Dict[str, Dict[str, Any]]) -> None:
+    """One column per run: throughput, per-course latency and peak memory."""
+    def course(r: Dict[str, Any], key: str) -> float:
+        return r["steps"].get("course", {}).get(key, 0.0)
+
+    rows = [
+        ("profile", lambda r: str(r.get("meta", {}).get("profile", "?"))),
+        ("courses", lambda r: str(r["courses"])),
+        ("courses/min", lambda r: f"{r['coursesPerMinute']:.1f}"),
+        ("course p50 ms", lambda r: f"{course(r, 'p50'):.0f}"),
+        ("course p95 ms", lambda r: f"{course(r, 'p95'):.0f}"),
+        ("course p99 ms", lambda r: f"{course(r, 'p99'):.0f}"),
+        ("peak RSS MB", lambda r: f"{r.get('peakRssMB', 0):.0f}"),
+        ("blocked requests", lambda r: str(r.get("meta", {}).get("blockedRequests", 0))),
+    ]
+    names = list(reports)
+    width = max(14, *(len(n) for n in names))
+    print(f"{'':18}" + "".join(f"{n:>{width + 2}}" for n in names))
+    for label, get in rows:
+        print(f"{label:18}" + "".join(f"{get(reports[n]):>{width + 2}}" for n in names))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print or compare saved crawl metrics reports.")
+    parser.add_argument("reports", nargs="+", help="<stem>.json files written by scrape.py")
+    args = parser.parse_args()
+    loaded = {Path(r).stem: json.loads(Path(r).read_text(encoding="utf-8")) for r in args.reports}
+    if len(loaded) == 1:
+        print_report(next(iter(loaded.values())))
+    else:
+        compare_reports(loaded)
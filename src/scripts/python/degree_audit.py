@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+degree_audit.py
+
+Checks a transcript against the degree template (degree.json from
+parse_degree_pdf.py): which requirement each completed course counts toward,
+what is still missing, and whether minTotalSHU is met.
+
+Assignment:
+  Courses and requirement slots form a flow network
+    source -> course (1) -> requirement (1) -> sink (slots)
+  so a max flow is the largest assignment in which no course is counted twice.
+  "Two courses from different departments" (BIO-CHEM-PHY) routes each course
+  through a per-department node of capacity 1. Elective eligibility mirrors
+  src/lib/electiveConfig.ts (course lists, number ranges, catalog attributes).
+  Grades: course_or items use their own minGrade; other cs_core items (and
+  course_or items that only flag one) use gradingRules.coreMinGrade; pass/fail grades don't count when
+  letterGradeRequired is set. A missing grade is treated as fine (in progress).
+
+Incremental re-evaluation:
+  DegreeAudit keeps the flow. Adding a course runs one augmenting-path search
+  from that course; removing one cancels its unit of flow and runs one search
+  from the unassigned courses to refill the slot it freed. Only the groups whose assignment changed are
+  re-summarized.
+
+USAGE:
+  python3 degree_audit.py --transcript transcript.json [--degree ../../data/degree.json] [--catalog cs_courses.json]
+    transcript.json: [{"course": "CS 15", "grade": "B+", "shu": 4, "attributes": ["SOE-Computing"]}, ...]
+    (only "course" is required; shu / attributes default to the catalog)
+  python3 degree_audit.py --bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from eligibility import canonical_course_id
+from prereq_compiler import catalog_key_to_id
+from prereq_index import DEFAULT_DEGREE, template_course_ids
+from schedule_planner import DEFAULT_SHU, parse_units
+
+
+# -----------------------------
+# Elective rules (mirrors src/lib/electiveConfig.ts)
+# -----------------------------
+
+@dataclass(frozen=True)
+class ElectiveRule:
+    courses: Tuple[str, ...] = ()                       # explicit sheet-style codes, "PHY 11"
+    ranges: Tuple[Tuple[str, int, int], ...] = ()       # (subject, lo, hi), inclusive
+    exclude: Tuple[Tuple[str, int, int], ...] = ()
+    attributes: Tuple[str, ...] = ()                    # any catalog attribute containing one of these
+    subjects: Tuple[str, ...] = ()                      # any course in these subjects
+    not_courses: Tuple[str, ...] = ()
+    distinct_departments: bool = False
+
+
+ELECTIVE_RULES: Dict[str, ElectiveRule] = {
+    "notes_a": ElectiveRule(courses=("PHY 11", "CHEM 1", "CHEM 11", "CHEM 16", "BIO 13", "BIO 14"),
+                            distinct_departments=True),
+    "notes_b": ElectiveRule(attributes=("SOE-Mathematics", "SOE-Natural Sciences")),
+    "notes_c": ElectiveRule(courses=("MATH 166", "ES 56", "EE 24", "EE 104", "BME 141", "PHY 153")),
+    "notes_d": ElectiveRule(attributes=("SOE-HASS-Humanities",), not_courses=("ENG 1", "ENG 3")),
+    "notes_e": ElectiveRule(attributes=("SOE-HASS-Social Sciences",), not_courses=("EM 52",)),
+    "notes_g": ElectiveRule(attributes=("SOE-HASS",)),
+    "notes_h": ElectiveRule(courses=("ES 2",), attributes=("SOE-Computing", "SOE-Engineering")),
+    "notes_i": ElectiveRule(courses=("ES 4", "EE 14", "EE 20", "CS 45", "CS 111", "CS 112", "CS 114",
+                                     "CS 116", "CS 117", "CS 118", "CS 119", "CS 120", "CS 121", "CS 122",
+                                     "CS 124", "CS 140", "CS 146", "CS 147")),
+    "notes_j": ElectiveRule(ranges=(("CS", 100, 179),), exclude=(("CS", 153, 155),)),
+    "notes_k": ElectiveRule(ranges=(("CS", 16, 199),),
+                            exclude=(("CS", 53, 55), ("CS", 61, 61), ("CS", 97, 99), ("CS", 153, 155),
+                                     ("CS", 182, 188))),
+    "notes_l": ElectiveRule(ranges=(("CS", 16, 179),),
+                            exclude=(("CS", 53, 55), ("CS", 61, 61), ("CS", 93, 99), ("CS", 153, 155)),
+                            courses=("MATH 42", "MATH 44", "MATH 51", "MATH 63", "MATH 70", "MATH 72")),
+    "notes_m": ElectiveRule(courses=("CS 27", "CS 28", "CS 55", "CS 116", "CS 120", "CS 139", "CS 155"),
+                            ranges=(("CS", 182, 188),)),
+    "notes_n": ElectiveRule(attributes=("SOE-HASS",),
+                            courses=("BME 50", "CEE 32", "ME 10", "ME 20", "ME 30", "ME 40", "ME 50",
+                                     "CS 99", "ES 85"),
+                            subjects=("ENP", "ENT", "EM", "EXP", "PE")),
+}
+
+GRADE_ORDER = ["F", "D-", "D", "D+", "C-", "C", "C+", "B-", "B", "B+", "A-", "A", "A+"]
+PASS_GRADES = {"P", "PASS", "CR", "S"}
+ID_PARTS_RE = re.compile(r"^([A-Z]+)0*(\d+)")
+
+
+def ids_of(codes: Iterable[str]) -> Set[str]:
+    return {cid for code in codes for cid in template_course_ids(code)}
+
+
+@lru_cache(maxsize=None)
+def rule_ids(codes: Tuple[str, ...]) -> FrozenSet[str]:
+    return frozenset(ids_of(codes))
+
+
+def id_parts(cid: str) -> Tuple[str, int]:
+    m = ID_PARTS_RE.match(cid)
+    return (m.group(1), int(m.group(2))) if m else (cid, -1)
+
+
+# -----------------------------
+# Model
+# -----------------------------
+
+@dataclass
+class Taken:
+    id: str                      # database id, "CS0015"
+    course: str                  # as given, "CS 15"
+    shu: int
+    grade: Optional[str] = None
+    attributes: Tuple[str, ...] = ()
+
+
+@dataclass
+class Requirement:
+    rid: str
+    group: str
+    label: str
+    slots: int
+    ids: Set[str] = field(default_factory=set)          # concrete options (course / course_or)
+    rule: Optional[ElectiveRule] = None
+    min_shu: int = 0                                    # per course
+    total_shu: int = 0                                  # for "≥6 SHU" rules without a count
+    min_grade: Optional[str] = None
+
+    def accepts(self, c: Taken, letter_required: bool) -> bool:
+        if c.shu < self.min_shu:
+            return False
+        if c.grade:
+            g = c.grade.upper()
+            if g in PASS_GRADES:
+                if letter_required:
+                    return False
+            elif self.min_grade and g in GRADE_ORDER and GRADE_ORDER.index(g) < GRADE_ORDER.index(self.min_grade):
+                return False
+        if self.rule is None:
+            return c.id in self.ids
+        r = self.rule
+        if c.id in rule_ids(r.not_courses):
+            return False
+        subject, number = id_parts(c.id)
+        if any(s == subject and lo <= number <= hi for s, lo, hi in r.exclude):
+            return False
+        return (
+            c.id in rule_ids(r.courses)
+            or any(s == subject and lo <= number <= hi for s, lo, hi in r.ranges)
+            or subject in r.subjects
+            or any(a.lower() in attr.lower() for a in r.attributes for attr in c.attributes)
+        )
+
+
+def load_requirements(template: Dict[str, Any]) -> List[Requirement]:
+    core_grade = template.get("gradingRules", {}).get("coreMinGrade")
+    reqs: List[Requirement] = []
+    for group in template.get("groups", []):
+        gid = group.get("groupId", "")
+        for n, entry in enumerate(group.get("items", [])):
+            kind, data = entry.get("type"), entry.get("data", {})
+            rid = f"{gid}.{n}"
+            if kind == "course":
+                reqs.append(Requirement(rid, gid, data["course"], 1, ids=set(template_course_ids(data["course"])),
+                                        min_grade=core_grade if gid == "cs_core" else None))
+            elif kind == "course_or":
+                ids = ids_of(o["course"] for o in data.get("options", []) if o.get("course"))
+                rule = None
+                for o in data.get("options", []):
+                    if not o.get("course") and o.get("rulesRef") in ELECTIVE_RULES:
+                        # "ES 2 OR ENG-CS Elective": the elective rule already accepts the listed course
+                        rule = ELECTIVE_RULES[o["rulesRef"]]
+                # The item's own minGrade ("C-") wins; a bare flag or the core group gets coreMinGrade
+                item_grade = data.get("minGrade")
+                if isinstance(item_grade, str) and item_grade in GRADE_ORDER:
+                    grade = item_grade
+                else:
+                    grade = core_grade if item_grade or gid == "cs_core" else None
+                reqs.append(Requirement(rid, gid, data["label"], 1, ids=ids, rule=rule, min_grade=grade))
+            elif kind in ("elective_rule", "elective_set"):
+                rule = ELECTIVE_RULES.get(data.get("rulesRef", ""), ElectiveRule())
+                count = data.get("count")
+                if count:
+                    reqs.append(Requirement(rid, gid, data["label"], count, rule=rule,
+                                            min_shu=data.get("eachMinSHU") or 0,
+                                            min_grade=core_grade if gid == "cs_core" else None))
+                else:
+                    total = data.get("minSHU") or 0
+                    # "≥6 SHU" in however many courses: allow enough slots for 3 SHU courses
+                    slots = max(1, -(-total // DEFAULT_SHU))
+                    reqs.append(Requirement(rid, gid, data["label"], slots, rule=rule, total_shu=total,
+                                            min_grade=core_grade if gid == "cs_core" else None))
+    return reqs
+
+
+def load_catalog(catalogs: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    for cat in catalogs:
+        for key, rec in cat.items():
+            cid = catalog_key_to_id(key)
+            if cid and isinstance(rec, dict):
+                out[cid] = rec
+    return out
+
+
+def make_taken(entry: Any, catalog: Dict[str, Dict[str, Any]]) -> Optional[Taken]:
+    if isinstance(entry, str):
+        entry = {"course": entry}
+    cid = canonical_course_id(entry["course"])
+    if not cid:
+        return None
+    rec = catalog.get(cid, {})
+    attrs = entry.get("attributes")
+    if attrs is None:
+        attrs = [a.strip() for a in (rec.get("attributes") or "").split("\n") if a.strip()]
+    return Taken(
+        id=cid,
+        course=entry["course"],
+        shu=entry.get("shu") or parse_units(rec.get("units", "")) or DEFAULT_SHU,
+        grade=entry.get("grade"),
+        attributes=tuple(attrs),
+    )
+
+
+# -----------------------------
+# Audit
+# -----------------------------
+
+SOURCE, SINK = "S", "T"
+
+
+class DegreeAudit:
+    """Max-flow assignment of courses to requirement slots, kept between updates."""
+
+    def __init__(self, template: Dict[str, Any], catalogs: Sequence[Dict[str, Any]] = ()):
+        self.template = template
+        self.letter_required = bool(template.get("gradingRules", {}).get("letterGradeRequired"))
+        self.catalog = load_catalog(catalogs)
+        self.reqs = load_requirements(template)
+        self.req_by_id = {r.rid: r for r in self.reqs}
+        # Exact course requirements first: BFS then prefers them over electives
+        self.edge_order = sorted(self.reqs, key=lambda r: r.rule is not None)
+        self.searches = 0
+        self.reset()
+
+    def reset(self) -> None:
+        # residual capacities: cap[u][v]
+        self.cap: Dict[str, Dict[str, int]] = {SOURCE: {}, SINK: {}}
+        self.courses: Dict[str, Taken] = {}
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        for r in self.reqs:
+            self._edge(r.rid, SINK, r.slots)
+
+    # -- graph --
+
+    def _edge(self, u: str, v: str, c: int) -> None:
+        self.cap.setdefault(u, {})[v] = self.cap.get(u, {}).get(v, 0) + c
+        self.cap.setdefault(v, {}).setdefault(u, 0)
+
+    def _augment(self, start: str) -> Optional[List[str]]:
+        """BFS for a path start -> SINK in the residual graph; push one unit along it."""
+        self.searches += 1
+        prev = {start: None}
+        queue = deque([start])
+        while queue:
+            u = queue.popleft()
+            if u == SINK:
+                break
+            for v, c in self.cap[u].items():
+                if c > 0 and v not in prev and v != SOURCE:
+                    prev[v] = u
+                    queue.append(v)
+        if SINK not in prev:
+            return None
+        path = [SINK]
+        while prev[path[-1]] is not None:
+            path.append(prev[path[-1]])
+        path.reverse()
+        for u, v in zip(path, path[1:]):
+            self.cap[u][v] -= 1
+            self.cap[v][u] += 1
+        return path
+
+    def _course_node(self, cid: str) -> str:
+        return f"c:{cid}"
+
+    # -- updates --
+
+    def add(self, entry: Any) -> Set[str]:
+        """Add one course; returns the group ids whose assignment changed."""
+        c = entry if isinstance(entry, Taken) else make_taken(entry, self.catalog)
+        if c is None or c.id in self.courses:
+            return set()
+        self.courses[c.id] = c
+        node = self._course_node(c.id)
+        self._edge(SOURCE, node, 1)
+        for r in self.edge_order:
+            if r.accepts(c, self.letter_required):
+                if r.rule is not None and r.rule.distinct_departments:
+                    dept = f"{r.rid}:{id_parts(c.id)[0]}"
+                    if dept not in self.cap:
+                        self._edge(dept, r.rid, 1)
+                    self._edge(node, dept, 1)
+                else:
+                    self._edge(node, r.rid, 1)
+        before = self._snapshot()
+        if self.cap[SOURCE][node] > 0:
+            self.cap[SOURCE][node] -= 1
+            self.cap[node][SOURCE] += 1
+            if self._augment(node) is None:
+                self.cap[SOURCE][node] += 1
+                self.cap[node][SOURCE] -= 1
+        return self._refresh(before)
+
+    def remove(self, course: str) -> Set[str]:
+        cid = canonical_course_id(course)
+        if cid not in self.courses:
+            return set()
+        node = self._course_node(cid)
+        before = self._snapshot()
+        freed = None
+        if self.cap[node].get(SOURCE, 0) > 0:
+            # Undo this course's unit of flow: node -> (dept) -> req -> sink
+            self.cap[node][SOURCE] -= 1
+            self.cap[SOURCE][node] += 1
+            u = node
+            while u != SINK:
+                v = next(v for v, c in self.cap[u].items() if v != SOURCE and self._flow(u, v) > 0)
+                self.cap[u][v] += 1
+                self.cap[v][u] -= 1
+                if v in self.req_by_id:
+                    freed = v
+                u = v
+        for v in list(self.cap[node]):
+            del self.cap[v][node]
+        del self.cap[node]
+        del self.courses[cid]
+        if freed is not None:
+            # Max flow dropped by at most one; one augmenting path from any unassigned course restores it
+            self._augment(SOURCE)
+        return self._refresh(before)
+
+    def _flow(self, u: str, v: str) -> int:
+        """Flow on a forward edge u -> v (no edge has an antiparallel twin, so it's the reverse residual)."""
+        if v == SINK:
+            return self.req_by_id[u].slots - self.cap[u][v]
+        return self.cap[v].get(u, 0)
+
+    def solve_all(self, transcript: Iterable[Any]) -> None:
+        """Full audit from scratch (what the app does on every change today)."""
+        self.reset()
+        for entry in transcript:
+            self.add(entry)
+
+    # -- results --
+
+    def assignment(self) -> Dict[str, List[str]]:
+        """requirement id -> assigned course ids."""
+        out: Dict[str, List[str]] = {r.rid: [] for r in self.reqs}
+        for cid in self.courses:
+            node = self._course_node(cid)
+            if self.cap[node].get(SOURCE, 0) == 0:
+                continue
+            for v in self.cap[node]:
+                if v != SOURCE and self.cap[v].get(node, 0) > 0:
+                    # dept nodes are "<rid>:<subject>"
+                    rid = v if v in self.req_by_id else v.rsplit(":", 1)[0]
+                    out[rid].append(cid)
+        return out
+
+    def _snapshot(self) -> Dict[str, List[str]]:
+        return {k: sorted(v) for k, v in self.assignment().items()}
+
+    def _refresh(self, before: Dict[str, List[str]]) -> Set[str]:
+        after = self._snapshot()
+        changed = {self.req_by_id[rid].group for rid in after if after[rid] != before.get(rid)}
+        for gid in changed or {r.group for r in self.reqs if r.group not in self.groups}:
+            self.groups[gid] = self._group_status(gid, after)
+        return changed
+
+    def _group_status(self, gid: str, assigned: Dict[str, List[str]]) -> Dict[str, Any]:
+        items = []
+        for r in self.reqs:
+            if r.group != gid:
+                continue
+            got = assigned[r.rid]
+            shu = sum(self.courses[c].shu for c in got)
+            done = shu >= r.total_shu if r.total_shu else len(got) >= r.slots
+            items.append({"label": r.label, "courses": [self.courses[c].course for c in got],
+                          "needed": r.total_shu or r.slots, "unit": "SHU" if r.total_shu else "courses",
+                          "satisfied": done})
+        return {"satisfied": all(i["satisfied"] for i in items), "items": items}
+
+    def report(self) -> Dict[str, Any]:
+        assigned = self.assignment()
+        used = {c for cs in assigned.values() for c in cs}
+        total = sum(c.shu for c in self.courses.values())
+        return {
+            "complete": all(g["satisfied"] for g in self.groups.values()) and total >= self.template.get("minTotalSHU", 0),
+            "totalSHU": total,
+            "minTotalSHU": self.template.get("minTotalSHU", 0),
+            "groups": self.groups,
+            "unassigned": sorted(self.courses[c].course for c in self.courses if c not in used),
+        }
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+HASS_SAMPLES = [
+    {"course": "PHIL 1", "attributes": ["SOE-HASS-Humanities"]},
+    {"course": "HIST 10", "attributes": ["SOE-HASS-Humanities"]},
+    {"course": "ECON 5", "attributes": ["SOE-HASS-Social Sciences"]},
+    {"course": "PSY 1", "attributes": ["SOE-HASS-Social Sciences"]},
+    {"course": "MUS 20", "attributes": ["SOE-HASS-Arts"]},
+    {"course": "CHEM 1", "shu": 5}, {"course": "PHY 11", "shu": 5}, {"course": "BIO 13", "shu": 5},
+    {"course": "MATH 166"}, {"course": "ES 4"},
+]
+
+
+def synthetic_transcript(audit: DegreeAudit, rng: random.Random, size: int) -> List[Dict[str, Any]]:
+    sheet = sorted({cid for r in audit.reqs for cid in r.ids})
+    entries = [{"course": c} for c in sheet] + [{"course": c} for c in sorted(audit.catalog)] + HASS_SAMPLES
+    # One entry per course; a repeated course would make full and incremental audit different transcripts
+    pool = list({canonical_course_id(e["course"]): e for e in entries}.values())
+    picked = rng.sample(pool, min(size, len(pool)))
+    grades = GRADE_ORDER[4:] + ["P"]
+    return [dict(e, grade=rng.choice(grades)) for e in picked]
+
+
+def filled(audit: DegreeAudit) -> int:
+    return sum(len(v) for v in audit.assignment().values())
+
+
+def bench(template: Dict[str, Any], catalogs: Sequence[Dict[str, Any]], students: int, size: int) -> None:
+    rng = random.Random(0)
+    audit = DegreeAudit(template, catalogs)
+    check = DegreeAudit(template, catalogs)
+    full_ms: List[float] = []
+    inc_ms: List[float] = []
+    mismatches = 0
+    for _ in range(students):
+        transcript = synthetic_transcript(audit, rng, size + 1)
+        extra, base = transcript[0], transcript[1:]
+
+        t0 = time.perf_counter()
+        audit.solve_all(base + [extra])
+        full_ms.append((time.perf_counter() - t0) * 1000)
+
+        # Same end state reached incrementally: remove one course, add it back
+        t0 = time.perf_counter()
+        audit.remove(extra["course"])
+        audit.add(extra)
+        inc_ms.append((time.perf_counter() - t0) * 1000 / 2)
+
+        check.solve_all(base + [extra])
+        mismatches += filled(check) != filled(audit)
+    full, inc = statistics.median(full_ms), statistics.median(inc_ms)
+    print(f"{students} transcripts of {size} courses, {len(audit.reqs)} requirements")
+    print(f"  full audit:         median {full:7.3f} ms")
+    print(f"  incremental update: median {inc:7.3f} ms  ({full / inc:.0f}x faster)")
+    print(f"  max-flow mismatches between full and incremental: {mismatches}")
+
+
+# -----------------------------
+# Main
+# -----------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audit a transcript against the degree template.")
+    parser.add_argument("--transcript", default=None, help="JSON list of completed courses")
+    parser.add_argument("--degree", default=str(DEFAULT_DEGREE), help="degree template JSON")
+    parser.add_argument("--catalog", nargs="+", default=["cs_courses.json"], help="scraped catalog JSON files")
+    parser.add_argument("--bench", action="store_true", help="compare full and incremental audits")
+    parser.add_argument("--students", type=int, default=200, help="synthetic transcripts for --bench")
+    parser.add_argument("--size", type=int, default=40, help="courses per synthetic transcript")
+    args = parser.parse_args()
+
+    template = json.loads(Path(args.degree).read_text(encoding="utf-8"))
+    catalogs = [json.loads(Path(p).read_text(encoding="utf-8")) for p in args.catalog]
+    if args.bench:
+        bench(template, catalogs, args.students, args.size)
+    elif args.transcript:
+        audit = DegreeAudit(template, catalogs)
+        audit.solve_all(json.loads(Path(args.transcript).read_text(encoding="utf-8")))
+        print(json.dumps(audit.report(), indent=2))
+    else:
+        parser.error("pass --transcript or --bench")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+eligibility.py
+
+Batch prerequisite evaluation: which courses is each of many students eligible
+for, given what they have completed. Same semantics as evaluatePrereqNode in
+src/lib/prereqEval.ts:
+  - COURSE: satisfied if completed
+  - CONDITION: can't be checked, counts as satisfied
+  - AND / OR / MIN_K: all / at least one / at least k children satisfied
+    (so an empty AND is satisfied, an empty OR is not, like every() / some())
+  - a course without a prereq tree is always eligible
+
+How it is fast:
+  - Course ids are interned once. Student input is canonicalized to the padded
+    database form up front ("CS 11", "CS11", "CS0011" -> "CS0011") through the
+    course registry, which also marks cross-listings done (MATH 61 counts for
+    a CS 61 leaf), so evaluation never touches strings.
+  - Every tree node of every course is flattened into one node table and
+    grouped by height. AND, OR and MIN_K are all "count of satisfied children
+    >= threshold" (n, 1 and k), so each height is one gather + segment sum
+    (np.add.reduceat) over a students x nodes matrix.
+  - Results come back as a students x courses bool matrix, or packed to one
+    bitset per student (np.packbits, course order = engine.courses).
+
+USAGE:
+  python3 eligibility.py [cs_courses.json ...] [--prereqs prereqs.json] [--students 10000]
+  Builds the engine and times eligible_bits() on synthetic students.
+
+DEPENDENCIES:
+  pip install numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from course_registry import default_registry
+from prereq_compiler import catalog_key_to_id, compile_catalog, db_course_id
+
+
+COURSE_ID_RE = re.compile(r"^([A-Za-z]+)\s*(\d+[A-Za-z]?)$")
+
+
+def canonical_course_id(raw: str) -> Optional[str]:
+    """"CS 11" / "CS11" / "CS0011" / "cs 0011" -> "CS0011"; None if it doesn't look like a course.
+
+    A registry lookup (course_registry.py) when the id is registered, which also
+    resolves "CS/MATH 61"; the regex only for ids the registry hasn't seen.
+    """
+    registry = default_registry()
+    cid = registry.canonical(raw) if registry else None
+    if cid:
+        return cid
+    m = COURSE_ID_RE.match(raw.strip())
+    return db_course_id(m.group(1), m.group(2)) if m else None
+
+
+def completed_ids(raw: str) -> List[str]:
+    """Canonical ids a completed course counts as: itself plus its cross-listings (MATH 61 is CS 61)."""
+    registry = default_registry()
+    same = registry.equivalents(raw) if registry else []
+    if same:
+        return same
+    cid = canonical_course_id(raw)
+    return [cid] if cid else []
+
+
+class EligibilityEngine:
+    """Flattened, height-ordered prereq trees for a whole catalog."""
+
+    def __init__(self, trees: Dict[str, Optional[Dict[str, Any]]]):
+        # Output columns: every catalog course, in a stable order
+        self.courses: List[str] = sorted(trees)
+        self.course_index: Dict[str, int] = {c: i for i, c in enumerate(self.courses)}
+        # Completion columns: catalog courses first, then ids only seen inside trees (MATH0061, ...)
+        self.ids: List[str] = list(self.courses)
+        self.id_index: Dict[str, int] = dict(self.course_index)
+
+        # Node table. Leaves read a completion column; inner nodes have children + threshold.
+        self._leaf_col: List[int] = []      # per node: completion column, -1 = always true, -2 = inner
+        self._children: List[List[int]] = []
+        self._threshold: List[int] = []
+        self._height: List[int] = []
+        self.root_of_course = np.full(len(self.courses), -1, dtype=np.int64)
+        for course, tree in trees.items():
+            if tree is not None:
+                self.root_of_course[self.course_index[course]] = self._add(tree)
+        self._plan()
+
+    # -- building --
+
+    def _intern(self, course_id: str) -> int:
+        idx = self.id_index.get(course_id)
+        if idx is None:
+            idx = self.id_index[course_id] = len(self.ids)
+            self.ids.append(course_id)
+        return idx
+
+    def _add(self, node: Dict[str, Any]) -> int:
+        t = node["type"]
+        if t in ("COURSE", "CONDITION"):
+            col = self._intern(node["courseId"]) if t == "COURSE" and node.get("courseId") else -1
+            return self._push(col, [], 0, 0)
+        kids = [self._add(c) for c in node.get("children", [])]
+        if t == "AND":
+            threshold = len(kids)
+        elif t == "OR":
+            threshold = 1
+        elif t == "MIN_K":
+            threshold = 1 if node.get("k") is None else node["k"]
+        else:
+            # Unknown node types evaluate as satisfied, like the TS default branch
+            return self._push(-1, [], 0, 0)
+        height = 1 + max((self._height[k] for k in kids), default=0)
+        return self._push(-2, kids, threshold, height)
+
+    def _push(self, col: int, kids: List[int], threshold: int, height: int) -> int:
+        self._leaf_col.append(col)
+        self._children.append(kids)
+        self._threshold.append(threshold)
+        self._height.append(height)
+        return len(self._leaf_col) - 1
+
+    def _plan(self) -> None:
+        """Precompute, per height, the gather indices and segment starts for reduceat."""
+        leaf_col = np.asarray(self._leaf_col, dtype=np.int64)
+        self.n_nodes = len(leaf_col)
+        self.leaf_nodes = np.flatnonzero(leaf_col >= 0)
+        self.leaf_cols = leaf_col[self.leaf_nodes]
+        self.true_nodes = np.flatnonzero(leaf_col == -1)
+        self.levels = []
+        heights = np.asarray(self._height, dtype=np.int64)
+        for h in range(1, int(heights.max(initial=0)) + 1):
+            nodes = [n for n in np.flatnonzero(heights == h) if self._children[n]]
+            # Childless nodes that hold with zero children satisfied (AND, MIN_K 0); the rest stay 0
+            empty = [n for n in np.flatnonzero(heights == h) if not self._children[n] and self._threshold[n] <= 0]
+            gather: List[int] = []
+            starts: List[int] = []
+            for n in nodes:
+                starts.append(len(gather))
+                gather.extend(self._children[n])
+            self.levels.append((
+                np.asarray(nodes, dtype=np.int64),
+                np.asarray(gather, dtype=np.int64),
+                np.asarray(starts, dtype=np.int64),
+                np.asarray([self._threshold[n] for n in nodes], dtype=np.int64),
+                np.asarray(empty, dtype=np.int64),
+            ))
+
+    # -- evaluation --
+
+    def completed_matrix(self, students: Sequence[Iterable[str]]) -> np.ndarray:
+        """students x ids bool matrix. Unknown or malformed ids are ignored."""
+        done = np.zeros((len(students), len(self.ids)), dtype=bool)
+        for row, completed in enumerate(students):
+            for raw in completed:
+                for cid in completed_ids(raw):
+                    idx = self.id_index.get(cid)
+                    if idx is not None:
+                        done[row, idx] = True
+        return done
+
+    def eligible(self, done: np.ndarray) -> np.ndarray:
+        """students x courses bool matrix of prerequisite satisfaction."""
+        n_students = done.shape[0]
+        values = np.zeros((n_students, self.n_nodes), dtype=np.uint8)
+        values[:, self.leaf_nodes] = done[:, self.leaf_cols]
+        values[:, self.true_nodes] = 1
+        for nodes, gather, starts, threshold, empty in self.levels:
+            if len(nodes):
+                counts = np.add.reduceat(values[:, gather], starts, axis=1, dtype=np.int32)
+                values[:, nodes] = counts >= threshold
+            if len(empty):
+                values[:, empty] = 1
+        out = np.ones((n_students, len(self.courses)), dtype=bool)
+        has_tree = self.root_of_course >= 0
+        out[:, has_tree] = values[:, self.root_of_course[has_tree]].astype(bool)
+        return out
+
+    def eligible_bits(self, done: np.ndarray) -> np.ndarray:
+        """One packed bitset per student (students x ceil(courses / 8) uint8), bit order = self.courses."""
+        return np.packbits(self.eligible(done), axis=1)
+
+    def unlocked(self, done: np.ndarray) -> np.ndarray:
+        """Eligible and not already completed: the 'what can I take next' set."""
+        return self.eligible(done) & ~done[:, :len(self.courses)]
+
+    # -- loading --
+
+    @classmethod
+    def from_prereqs(cls, prereqs: Dict[str, Any], catalog_ids: Iterable[str] = ()) -> "EligibilityEngine":
+        """Build from prereq_compiler output; catalog_ids adds courses that have no requirements."""
+        trees: Dict[str, Optional[Dict[str, Any]]] = {c: None for c in catalog_ids}
+        for course, entry in prereqs["courses"].items():
+            trees[course] = entry["root"]
+        return cls(trees)
+
+    @classmethod
+    def from_catalogs(cls, catalog_paths: Sequence[str], prereqs_path: Optional[str] = None) -> "EligibilityEngine":
+        catalogs = [json.loads(Path(p).read_text(encoding="utf-8")) for p in catalog_paths]
+        if prereqs_path:
+            prereqs = json.loads(Path(prereqs_path).read_text(encoding="utf-8"))
+        else:
+            prereqs = compile_catalog(catalogs)
+        ids = [cid for cat in catalogs for cid in map(catalog_key_to_id, cat) if cid]
+        return cls.from_prereqs(prereqs, ids)
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def random_students(engine: EligibilityEngine, n: int, seed: int = 0) -> np.ndarray:
+    """Synthetic completion matrix: each student has done a random ~0-40% of the known ids."""
+    rng = np.random.default_rng(seed)
+    rate = rng.uniform(0.0, 0.4, size=(n, 1))
+    return rng.random((n, len(engine.ids))) < rate
+
+
+def main(catalog_paths: List[str], prereqs_path: Optional[str], n_students: int, repeat: int) -> None:
+    t0 = time.perf_counter()
+    engine = EligibilityEngine.from_catalogs(catalog_paths, prereqs_path)
+    t1 = time.perf_counter()
+    print(f"Built engine: {len(engine.courses)} courses, {len(engine.ids)} ids, "
+          f"{engine.n_nodes} nodes, {len(engine.levels)} levels in {(t1 - t0) * 1000:.1f} ms")
+
+    done = random_students(engine, n_students)
+    best = float("inf")
+    for _ in range(repeat):
+        s = time.perf_counter()
+        bits = engine.eligible_bits(done)
+        best = min(best, time.perf_counter() - s)
+    print(f"Evaluated {n_students} students x {len(engine.courses)} courses: "
+          f"best of {repeat} = {best * 1000:.1f} ms ({bits.shape[1]} bytes/student)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk prerequisite eligibility over a whole catalog.")
+    parser.add_argument("catalogs", nargs="*", default=["cs_courses.json"], help="scraped catalog JSON files")
+    parser.add_argument("--prereqs", default=None, help="prebuilt prereqs.json (compiled on the fly if omitted)")
+    parser.add_argument("--students", type=int, default=10000, help="synthetic students for the benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="benchmark repetitions")
+    args = parser.parse_args()
+    main(args.catalogs, args.prereqs, args.students, args.repeat)
@@ -9,30 +9,56 @@ It extracts:
   - footnote rules (a)–(n)
   - useful metadata + raw text dump for debugging
 
+Groups, courses, SHU values, attribute minima and the templateId are read off
+the sheet itself from word coordinates (see "Layout-aware parsing"), so the same
+parser works for any SOE/AS&E sheet laid out in header + SHU column boxes.
+
 It is designed for hackathon use: stable enough to generate JSON you can feed into your Next.js app,
 but still easy to tweak if the PDF layout changes.
 
 USAGE:
-  python3 parse_bscs_degree_pdf.py "/path/to/2027 BSCS (1).pdf" "data/degree_templates/tufts_bscs_2027.json"
+  python3 parse_bscs_degree_pdf.py "/path/to/2027 BSCS (1).pdf" "data/degree_templates/tufts_bscs_2027.json" \
+      [--profile prod|debug] [--compress gzip,br] [--report]
+  (batch_degree_pdfs.py runs this over a whole directory of sheets with a page cache)
+
+  --profile prod (default) writes compact JSON without the debug payload, which is what
+  the dashboard should bundle; --profile debug writes indented JSON plus <out>.debug.json
+  (page text, page-0 tables). Sidecars are gitignored and never ship with the app; write
+  debug output outside src/data. The input may also be an existing template JSON to re-emit.
+
+  python3 parse_bscs_degree_pdf.py --bench 50
+  Times the single-pass text tokenizer against the old per-field regex sweeps.
+
+  Page text comes from pdfium by default (--backend pdfplumber for the old path); pdfplumber
+  only opens the pages that need word coordinates or tables:
+  python3 parse_bscs_degree_pdf.py fixtures/degree/bscs_2027_sample.pdf --parity
+  python3 parse_bscs_degree_pdf.py fixtures/degree/bscs_2027_sample.pdf --bench-extract 1,4,16
 
 DEPENDENCIES:
-  pip install pdfplumber
+  pip install pdfplumber pypdfium2
+  pip install brotli   (pinned in requirements.txt; only for --compress br / the br column of --report)
 
 NOTES:
   - This script assumes the degree sheet has a text layer (not scanned image).
-  - It uses regex + some table extraction attempts; if table extraction fails, it falls back to text parsing.
+  - Boxes are found by their column header row ("<title> SHU C E M NS HASS None Term"); if a
+    sheet has none, it falls back to the built-in BSCS groups + text regexes.
 """
 
 from __future__ import annotations
 
+import argparse
+import gzip
+import hashlib
 import json
+import os
+import random
 import re
-import sys
-from dataclasses import dataclass
+import shutil
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-import pdfplumber
 
 
 # -----------------------------
@@ -40,7 +66,22 @@ import pdfplumber
 # -----------------------------
 
 COURSE_RE = re.compile(r"\b([A-Z]{2,5})\s*[-/]?\s*(\d{1,3}[A-Z]?)\b")  # e.g., CS 40, CS/MATH 61, MATH-42
-FOOTNOTE_RE = re.compile(r"^\(([a-n])\)\s+(.*)$", re.IGNORECASE)
+
+# Everything the text path looks for, as one pattern scanned once over all
+# pages joined by \f: page breaks, "(x)" footnote markers at the start of a
+# line, "E: 30" / "C = 30" / "HASS: 24" minima, and course references (same
+# matches as COURSE_RE). Every token starts with one of [\f(A-Zh], and the
+# pattern leads with exactly that class so re can skip between candidates with
+# its prefix search instead of trying every branch at every position; the
+# branches then look back at the consumed character. (?<!\w\w) is \b before it.
+SHEET_TOKEN_RE = re.compile(
+    r"[\f(A-Zh](?:"
+    r"(?<=\f)(?P<page>)"
+    r"|(?:(?<=^\()|(?<=\n\()|(?<=\f\())(?P<note>[a-n])\)[ \t]+"
+    r"|(?<!\w\w)(?P<attr>(?<=[EC])|(?<=[Hh])(?i:ASS))\s*[:=]\s*(?P<min>\d+)\b"
+    r"|(?<!\w\w)(?<=[A-Z])(?P<subj>[A-Z]{1,4})\s*[-/]?\s*(?P<num>\d{1,3}[A-Z]?)\b"
+    r")"
+)
 
 
 def norm_ws(s: str) -> str:
@@ -63,47 +104,75 @@ def safe_float(s: Optional[str]) -> Optional[float]:
         return None
 
 
-def load_pdf_text(pdf: pdfplumber.PDF) -> List[str]:
-    pages_text = []
-    for p in pdf.pages:
-        t = p.extract_text() or ""
-        pages_text.append(norm_ws(t))
-    return pages_text
+def scan_tokens(text: str) -> Iterator[Tuple[str, int, int, int, str]]:
+    """
+    (kind, page, start, end, value) for every token of SHEET_TOKEN_RE, in order.
+    kind is "note" (value = letter), "attr" (value = "E=30") or "course"
+    (value = "CS 40"); start/end are offsets into text, page counts \f breaks.
+    """
+    page = 0
+    for m in SHEET_TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == "page":
+            page += 1
+            yield "page", page, m.start(), m.end(), ""
+        elif kind == "note":
+            yield "note", page, m.start(), m.end(), m.group("note")
+        elif kind == "min":
+            # The first letter was consumed by the leading class
+            attr = (text[m.start()] + m.group("attr")).upper()
+            yield "attr", page, m.start(), m.end(), f"{attr}={m.group('min')}"
+        else:
+            yield "course", page, m.start(), m.end(), f"{text[m.start()]}{m.group('subj')} {m.group('num')}"
 
 
-def split_footnotes(text: str) -> Dict[str, str]:
+def scan_sheet(pages_text: List[str]) -> Dict[str, Any]:
     """
-    Extract footnote blocks "(a) ...", "(b) ..." from the notes page text.
-    Returns: { "a": "...", "b": "..." }
+    One pass over the sheet text. A footnote runs from its "(x)" marker to the
+    next marker or page break. The first E / C / HASS minimum of each kind wins.
+
+    Returns {"footnotes": {letter: text}, "footnoteSpans": {letter: [page, start, end]},
+             "attributeMinima": {"E": 30, ...}, "courseRefs": [[page, start, end, "CS 40"], ...]}
+    with offsets into "\f".join(pages_text).
     """
-    # Put each (x) on a new line to help splitting
-    normalized = re.sub(r"\s*\(([a-n])\)\s*", r"\n(\1) ", text, flags=re.IGNORECASE).strip()
-    blocks = [b.strip() for b in normalized.split("\n") if b.strip().startswith("(")]
-    out: Dict[str, str] = {}
+    text = "\f".join(pages_text)
+    spans: Dict[str, List[int]] = {}
+    minima: Dict[str, int] = {}
+    refs: List[List[Any]] = []
+    open_note: Optional[Tuple[str, int, int]] = None   # (letter, page, body start)
 
-    current_key = None
-    current_buf: List[str] = []
+    def close(end: int) -> None:
+        letter, page, start = open_note
+        spans[letter] = [page, start, end]
 
-    for line in blocks:
-        m = FOOTNOTE_RE.match(line)
-        if m:
-            # flush old
-            if current_key is not None:
-                out[current_key] = norm_ws(" ".join(current_buf))
-            current_key = m.group(1).lower()
-            current_buf = [m.group(2)]
-        else:
-            # continuation line
-            if current_key is not None:
-                current_buf.append(line)
+    for kind, page, start, end, value in scan_tokens(text):
+        if kind == "course":
+            refs.append([page, start, end, value])
+        elif kind == "attr":
+            attr, n = value.split("=")
+            minima.setdefault(attr, int(n))
+        elif open_note is not None:
+            # A new marker or a page break ends the open footnote
+            close(start)
+            open_note = None
+        if kind == "note":
+            open_note = (value, page, end)
+    if open_note is not None:
+        close(len(text))
 
-    if current_key is not None:
-        out[current_key] = norm_ws(" ".join(current_buf))
+    footnotes = {k: norm_ws(text[s:e].replace("\n", " ")) for k, (_, s, e) in spans.items()}
+    return {"footnotes": footnotes, "footnoteSpans": spans, "attributeMinima": minima, "courseRefs": refs}
 
-    return out
+
+def page_words(page: Any) -> List[List[Any]]:
+    """[x0, top, x1, text] per word, rounded to 0.1pt to keep the page cache small."""
+    return [
+        [round(w["x0"], 1), round(w["top"], 1), round(w["x1"], 1), w["text"]]
+        for w in page.extract_words(keep_blank_chars=False, use_text_flow=False)
+    ]
 
 
-def try_extract_tables(pdf: pdfplumber.PDF, page_index: int) -> List[List[List[str]]]:
+def try_extract_tables(pdf: Any, page_index: int) -> List[List[List[str]]]:
     """
     Attempt to extract tables from a page. Returns list of tables, each is list of rows, each row is list of cells.
     """
@@ -128,6 +197,180 @@ def try_extract_tables(pdf: pdfplumber.PDF, page_index: int) -> List[List[List[s
     return cleaned
 
 
+# -----------------------------
+# Extraction backends
+# -----------------------------
+# pdfplumber: text and words of every page through pdfminer, all pure Python.
+# pdfium (default): page text from pdfium's native text page. pdfplumber is only
+#   opened, for just those pages, where word coordinates or tables are needed:
+#   page 0 (tables) and any page with a box header row. On every other page
+#   parse_layout() only sees free-text lines, so words are rebuilt from the text
+#   lines (text_words). --parity checks both backends give the same template.
+
+EXTRACT_BACKENDS = ("pdfium", "pdfplumber")
+
+
+def needs_layout(text: str) -> bool:
+    """A line with a box header (a run of >= 4 column names, see header_blocks)."""
+    for line in text.split("\n"):
+        run = 0
+        for token in line.split():
+            run = run + 1 if token in COLUMN_NAMES else 0
+            if run >= 4:
+                return True
+    return False
+
+
+def text_words(text: str) -> List[List[Any]]:
+    """Stand-in words for a page without boxes: only line order and word order are real."""
+    words: List[List[Any]] = []
+    for n, line in enumerate(text.split("\n")):
+        x = 0.0
+        for token in line.split():
+            words.append([x, n * 10.0, x + len(token), token])
+            x += len(token) + 1
+    return words
+
+
+def pdfium_text(raw: str) -> str:
+    # pdfium ends lines with \r\n and keeps trailing spaces; pdfplumber's non-layout
+    # text has neither, nor blank lines
+    lines = (norm_ws(line) for line in raw.replace("\r\n", "\n").replace("\r", "\n").split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def plumber_pages(pdf_path: str, indices: Optional[List[int]] = None,
+                  with_text: bool = True) -> Tuple[int, Dict[int, Dict[str, Any]]]:
+    """(page count, {index: cache entry}) for the given pages (all if None), via pdfplumber."""
+    import pdfplumber
+
+    entries: Dict[int, Dict[str, Any]] = {}
+    pages = [i + 1 for i in indices] if indices is not None else None
+    with pdfplumber.open(pdf_path, pages=pages) as pdf:
+        # With a page filter pdf.pages is just those pages; the caller knows the count
+        count = len(pdf.pages) if indices is None else None
+        for k, page in enumerate(pdf.pages):
+            i = page.page_number - 1
+            entry: Dict[str, Any] = {"words": page_words(page)}
+            if with_text:
+                entry["text"] = norm_ws(page.extract_text() or "")
+            if i == 0:
+                # Attempt to extract tables (debug only)
+                # Degree sheets often have weak gridlines; tables may or may not parse.
+                try:
+                    entry["tables"] = try_extract_tables(pdf, k)
+                except Exception as e:
+                    entry["tables_error"] = str(e)
+            entries[i] = entry
+    return count, entries
+
+
+def pdfium_pages(pdf_path: str, indices: Optional[List[int]] = None) -> Tuple[int, Dict[int, Dict[str, Any]]]:
+    """(page count, {index: cache entry}): pdfium text, pdfplumber words only where needed."""
+    import pypdfium2 as pdfium
+
+    entries: Dict[int, Dict[str, Any]] = {}
+    layout: List[int] = []
+    doc = pdfium.PdfDocument(pdf_path)
+    try:
+        count = len(doc)
+        for i in (indices if indices is not None else range(count)):
+            page = doc[i]
+            textpage = page.get_textpage()
+            text = pdfium_text(textpage.get_text_range())
+            textpage.close()
+            page.close()
+            entries[i] = {"text": text}
+            if i == 0 or needs_layout(text):
+                layout.append(i)
+            else:
+                entries[i]["words"] = text_words(text)
+    finally:
+        doc.close()
+    if layout:
+        for i, entry in plumber_pages(pdf_path, layout, with_text=False)[1].items():
+            entries[i].update(entry)
+    return count, entries
+
+
+# -----------------------------
+# Extraction (with optional page cache)
+# -----------------------------
+
+def pdf_hash(pdf_path: str) -> str:
+    h = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def page_cache_path(cache_dir: Path, digest: str, page_index: int) -> Path:
+    return Path(cache_dir) / digest[:2] / digest / f"page_{page_index:03d}.json"
+
+
+def read_cached(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        # Missing, or left half-written by an interrupted run: extract again
+        return None
+
+
+def write_cached(path: Path, data: Dict[str, Any]) -> None:
+    """Write via a temp file + rename so concurrent readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def extract_pages(pdf_path: str, cache_dir: Optional[str] = None, digest: Optional[str] = None,
+                  backend: str = "pdfium") -> Dict[str, Any]:
+    """
+    Text and positioned words of every page plus the page-0 tables, the only raw
+    material build_template() needs. With cache_dir, each page is stored as
+    <cache>/<sha[:2]>/<sha256>/page_NNN.json (keyed by PDF content, so renamed
+    copies hit too) and the PDF is only opened when a page is missing. Both
+    backends produce the same entries, so the cache is shared between them.
+
+    Returns {"hash", "pagesText", "pagesWords", "tables_page0" | "tables_page0_error", "cachedPages"}.
+    """
+    digest = digest or pdf_hash(pdf_path)
+    out: Dict[str, Any] = {"hash": digest, "cachedPages": 0}
+    meta_path = page_cache_path(cache_dir, digest, 0).with_name("meta.json") if cache_dir else None
+
+    pages: List[Optional[Dict[str, Any]]] = []
+    meta = read_cached(meta_path) if meta_path is not None else None
+    if meta is not None:
+        pages = [read_cached(page_cache_path(cache_dir, digest, i)) for i in range(meta["pages"])]
+
+    # Pages cached before words were extracted count as missing
+    pages = [p if p is not None and "words" in p else None for p in pages]
+    if not pages or any(p is None for p in pages):
+        missing = [i for i, p in enumerate(pages) if p is None] if pages else None
+        extract = pdfium_pages if backend == "pdfium" else plumber_pages
+        count, fresh = extract(pdf_path, missing)
+        if not pages:
+            pages = [None] * (count if count is not None else len(fresh))
+        for i, entry in sorted(fresh.items()):
+            pages[i] = entry
+            if cache_dir:
+                write_cached(page_cache_path(cache_dir, digest, i), entry)
+        if meta_path is not None:
+            write_cached(meta_path, {"pages": len(pages), "source": str(pdf_path)})
+    else:
+        out["cachedPages"] = len(pages)
+
+    out["pagesText"] = [p["text"] for p in pages]
+    out["pagesWords"] = [p["words"] for p in pages]
+    if pages and "tables_error" in pages[0]:
+        out["tables_page0_error"] = pages[0]["tables_error"]
+    elif pages:
+        out["tables_page0"] = pages[0].get("tables", [])
+    return out
+
+
 # -----------------------------
 # Heuristic parsing of requirements
 # -----------------------------
@@ -293,69 +536,717 @@ def build_requirement_groups() -> List[Dict[str, Any]]:
 
 
 # -----------------------------
-# Main
+# Layout-aware parsing (word coordinates)
 # -----------------------------
 
-def main(pdf_path: str, out_path: str) -> None:
-    pdf_path = str(pdf_path)
-    out_path_p = Path(out_path)
-    out_path_p.parent.mkdir(parents=True, exist_ok=True)
+Word = List[Any]  # [x0, top, x1, text], as cached by extract_pages
 
-    template = default_bscs_template_skeleton()
+LINE_TOLERANCE = 3.0      # words whose tops differ by less than this are on one line
+TITLE_GAP = 10.0          # max gap between words of one box title
+COLUMN_NAMES = {"SHU", "C", "E", "M", "NS", "HASS", "None", "Term", "Total"}
+REF_RE = re.compile(r"\b([A-Z]{2,5}(?:/[A-Z]{2,5})*)\s*-?\s*(\d{1,3}[A-Z]?)\b")  # COURSE_RE, keeping "CS/MATH"
+MARKER_RE = re.compile(r"\((?!s\))([a-z])\)")   # footnote marker "(h)", but not "course(s)"
+NOTE_REF_RE = re.compile(r"\bnote\s*\(?([a-z])\b")
+SHU_VALUE_RE = re.compile(r"^(≥)?(\d+)(?:-(\d+))?$")
+# Split "X or Y" only where Y is another course or a footnoted elective, not inside a title
+OR_SPLIT_RE = re.compile(r"\s+or\s+(?=[A-Z]{2,5}(?:/[A-Z]{2,5})*\s*-?\s*\d|[^()]*\((?!s\))[a-z]\))")
+SELECT_FROM_RE = re.compile(r"select from:\s*(.+)$", re.IGNORECASE)
+
+# Group ids the app keys on (GROUP_TO_TAGS in src/lib/degreeParser.ts); other box titles are slugged
+GROUP_IDS = {
+    "mathematics & natural sciences": "math_natural_sciences",
+    "engineering": "engineering_soe",
+    "computer science core": "cs_core",
+    "hass": "hass",
+    "breadth electives": "breadth_electives",
+}
+SCHOOL_ABBREVIATIONS = {"school of engineering": "soe", "school of arts and sciences": "ase"}
+
+
+@dataclass
+class Block:
+    """One boxed table on the sheet: a column header row, then rows until its subtotal."""
+    kind: str                       # "group" (has an SHU column) or "credits" (attribute minima)
+    title: str
+    page: int
+    top: float
+    x0: float
+    x1: float
+    columns: Dict[str, float]       # column name -> x centre
+    rows: List[Tuple[str, Optional[str], str]] = field(default_factory=list)   # (label, SHU cell, spill-over)
+    values: Dict[str, int] = field(default_factory=dict)                        # credits: column -> minimum
+    subtotal: Optional[str] = None
+
+    def contains(self, w: Word) -> bool:
+        return self.x0 - 4 <= (w[0] + w[2]) / 2 <= self.x1 + 4
+
+    def add_row(self, words: List[Word]) -> bool:
+        """Record one line of this box; True once the box is finished."""
+        if self.kind == "credits":
+            first = min(self.columns.values()) - 12
+            for w in words:
+                m = SHU_VALUE_RE.match(w[3])
+                if m and (w[0] + w[2]) / 2 >= first:
+                    col = min(self.columns, key=lambda c: abs(self.columns[c] - (w[0] + w[2]) / 2))
+                    self.values[col] = int(m.group(2))
+            return bool(self.values)
 
-    with pdfplumber.open(pdf_path) as pdf:
-        pages_text = load_pdf_text(pdf)
+        shu_left = self.columns["SHU"] - 12
+        attrs = [x for c, x in self.columns.items() if c != "SHU"]
+        shu_right = (self.columns["SHU"] + min(attrs)) / 2 if attrs else self.x1
+        label: List[str] = []
+        shu: Optional[str] = None
+        spill: List[str] = []
+        for w in words:
+            centre = (w[0] + w[2]) / 2
+            if centre < shu_left:
+                label.append(w[3])
+            elif centre < shu_right and SHU_VALUE_RE.match(w[3]) and shu is None:
+                shu = w[3]
+            elif w[3] != "-":
+                spill.append(w[3])   # prose running across the attribute columns
+        text = " ".join(label)
+        if text.lower().startswith("subtotal"):
+            self.subtotal = shu
+            return True
+        self.rows.append((text, shu, " ".join(spill)))
+        return False
 
-        # Save raw text for debugging (super useful when tweaking regex/table extraction)
-        template["debug"]["pagesText"] = pages_text
 
-        # Try to find the notes page by searching for "(a)" and "(b)" patterns
-        notes_page_idx = None
-        for i, t in enumerate(pages_text):
-            if "(a)" in t.lower() and "(b)" in t.lower():
-                notes_page_idx = i
-                break
+def page_lines(words: List[Word]) -> List[List[Word]]:
+    lines: List[List[Word]] = []
+    for w in sorted(words, key=lambda w: (w[1], w[0])):
+        if lines and w[1] - lines[-1][0][1] < LINE_TOLERANCE:
+            lines[-1].append(w)
+        else:
+            lines.append([w])
+    return [sorted(line, key=lambda w: w[0]) for line in lines]
+
+
+def header_blocks(line: List[Word], page: int) -> List[Block]:
+    """
+    Box headers on a line: a title followed by a run of column names, e.g.
+    "Engineering* SHU C E M NS HASS None Term" or "Credit Requirements E C M NS HASS None Total".
+    Two boxes side by side give two headers on one line.
+    """
+    blocks: List[Block] = []
+    title: List[Word] = []
+    i = 0
+    while i < len(line):
+        j = i
+        while j < len(line) and line[j][3] in COLUMN_NAMES:
+            j += 1
+        run = line[i:j]
+        if len(run) >= 4:
+            # "HASS SHU C ...": names before SHU belong to the title
+            p = next((k for k, w in enumerate(run) if w[3] == "SHU"), 0)
+            head, cols = title + run[:p], run[p:]
+            # The title is the phrase right before the columns, not a neighbouring box's row
+            start = len(head) - 1
+            while start > 0 and head[start][0] - head[start - 1][2] < TITLE_GAP:
+                start -= 1
+            head = head[max(start, 0):]
+            kind = "group" if cols[0][3] == "SHU" else "credits" if any(w[3] == "Total" for w in cols) else None
+            if head and kind:
+                blocks.append(Block(
+                    kind=kind, title=" ".join(w[3] for w in head), page=page, top=head[0][1],
+                    x0=head[0][0], x1=cols[-1][2], columns={w[3]: (w[0] + w[2]) / 2 for w in cols},
+                ))
+            title = []
+            i = j
+        elif run:
+            title.extend(run)
+            i = j
+        else:
+            title.append(line[i])
+            i += 1
+    return blocks
+
+
+def parse_shu(cell: Optional[str]) -> Optional[int]:
+    """"4" / "≥3" / "3-5" -> the minimum, 4 / 3 / 3."""
+    m = SHU_VALUE_RE.match(cell or "")
+    return int(m.group(2)) if m else None
+
+
+def footnote_courses(rule: str) -> List[str]:
+    """Courses of a footnote that is just a short "Select from: PHIL 24 or EM 54" list."""
+    m = SELECT_FROM_RE.search(rule)
+    if not m:
+        return []
+    parts = re.split(r"\s+or\s+", m.group(1).strip(" ."))
+    refs = [REF_RE.fullmatch(p.strip()) for p in parts]
+    if len(parts) > 3 or not all(refs):
+        return []
+    return [f"{r.group(1)} {r.group(2)}" for r in refs]
 
-        footnotes: Dict[str, str] = {}
-        if notes_page_idx is not None:
-            footnotes = split_footnotes(pages_text[notes_page_idx])
 
-        # Map footnotes to the keys used by the template
-        rules_by_footnote: Dict[str, Dict[str, str]] = {}
-        for k, v in footnotes.items():
-            rules_by_footnote[f"notes_{k}"] = {"label": f"({k})", "rule": v}
-        template["rulesByFootnote"] = rules_by_footnote
+def row_item(text: str, shu: Optional[str], footnotes: Dict[str, str], min_grade: Optional[str]) -> Optional[ReqItem]:
+    """One (possibly wrapped) sheet row -> course / course_or / elective_rule."""
+    core = "**" in text
+    text = norm_ws(text.replace("*", ""))
+    lo = parse_shu(shu)
+    courses: List[Dict[str, Any]] = []
+    electives: List[Dict[str, Any]] = []
+    for part in OR_SPLIT_RE.split(text):
+        ref = REF_RE.search(part)
+        marker = MARKER_RE.search(part)
+        if ref:
+            title = norm_ws(MARKER_RE.sub("", part[:ref.start()] + part[ref.end():]).replace("()", ""))
+            course = f"{ref.group(1)} {ref.group(2).lstrip('0') or '0'}"
+            courses.append(make_course(course, title.strip(" ,-") or None, lo).data)
+        elif marker:
+            label = norm_ws(part[:marker.start()] + part[marker.end():])
+            electives.append(dict(make_elective_rule(label, min_shu=lo, rules_ref=f"notes_{marker.group(1)}").data,
+                                  type="elective_rule"))
+
+    # "CS 105 or CS 80 Programing Languages": the title is shared
+    titles = [c["title"] for c in courses if c.get("title")]
+    courses = [make_course(c["course"], c.get("title") or (titles[-1] if titles else None), lo).data for c in courses]
+
+    if len(courses) == 1 and not electives:
+        return ReqItem(type="course", data=courses[0])
+    if courses:
+        label = " / ".join(dict.fromkeys(titles + [e["label"] for e in electives])) or text
+        return make_course_or(label, courses + electives, min_grade if core else None)
+    if electives:
+        rule = electives[0]
+        listed = footnote_courses(footnotes.get(rule["rulesRef"][len("notes_"):], ""))
+        if listed:
+            options = [make_course(c, rule["label"], lo).data for c in listed]
+            return make_course_or(rule["label"], options, min_grade if core else None)
+        return make_elective_rule(text, min_shu=lo, rules_ref=rule["rulesRef"])
+    if "Elective" in text and lo:
+        return make_elective_rule(text, min_shu=lo)
+    return None
+
+
+def item_min_shu(item: ReqItem) -> int:
+    d = item.data
+    if item.type == "course":
+        return d.get("shu") or 0
+    if item.type == "course_or":
+        return min((o.get("shu") or o.get("minSHU") or 0 for o in d["options"]), default=0)
+    return (d.get("count") or 1) * (d.get("eachMinSHU") or 0) if d.get("count") else d.get("minSHU") or 0
+
+
+def block_group(block: Block, footnotes: Dict[str, str], min_grade: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Merge a box's physical lines into requirement rows, then type each row.
+    Wrapped cells: a line continues the previous row if it starts with "or" or
+    lower case, the previous line ended in "or" / "&", or it is a bare title
+    fragment after a row whose SHU sat on its own (vertically centred) line.
+    Prose (instructions spilling over the attribute columns, "see note g")
+    is kept aside; its footnote covers whatever the subtotal leaves over.
+    """
+    merged: List[List[Any]] = []     # [text, shu, shu on its own line]
+    notes: List[str] = []
+    in_note = False
+    for label, shu, spill in block.rows:
+        clean = label.replace("*", "").strip()
+        has_ref = bool(REF_RE.search(clean) or MARKER_RE.search(clean))
+        if spill or NOTE_REF_RE.search(clean) or (in_note and not shu) or (len(clean.split()) > 8 and not has_ref):
+            notes.append(f"{clean} {spill}".strip())
+            in_note = True
+            continue
+        in_note = False
+        if not clean:
+            if shu and merged and merged[-1][1] is None:
+                merged[-1][1], merged[-1][2] = shu, True
+            continue
+        cur = merged[-1] if merged else None
+        if cur is not None and (
+            clean.startswith("or ") or clean[0].islower()
+            or re.search(r"(\bor|&)$", cur[0].replace("*", "").strip())
+            or (shu is None and not has_ref and (cur[1] is None or cur[2]))
+        ):
+            cur[0] = f"{cur[0]} {label}"
+            cur[1] = cur[1] or shu
+        else:
+            merged.append([label, shu, False])
+
+    items: List[ReqItem] = []
+    for text, shu, _ in merged:
+        item = row_item(text, shu, footnotes, min_grade)
+        if item is None:
+            continue
+        prev = items[-1] if items else None
+        if (prev is not None and prev.type == item.type == "elective_rule"
+                and prev.data["label"] == item.data["label"] and prev.data.get("rulesRef") == item.data.get("rulesRef")):
+            # Repeated rows ("Systems Elective (i)" twice) -> one rule with a count
+            items[-1] = make_elective_rule(
+                prev.data["label"], count=(prev.data.get("count") or 1) + 1,
+                each_min_shu=prev.data.get("eachMinSHU") or prev.data.get("minSHU"),
+                rules_ref=prev.data.get("rulesRef"),
+            )
+            continue
+        items.append(item)
 
-        # Fill groups (structure is stable; footnote rules are extracted)
+    title = norm_ws(block.title.replace("*", ""))
+    subtotal = parse_shu(block.subtotal)
+    refs = [m.group(1) for n in notes for m in NOTE_REF_RE.finditer(n)]
+    left = (subtotal or 0) - sum(item_min_shu(it) for it in items)
+    if refs and left > 0:
+        label = f"{title} ({refs[0]})" if "Elective" in title else f"{title} Electives ({refs[0]})"
+        items.append(make_elective_rule(label, min_shu=left, rules_ref=f"notes_{refs[0]}"))
+    if not items:
+        return None
+
+    group: Dict[str, Any] = {
+        "groupId": GROUP_IDS.get(title.lower()) or re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_"),
+        "title": title,
+        "items": [it.__dict__ for it in items],
+    }
+    if subtotal is not None:
+        group["minSHU"] = subtotal
+    if "**" in block.title and min_grade:
+        group["minGrade"] = min_grade
+    return group
+
+
+def parse_layout(pages_words: List[List[Word]]) -> Dict[str, Any]:
+    """
+    One top-to-bottom pass over every page's words. Each line is either a box
+    header, a row of whichever open box sits under each word, or free text
+    (title lines, the grading legend, "(x) ..." footnotes).
+
+    Returns {"meta", "groups", "footnotes", "credits"}; groups is empty when
+    the sheet has no recognisable boxes.
+    """
+    meta: Dict[str, Any] = {}
+    notes: Dict[str, List[str]] = {}
+    blocks: List[Block] = []
+    for page, words in enumerate(pages_words):
+        open_blocks: List[Block] = []
+        note_key: Optional[str] = None
+        for line in page_lines(words):
+            headers = header_blocks(line, page)
+            for h in headers:
+                # A new header closes whatever box was open above it in that column
+                open_blocks = [b for b in open_blocks if not (b.x0 < h.x1 and h.x0 < b.x1)]
+                blocks.append(h)
+            # Anything beside the headers is a row of a box that is still open
+            line = [w for w in line if not any(h.x0 <= w[0] and w[2] <= h.x1 for h in headers)]
+            open_blocks.extend(headers)
+            if not line:
+                continue
+
+            loose: List[Word] = []
+            rows: Dict[int, List[Word]] = {}
+            for w in line:
+                k = next((k for k, b in enumerate(open_blocks) if b.contains(w)), None)
+                if k is None:
+                    loose.append(w)
+                else:
+                    rows.setdefault(k, []).append(w)
+            closed = {k for k, ws in rows.items() if open_blocks[k].add_row(ws)}
+            open_blocks = [b for k, b in enumerate(open_blocks) if k not in closed]
+            if not loose:
+                continue
+
+            text = " ".join(w[3] for w in loose)
+            marker = re.match(r"^\((?!s\))([a-z])\)$", loose[0][3])
+            if marker and len(loose) > 1:
+                note_key = marker.group(1)
+                notes[note_key] = [" ".join(w[3] for w in loose[1:])]
+            elif note_key is not None:
+                notes[note_key].append(text)
+            elif not blocks:
+                scan_meta(text, meta)
+        # Footnotes don't run on across pages
+        note_key = None
+
+    footnotes = {k: norm_ws(" ".join(v)) for k, v in notes.items()}
+    grade = meta.get("coreMinGrade")
+    groups = []
+    for b in sorted((b for b in blocks if b.kind == "group"), key=lambda b: (b.page, column_of(b, blocks), b.top)):
+        g = block_group(b, footnotes, grade)
+        if g is not None:
+            groups.append(g)
+    credits = next((b.values for b in blocks if b.kind == "credits" and b.values), {})
+    return {"meta": meta, "groups": groups, "footnotes": footnotes, "credits": credits}
+
+
+def column_of(block: Block, blocks: List[Block]) -> int:
+    """Reading order for side-by-side boxes: index of the block's left edge among distinct left edges."""
+    edges: List[float] = []
+    for x in sorted(b.x0 for b in blocks if b.page == block.page):
+        if not edges or x - edges[-1] > 20:
+            edges.append(x)
+    return sum(1 for e in edges if e <= block.x0 + 20) - 1
+
+
+def scan_meta(line: str, meta: Dict[str, Any]) -> None:
+    """Title lines and the grading legend above the first box."""
+    if "school" not in meta and "University" in line:
+        meta["school"] = line
+    elif "year" not in meta and re.search(r"\bClass of (\d{4})\b", line):
+        meta["year"] = re.search(r"\bClass of (\d{4})\b", line).group(1)
+    elif "program" not in meta and re.match(r"^(Bachelor|Master|Doctor) of ", line):
+        meta["program"] = line
+        m = re.search(r"\(([A-Z][A-Za-z]{1,7})\)\s*$", line)
+        if m:
+            meta["abbreviation"] = m.group(1)
+    if "letter grade" in line:
+        meta["letterGradeRequired"] = True
+    m = re.search(r"\*\*[^*]*?\b([A-D][+-]?) or better", line)
+    if m:
+        meta["coreMinGrade"] = m.group(1)
+    m = re.search(r"at least (\d+) SHU", line)
+    if m:
+        meta["minTotalSHU"] = int(m.group(1))
+
+
+def template_id(meta: Dict[str, Any]) -> Optional[str]:
+    """"Tufts University – School of Engineering" + "(BSCS)" + "Class of 2027" -> "tufts-soe-bscs-2027"."""
+    if not all(k in meta for k in ("school", "abbreviation", "year")):
+        return None
+    parts = re.split(r"\s+[–-]\s+", meta["school"], maxsplit=1)
+    institution = parts[0].split()[0].lower()
+    school = parts[1] if len(parts) > 1 else ""
+    abbr = SCHOOL_ABBREVIATIONS.get(school.lower()) or "".join(w[0] for w in school.split() if w[0].isupper()).lower()
+    return "-".join(p for p in (institution, abbr, meta["abbreviation"].lower(), meta["year"]) if p)
+
+
+# -----------------------------
+# Benchmark (text scan)
+# -----------------------------
+
+def legacy_text_scan(pages_text: List[str]) -> Dict[str, Any]:
+    """The text path before scan_sheet(), kept for the benchmark: several sweeps over the same text."""
+    notes_page = next((t for t in pages_text if "(a)" in t.lower() and "(b)" in t.lower()), None)
+    footnotes: Dict[str, str] = {}
+    if notes_page is not None:
+        normalized = re.sub(r"\s*\(([a-n])\)\s*", r"\n(\1) ", notes_page, flags=re.IGNORECASE).strip()
+        key, buf = None, []
+        for line in (b.strip() for b in normalized.split("\n") if b.strip().startswith("(")):
+            m = re.match(r"^\(([a-n])\)\s+(.*)$", line, re.IGNORECASE)
+            if m:
+                if key is not None:
+                    footnotes[key] = norm_ws(" ".join(buf))
+                key, buf = m.group(1).lower(), [m.group(2)]
+            elif key is not None:
+                buf.append(line)
+        if key is not None:
+            footnotes[key] = norm_ws(" ".join(buf))
+    full_text = " ".join(pages_text)
+    attr = {}
+    for name, pattern, flags in (("E", r"\bE\s*[:=]\s*(\d+)\b", 0), ("C", r"\bC\s*[:=]\s*(\d+)\b", 0),
+                                 ("HASS", r"\bHASS\s*[:=]\s*(\d+)\b", re.IGNORECASE)):
+        m = re.search(pattern, full_text, flags)
+        if m:
+            attr[name] = int(m.group(1))
+    refs = [f"{m.group(1)} {m.group(2)}" for m in COURSE_RE.finditer(full_text)]
+    return {"footnotes": footnotes, "attributeMinima": attr, "courseRefs": refs}
+
+
+def synthetic_sheet_text(pages: int, seed: int = 0) -> List[str]:
+    """Degree-sheet-like pages: course rows and prose, a notes page every 5th page, minima at the end."""
+    rng = random.Random(seed)
+    subjects = ["CS", "MATH", "EE", "ES", "PHY", "CHEM", "ENG", "EM"]
+    words = "select from any course having attribute the requirement may not be used to fulfill other".split()
+    out: List[str] = []
+    for p in range(pages):
+        lines = []
+        if p % 5 == 4:
+            for letter in "abcdefghijklmn":
+                lines.append(f"({letter}) " + " ".join(rng.choice(words) for _ in range(12)))
+                lines.append(", ".join(f"{rng.choice(subjects)} {rng.randint(1, 199)}" for _ in range(6)))
+        else:
+            for _ in range(45):
+                lines.append(f"{rng.choice(subjects)} {rng.randint(1, 199)} " +
+                             " ".join(rng.choice(words) for _ in range(rng.randint(3, 14))) + f" {rng.randint(2, 5)}")
+        if p == pages - 1:
+            lines.append("Credit Requirements E: 30 C: 30 HASS: 24")
+        out.append("\n".join(lines))
+    return out
+
+
+def bench_scan(pages: int, repeat: int) -> None:
+    pages_text = synthetic_sheet_text(pages)
+    size = sum(len(t) for t in pages_text)
+    for name, fn in (("legacy sweeps", legacy_text_scan), ("scan_sheet", scan_sheet)):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result = fn(pages_text)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{name:14} best of {repeat}: {best * 1000:7.2f} ms  "
+              f"({len(result['footnotes'])} footnotes, {len(result['courseRefs'])} course refs, "
+              f"minima {result['attributeMinima']})")
+    print(f"{pages} synthetic pages, {size} chars")
+
+
+# -----------------------------
+# Backend parity + benchmark
+# -----------------------------
+
+def parity_check(pdf_path: str) -> bool:
+    """Extract with both backends (no cache) and compare page text and the whole template."""
+    results = {b: extract_pages(pdf_path, backend=b) for b in EXTRACT_BACKENDS}
+    base, fast = results["pdfplumber"], results["pdfium"]
+    ok = True
+    for i, (a, b) in enumerate(zip(base["pagesText"], fast["pagesText"])):
+        if a != b:
+            ok = False
+            diff = next(k for k, (x, y) in enumerate(zip(a + "\0", b + "\0")) if x != y)
+            print(f"  page {i}: text differs at char {diff}: {a[diff:diff + 40]!r} vs {b[diff:diff + 40]!r}")
+    if len(base["pagesText"]) != len(fast["pagesText"]):
+        ok = False
+        print(f"  page count differs: {len(base['pagesText'])} vs {len(fast['pagesText'])}")
+    a, b = build_template(base), build_template(fast)
+    for key in sorted(set(a) | set(b)):
+        if a.get(key) != b.get(key):
+            ok = False
+            print(f"  template differs in {key!r}")
+    print(f"{pdf_path}: {len(base['pagesText'])} pages, "
+          f"{'pdfium matches pdfplumber' if ok else 'MISMATCH'}")
+    return ok
+
+
+def tile_pdf(pdf_path: str, copies: int, out_path: Path) -> int:
+    """Write `copies` back-to-back copies of a sheet as one PDF; returns its page count."""
+    import pypdfium2 as pdfium
+
+    src = pdfium.PdfDocument(pdf_path)
+    dst = pdfium.PdfDocument.new()
+    for _ in range(copies):
+        dst.import_pages(src)
+    dst.save(str(out_path))
+    count = len(dst)
+    dst.close()
+    src.close()
+    return count
+
+
+def bench_extract(pdf_path: str, copies: List[int], repeat: int) -> None:
+    """extract_pages() per backend, uncached, on the sheet tiled to longer documents."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'pages':>5} {'pdfplumber':>12} {'pdfium':>12} {'speedup':>8}  parity")
+        for n in copies:
+            tiled = Path(tmp) / f"sheet_x{n}.pdf"
+            pages = tile_pdf(pdf_path, n, tiled)
+            best: Dict[str, float] = {}
+            out: Dict[str, Dict[str, Any]] = {}
+            for backend in EXTRACT_BACKENDS:
+                best[backend] = float("inf")
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    out[backend] = extract_pages(str(tiled), backend=backend)
+                    best[backend] = min(best[backend], time.perf_counter() - t0)
+            same = build_template(out["pdfium"]) == build_template(out["pdfplumber"])
+            print(f"{pages:5} {best['pdfplumber'] * 1000:10.0f}ms {best['pdfium'] * 1000:10.0f}ms "
+                  f"{best['pdfplumber'] / best['pdfium']:7.1f}x  {'ok' if same else 'MISMATCH'}")
+
+
+# -----------------------------
+# Template
+# -----------------------------
+
+def build_template(extracted: Dict[str, Any]) -> Dict[str, Any]:
+    """Template from extract_pages() output; no PDF access."""
+    template = default_bscs_template_skeleton()
+    pages_text = extracted["pagesText"]
+    layout = parse_layout(extracted.get("pagesWords") or [])
+    scanned = scan_sheet(pages_text)
+
+    # Save raw text for debugging (super useful when tweaking regex/table extraction),
+    # plus where each footnote and course reference sits in it ("\f"-joined offsets)
+    template["debug"]["pagesText"] = pages_text
+    template["debug"]["footnoteSpans"] = scanned["footnoteSpans"]
+    template["debug"]["courseRefs"] = scanned["courseRefs"]
+
+    if layout["groups"]:
+        meta = layout["meta"]
+        template["templateId"] = template_id(meta) or template["templateId"]
+        template["school"] = meta.get("school", template["school"])
+        template["program"] = meta.get("program", template["program"])
+        if "year" in meta:
+            template["catalogYear"] = f"Class of {meta['year']} degree sheet"
+        template["minTotalSHU"] = layout["credits"].get("Total") or meta.get("minTotalSHU") or template["minTotalSHU"]
+        template["gradingRules"] = {
+            "letterGradeRequired": bool(meta.get("letterGradeRequired")),
+            "coreMinGrade": meta.get("coreMinGrade"),
+        }
+        template["groups"] = layout["groups"]
+        footnotes = layout["footnotes"]
+        attr = {k: v for k, v in layout["credits"].items() if k != "Total"}
+        template["debug"]["groupsSource"] = "layout"
+    else:
+        # No boxes recognised: built-in BSCS groups, footnotes + minima from text
         template["groups"] = build_requirement_groups()
+        footnotes = layout["footnotes"] or scanned["footnotes"]
+        attr = scanned["attributeMinima"]
+        template["debug"]["groupsSource"] = "builtin"
+
+    # Map footnotes to the keys used by the template
+    template["rulesByFootnote"] = {f"notes_{k}": {"label": f"({k})", "rule": v} for k, v in footnotes.items()}
+    if attr:
+        template["creditRequirementsByAttribute"] = attr
+
+    if "tables_page0_error" in extracted:
+        template["debug"]["tables_page0_error"] = extracted["tables_page0_error"]
+    else:
+        template["debug"]["tables_page0"] = extracted.get("tables_page0", [])
+    return template
+
+
+# -----------------------------
+# Output profiles
+# -----------------------------
+# degree.json is bundled into the dashboard, so what ships is "prod": compact,
+# no debug payload. "debug" keeps the indented template and writes the page
+# text / page-0 tables to a <name>.debug.json sidecar instead of inline.
+
+PROFILES = ("prod", "debug")
+COMPRESSIONS = ("gzip", "br")
+
+
+def debug_sidecar_path(out_path: Path) -> Path:
+    return out_path.with_name(f"{out_path.stem}.debug.json")
+
 
-        # Optional: extract attribute minima if present in text (E/C/HASS)
-        full_text = " ".join(pages_text)
-        # Very light heuristic; if not found, omit.
-        attr = {}
-        mE = re.search(r"\bE\s*[:=]\s*(\d+)\b", full_text)
-        mC = re.search(r"\bC\s*[:=]\s*(\d+)\b", full_text)
-        mH = re.search(r"\bHASS\s*[:=]\s*(\d+)\b", full_text, re.IGNORECASE)
-        if mE: attr["E"] = int(mE.group(1))
-        if mC: attr["C"] = int(mC.group(1))
-        if mH: attr["HASS"] = int(mH.group(1))
-        if attr:
-            template["creditRequirementsByAttribute"] = attr
-
-        # Attempt to extract tables (debug only)
-        # Degree sheets often have weak gridlines; tables may or may not parse.
+def dump_json(data: Any, fp: Any, profile: str) -> None:
+    """Stream-encode to an open text file (json.dump writes chunk by chunk)."""
+    if profile == "prod":
+        json.dump(data, fp, separators=(",", ":"), ensure_ascii=False)
+    else:
+        json.dump(data, fp, indent=2, ensure_ascii=False)
+
+
+def compress_file(path: Path, method: str) -> Path:
+    """Write <path>.gz / <path>.br next to path, streaming from disk."""
+    if method == "gzip":
+        out = path.with_name(path.name + ".gz")
+        # mtime=0 keeps the .gz byte-identical across rebuilds of the same template
+        with path.open("rb") as src, out.open("wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) as dst:
+            shutil.copyfileobj(src, dst)
+        return out
+    if method == "br":
         try:
-            tables_p0 = try_extract_tables(pdf, 0)
-            template["debug"]["tables_page0"] = tables_p0
-        except Exception as e:
-            template["debug"]["tables_page0_error"] = str(e)
+            import brotli
+        except ImportError:
+            raise SystemExit("--compress br needs the brotli package: pip install brotli")
+        out = path.with_name(path.name + ".br")
+        compressor = brotli.Compressor(quality=11)
+        with path.open("rb") as src, out.open("wb") as dst:
+            for chunk in iter(lambda: src.read(1 << 16), b""):
+                dst.write(compressor.process(chunk))
+            dst.write(compressor.finish())
+        return out
+    raise ValueError(f"unknown compression {method!r} (expected one of {', '.join(COMPRESSIONS)})")
+
+
+def write_template(template: Dict[str, Any], out_path: str, profile: str = "prod",
+                   compress: Tuple[str, ...] = ()) -> Dict[str, int]:
+    """
+    Write the template for a profile. The debug payload never goes inline:
+    dropped for prod, sidecar for debug. compress adds pre-compressed siblings
+    for static hosting. Returns bytes written per file.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"unknown profile {profile!r} (expected one of {', '.join(PROFILES)})")
+    body = {k: v for k, v in template.items() if k != "debug"}
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8") as f:
+        dump_json(body, f, profile)
+    written = {str(out): out.stat().st_size}
+
+    if profile == "debug" and template.get("debug"):
+        sidecar = debug_sidecar_path(out)
+        with sidecar.open("w", encoding="utf-8") as f:
+            dump_json(template["debug"], f, "debug")
+        written[str(sidecar)] = sidecar.stat().st_size
+
+    for method in compress:
+        packed = compress_file(out, method)
+        written[str(packed)] = packed.stat().st_size
+    return written
+
+
+def profile_report(template: Dict[str, Any], repeat: int = 50) -> None:
+    """
+    Size and client parse cost of what the dashboard would load: the old
+    inline-debug output vs each profile. Parse time is json.loads, best of repeat.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    body = {k: v for k, v in template.items() if k != "debug"}
+    variants = [
+        ("inline debug (old)", json.dumps(template, indent=2)),
+        ("debug", json.dumps(body, indent=2, ensure_ascii=False)),
+        ("prod", json.dumps(body, separators=(",", ":"), ensure_ascii=False)),
+    ]
+    print(f"{'output':20} {'bytes':>9} {'gzip':>8} {'br':>8} {'parse':>9}")
+    for name, text in variants:
+        data = text.encode("utf-8")
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            json.loads(data)
+            best = min(best, time.perf_counter() - t0)
+        br = f"{len(brotli.compress(data, quality=11)):8d}" if brotli else f"{'-':>8}"
+        print(f"{name:20} {len(data):9d} {len(gzip.compress(data, 9, mtime=0)):8d} {br} {best * 1000:7.3f}ms")
+
+
+# -----------------------------
+# Main
+# -----------------------------
+
+def load_input(path: str, cache_dir: Optional[str], backend: str = "pdfium") -> Dict[str, Any]:
+    """A degree sheet PDF, or an already-built template JSON (re-emitted under another profile)."""
+    if Path(path).suffix.lower() == ".json":
+        template = json.loads(Path(path).read_text(encoding="utf-8"))
+        sidecar = debug_sidecar_path(Path(path))
+        if "debug" not in template and sidecar.exists():
+            template["debug"] = json.loads(sidecar.read_text(encoding="utf-8"))
+        return template
+    return build_template(extract_pages(path, cache_dir, backend=backend))
+
 
-    out_path_p.write_text(json.dumps(template, indent=2), encoding="utf-8")
-    print(f"Wrote JSON to: {out_path_p}")
+def main(pdf_path: str, out_path: str, cache_dir: Optional[str] = None, profile: str = "prod",
+         compress: Tuple[str, ...] = (), report: bool = False, backend: str = "pdfium") -> None:
+    template = load_input(str(pdf_path), cache_dir, backend)
+    for path, size in write_template(template, out_path, profile, compress).items():
+        print(f"Wrote {path} ({size} bytes)")
+    if report:
+        profile_report(template)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python3 parse_bscs_degree_pdf.py <input.pdf> <output.json>")
-        raise SystemExit(1)
-    main(sys.argv[1], sys.argv[2])
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Parse a degree sheet PDF into a JSON degree template.")
+    parser.add_argument("pdf", nargs="?", help="degree sheet PDF (or a template JSON to re-emit)")
+    parser.add_argument("out", nargs="?", help="output template JSON")
+    parser.add_argument("--profile", choices=PROFILES, default="prod",
+                        help="prod: compact, no debug fields; debug: indented + <out>.debug.json sidecar")
+    parser.add_argument("--compress", default="", help="comma list of pre-compressed siblings: gzip,br")
+    parser.add_argument("--cache-dir", default=None, help="per-page extraction cache (see batch_degree_pdfs.py)")
+    parser.add_argument("--report", action="store_true", help="print size / parse time for each output mode")
+    parser.add_argument("--bench", type=int, metavar="PAGES", default=0,
+                        help="time the text scan on synthetic sheets of this many pages and exit")
+    parser.add_argument("--repeat", type=int, default=20, help="benchmark repetitions")
+    parser.add_argument("--backend", choices=EXTRACT_BACKENDS, default="pdfium",
+                        help="text extraction backend (see \"Extraction backends\")")
+    parser.add_argument("--parity", action="store_true",
+                        help="check the pdfium backend against pdfplumber on pdf and exit (1 on mismatch)")
+    parser.add_argument("--bench-extract", default="", metavar="COPIES",
+                        help="time both backends on pdf tiled to these many copies, e.g. 1,4,16, and exit")
+    args = parser.parse_args()
+    if args.bench:
+        bench_scan(args.bench, args.repeat)
+        raise SystemExit(0)
+    if args.parity or args.bench_extract:
+        if not args.pdf:
+            parser.error("pdf is required for --parity / --bench-extract")
+        if args.bench_extract:
+            bench_extract(args.pdf, [int(n) for n in args.bench_extract.split(",")], min(args.repeat, 3))
+        raise SystemExit(0 if not args.parity or parity_check(args.pdf) else 1)
+    if not args.pdf or not args.out:
+        parser.error("pdf and out are required (unless --bench)")
+    main(args.pdf, args.out, args.cache_dir, args.profile,
+         tuple(m for m in args.compress.split(",") if m), args.report, args.backend)
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+pg_bulk_load.py
+
+Bulk loader for the scraped catalog (<subject>_courses.json) and its compiled
+prereq trees (prereq_compiler.py) into Postgres, as the fast path next to
+prisma/seedCourses.ts. The seeder upserts one course and inserts one prereq
+node per round trip; this streams everything with COPY and merges set-based:
+
+  1. One transaction, SET CONSTRAINTS ALL DEFERRED (the prereq_expressions <->
+     prereq_nodes FKs are DEFERRABLE, see 20260222000000_defer_prereq_fks).
+  2. COPY into three temp staging tables (dropped on commit):
+       stage_courses             id, subject, number, title, credits
+       stage_prereq_expressions  id, course_id, raw_text, root_node_id
+       stage_prereq_nodes        id, expression_id, parent_node_id, position,
+                                 node_type, k_value, course_id, condition_text
+  3. Merge:
+       - courses: INSERT ... ON CONFLICT (id) DO UPDATE title/credits (rows
+         that didn't change are left untouched)
+       - prereqs: delete the existing expression of every staged course
+         (nodes cascade), insert the staged nodes, then the expressions.
+         A COURSE leaf whose course isn't in the courses table becomes a
+         CONDITION carrying the id, instead of failing the FK.
+  4. COMMIT; the deferred FKs are checked once, here.
+
+Rows match what the seeder writes: id "CS0011" (subject + number as in the key),
+credits = the first number of units, rounded. Prereq trees are the compiler's
+(AND/OR/MIN_K/COURSE/CONDITION), not the seeder's flat OR of every id in the text.
+Expression and node ids are deterministic ("px_CS0015", "pn_CS0015_3" for the
+fourth node in preorder), so reloading the same catalog rewrites the same rows.
+
+USAGE:
+  python3 pg_bulk_load.py cs_courses.json [math_courses.json ...] [--prereqs prereqs.json] [--delta]
+  python3 pg_bulk_load.py cs_courses.json --dump staging/        # write the COPY payloads, no database
+  python3 pg_bulk_load.py --check staging/                       # smoke test a --dump in a throwaway database
+  python3 pg_bulk_load.py --bench 40                             # vs seedCourses.ts, synthetic QZxx subjects
+
+  The connection comes from --database-url or DATABASE_URL (same as the seeder;
+  a Prisma "?schema=" parameter becomes the search_path). Without --prereqs the
+  trees are compiled from the catalogs on the fly. --delta loads only the added
+  and changed ids of each <subject>_courses.delta.json.
+
+  --check creates a scratch database on the same server (the user needs
+  CREATEDB), applies prisma/migrations, loads the dump twice (fresh and
+  reload), compares row counts with the dump, checks the prereq FKs, and drops
+  the database again.
+
+  --bench deletes and reloads every course whose subject starts with QZ (no real
+  subject does): point it at a local development database only.
+
+DEPENDENCIES:
+  pip install "psycopg[binary]"   (pinned in requirements.txt)
+  (--bench also runs the seeder: npm install, npx prisma generate)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from prereq_compiler import compile_catalog
+
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+COURSE_KEY_RE = re.compile(r"^([A-Za-z]+)\s+(\d+)$")   # seedCourses.ts parseCourseKey
+CREDITS_RE = re.compile(r"^(\d+(?:\.\d+)?)")
+COPY_CHUNK = 1 << 20
+
+STAGING_SQL = """
+CREATE TEMP TABLE stage_courses (
+    id TEXT, subject TEXT, number TEXT, title TEXT, credits INTEGER
+) ON COMMIT DROP;
+CREATE TEMP TABLE stage_prereq_expressions (
+    id TEXT, course_id TEXT, raw_text TEXT, root_node_id TEXT
+) ON COMMIT DROP;
+CREATE TEMP TABLE stage_prereq_nodes (
+    id TEXT, expression_id TEXT, parent_node_id TEXT, position INTEGER,
+    node_type TEXT, k_value INTEGER, course_id TEXT, condition_text TEXT
+) ON COMMIT DROP;
+"""
+
+STAGE_COLUMNS = {
+    "stage_courses": ("id", "subject", "number", "title", "credits"),
+    "stage_prereq_expressions": ("id", "course_id", "raw_text", "root_node_id"),
+    "stage_prereq_nodes": ("id", "expression_id", "parent_node_id", "position",
+                           "node_type", "k_value", "course_id", "condition_text"),
+}
+
+# (label, statement); run in order inside the load transaction
+MERGE_SQL = [
+    ("courses", """
+        INSERT INTO courses (id, subject, number, title, credits, created_at, updated_at)
+        SELECT id, subject, number, title, credits, now(), now() FROM stage_courses
+        ON CONFLICT (id) DO UPDATE SET title = EXCLUDED.title, credits = EXCLUDED.credits, updated_at = now()
+        WHERE (courses.title, courses.credits) IS DISTINCT FROM (EXCLUDED.title, EXCLUDED.credits)
+    """),
+    ("old expressions", """
+        DELETE FROM prereq_expressions e USING stage_prereq_expressions s WHERE e.course_id = s.course_id
+    """),
+    ("nodes", """
+        INSERT INTO prereq_nodes (id, expression_id, parent_node_id, position, node_type, k_value,
+                                  course_id, condition_text, created_at, updated_at)
+        SELECT n.id, n.expression_id, n.parent_node_id, n.position,
+               (CASE WHEN n.node_type = 'COURSE' AND c.id IS NULL THEN 'CONDITION' ELSE n.node_type END)
+                   ::"PrereqNodeType",
+               n.k_value, c.id,
+               CASE WHEN n.node_type = 'COURSE' AND c.id IS NULL THEN n.course_id ELSE n.condition_text END,
+               now(), now()
+        FROM stage_prereq_nodes n LEFT JOIN courses c ON c.id = n.course_id
+    """),
+    ("expressions", """
+        INSERT INTO prereq_expressions (id, course_id, raw_text, root_node_id, created_at, updated_at)
+        SELECT id, course_id, raw_text, root_node_id, now(), now() FROM stage_prereq_expressions
+    """),
+]
+
+
+# -----------------------------
+# Rows
+# -----------------------------
+
+def parse_credits(units: str) -> Optional[int]:
+    """"4.00" / "2.00 - 3.00" -> 4 / 2, rounded half up like Math.round in the seeder."""
+    m = CREDITS_RE.match((units or "").strip())
+    return int(float(m.group(1)) + 0.5) if m else None
+
+
+def course_rows(catalog: Dict[str, Any], keys: Optional[set] = None) -> Iterator[Tuple[Any, ...]]:
+    for key, entry in catalog.items():
+        m = COURSE_KEY_RE.match(key)
+        if not m or not isinstance(entry, dict) or (keys is not None and key not in keys):
+            continue
+        subject, number = m.groups()
+        yield f"{subject}{number}", subject, number, entry.get("title") or None, parse_credits(entry.get("units", ""))
+
+
+def tree_rows(course: str, raw_text: str, root: Dict[str, Any],
+              nodes: List[Tuple[Any, ...]]) -> Tuple[Any, ...]:
+    """Append the tree's node rows (preorder) to nodes; return its expression row."""
+    expression_id = f"px_{course}"
+    stack: List[Tuple[Dict[str, Any], Optional[str], int]] = [(root, None, 0)]
+    n = 0
+    while stack:
+        node, parent, position = stack.pop()
+        node_id = f"pn_{course}_{n}"
+        n += 1
+        kind = node["type"]
+        nodes.append((
+            node_id, expression_id, parent, position, kind, node.get("k"),
+            node.get("courseId") if kind == "COURSE" else None,
+            node.get("text") if kind == "CONDITION" else None,
+        ))
+        children = node.get("children") or []
+        for i in range(len(children) - 1, -1, -1):
+            stack.append((children[i], node_id, i))
+    return expression_id, course, raw_text or None, f"pn_{course}_0"
+
+
+def staged_rows(catalogs: Sequence[Dict[str, Any]], prereqs: Dict[str, Any],
+                keys: Optional[set] = None) -> Dict[str, List[Tuple[Any, ...]]]:
+    """Rows for the three staging tables. keys (catalog keys) narrows the load, e.g. to a delta."""
+    courses: List[Tuple[Any, ...]] = []
+    for catalog in catalogs:
+        courses.extend(course_rows(catalog, keys))
+    ids = {row[0] for row in courses}
+    expressions: List[Tuple[Any, ...]] = []
+    nodes: List[Tuple[Any, ...]] = []
+    for course, compiled in prereqs.get("courses", {}).items():
+        # An expression's course FK isn't deferred: only courses staged alongside
+        if course in ids:
+            expressions.append(tree_rows(course, compiled.get("rawText", ""), compiled["root"], nodes))
+    return {"stage_courses": courses, "stage_prereq_expressions": expressions, "stage_prereq_nodes": nodes}
+
+
+def delta_keys(catalog_paths: Sequence[Path]) -> set:
+    """Added + changed keys of each catalog's <subject>_courses.delta.json (removed ones stay, as in the seeder)."""
+    keys: set = set()
+    for p in catalog_paths:
+        dp = p.with_name(p.name.replace(".json", ".delta.json"))
+        if not dp.exists():
+            raise SystemExit(f"{dp.name} not found next to {p}")
+        delta = json.loads(dp.read_text(encoding="utf-8"))
+        if delta.get("removed"):
+            print(f"{dp.name} lists {len(delta['removed'])} removed courses; leaving them in place")
+        keys.update(delta.get("added", []), delta.get("changed", []))
+    return keys
+
+
+# -----------------------------
+# COPY payloads
+# -----------------------------
+
+def copy_value(v: Any) -> str:
+    if v is None:
+        return "\\N"
+    if isinstance(v, str):
+        return v.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return str(v)
+
+
+def copy_chunks(rows: Iterable[Tuple[Any, ...]], chunk: int = COPY_CHUNK) -> Iterator[bytes]:
+    """COPY text format, encoded and batched so the driver sees a few large writes."""
+    buf: List[str] = []
+    size = 0
+    for row in rows:
+        line = "\t".join(copy_value(v) for v in row) + "\n"
+        buf.append(line)
+        size += len(line)
+        if size >= chunk:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def dump_staging(staged: Dict[str, List[Tuple[Any, ...]]], out_dir: Path) -> None:
+    """<table>.tsv per staging table, byte for byte what load() sends (psql: \\copy <table> FROM '<file>')."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for table, rows in staged.items():
+        path = out_dir / f"{table}.tsv"
+        with path.open("wb") as f:
+            for chunk in copy_chunks(rows):
+                f.write(chunk)
+        print(f"  {path}: {len(rows)} rows, {path.stat().st_size / 1024:.0f} KB")
+
+
+# -----------------------------
+# Database
+# -----------------------------
+
+def connect(database_url: str):
+    try:
+        import psycopg
+    except ImportError:
+        raise SystemExit('psycopg is required to load: pip install "psycopg[binary]"')
+    # Prisma URLs carry ?schema=...; libpq rejects the parameter, so it becomes the search_path
+    parts = urlsplit(database_url)
+    query = parse_qsl(parts.query)
+    schema = next((v for k, v in query if k == "schema"), None)
+    url = urlunsplit(parts._replace(query=urlencode([(k, v) for k, v in query if k != "schema"])))
+    kwargs = {"options": f"-c search_path={schema}"} if schema else {}
+    return psycopg.connect(url, **kwargs)
+
+
+def load(conn, staged: Dict[str, List[Tuple[Any, ...]]]) -> Dict[str, Any]:
+    """Stage and merge in one transaction; returns row counts and per-phase milliseconds."""
+    return load_payloads(conn, {t: copy_chunks(rows) for t, rows in staged.items()},
+                         {t: len(rows) for t, rows in staged.items()})
+
+
+def load_payloads(conn, payloads: Dict[str, Iterable[bytes]], counts: Dict[str, int]) -> Dict[str, Any]:
+    """load() over ready COPY payloads per staging table (counts only feed the stats)."""
+    stats: Dict[str, Any] = {"staged": dict(counts), "rows": {}, "ms": {}}
+    t0 = time.perf_counter()
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute("SET CONSTRAINTS ALL DEFERRED")
+            cur.execute(STAGING_SQL)
+            for table, chunks in payloads.items():
+                t = time.perf_counter()
+                with cur.copy(f"COPY {table} ({', '.join(STAGE_COLUMNS[table])}) FROM STDIN") as copy:
+                    for chunk in chunks:
+                        copy.write(chunk)
+                stats["ms"][f"copy {table}"] = round((time.perf_counter() - t) * 1000, 1)
+            for label, sql in MERGE_SQL:
+                t = time.perf_counter()
+                cur.execute(sql)
+                stats["rows"][label] = cur.rowcount
+                stats["ms"][f"merge {label}"] = round((time.perf_counter() - t) * 1000, 1)
+        t_commit = time.perf_counter()
+    stats["ms"]["commit"] = round((time.perf_counter() - t_commit) * 1000, 1)
+    stats["ms"]["total"] = round((time.perf_counter() - t0) * 1000, 1)
+    return stats
+
+
+def print_stats(stats: Dict[str, Any]) -> None:
+    staged = stats["staged"]
+    rows = stats["rows"]
+    print(f"Staged {staged['stage_courses']} courses, {staged['stage_prereq_expressions']} prereq expressions, "
+          f"{staged['stage_prereq_nodes']} nodes")
+    print(f"  courses inserted/updated: {rows['courses']}, expressions replaced: {rows['old expressions']}, "
+          f"nodes: {rows['nodes']}, expressions: {rows['expressions']}")
+    print("  " + ", ".join(f"{k} {v:.0f} ms" for k, v in stats["ms"].items()))
+
+
+# -----------------------------
+# Smoke check
+# -----------------------------
+
+MIGRATIONS_DIR = REPO_ROOT / "prisma" / "migrations"
+
+# (what, query returning one count that must be 0)
+CHECK_SQL = [
+    ("expressions without their root node",
+     "SELECT count(*) FROM prereq_expressions e LEFT JOIN prereq_nodes n ON n.id = e.root_node_id "
+     "WHERE n.id IS NULL"),
+    ("nodes without their expression",
+     "SELECT count(*) FROM prereq_nodes n LEFT JOIN prereq_expressions e ON e.id = n.expression_id "
+     "WHERE e.id IS NULL"),
+    ("nodes without their parent",
+     "SELECT count(*) FROM prereq_nodes n LEFT JOIN prereq_nodes p ON p.id = n.parent_node_id "
+     "WHERE n.parent_node_id IS NOT NULL AND p.id IS NULL"),
+    ("root nodes with a parent",
+     "SELECT count(*) FROM prereq_expressions e JOIN prereq_nodes n ON n.id = e.root_node_id "
+     "WHERE n.parent_node_id IS NOT NULL"),
+    ("COURSE nodes without a course",
+     "SELECT count(*) FROM prereq_nodes WHERE node_type = 'COURSE' AND course_id IS NULL"),
+]
+
+
+def read_dump(dump_dir: Path) -> Tuple[Dict[str, Iterator[bytes]], Dict[str, int]]:
+    """The --dump payloads back as COPY chunks, with their row counts."""
+    payloads: Dict[str, Iterator[bytes]] = {}
+    counts: Dict[str, int] = {}
+    for table in STAGE_COLUMNS:
+        path = dump_dir / f"{table}.tsv"
+        if not path.exists():
+            raise SystemExit(f"{path} not found: write it with --dump first")
+        data = path.read_bytes()
+        counts[table] = data.count(b"\n")
+        payloads[table] = iter([data[i:i + COPY_CHUNK] for i in range(0, len(data), COPY_CHUNK)])
+    return payloads, counts
+
+
+def check(database_url: str, dump_dir: Path) -> List[str]:
+    """
+    Load --dump output twice into a throwaway database created next to
+    database_url's (schema from prisma/migrations), and compare row counts and
+    FK integrity with the dump. Returns problems; the database is dropped either way.
+    """
+    import psycopg
+
+    name = f"jumboplan_check_{os.getpid()}"
+    parts = urlsplit(database_url)
+    scratch_url = urlunsplit(parts._replace(path=f"/{name}", query=""))
+    admin = connect(database_url)
+    admin.autocommit = True
+    admin.execute(f'CREATE DATABASE "{name}"')
+    problems: List[str] = []
+    try:
+        with psycopg.connect(scratch_url) as conn:
+            with conn.transaction():
+                for migration in sorted(MIGRATIONS_DIR.glob("*/migration.sql")):
+                    conn.execute(migration.read_text(encoding="utf-8"))
+            for run in ("load", "reload"):
+                payloads, counts = read_dump(dump_dir)
+                stats = load_payloads(conn, payloads, counts)
+                print(f"{run}: " + ", ".join(f"{k} {v}" for k, v in stats["rows"].items()))
+                for table, staged in (("courses", "stage_courses"),
+                                      ("prereq_expressions", "stage_prereq_expressions"),
+                                      ("prereq_nodes", "stage_prereq_nodes")):
+                    got = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+                    if got != counts[staged]:
+                        problems.append(f"{run}: {table} has {got} rows, dump has {counts[staged]}")
+                for what, sql in CHECK_SQL:
+                    bad = conn.execute(sql).fetchone()[0]
+                    if bad:
+                        problems.append(f"{run}: {bad} {what}")
+    finally:
+        admin.execute(f'DROP DATABASE IF EXISTS "{name}"')
+        admin.close()
+    return problems
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+BENCH_PREFIX = "QZ"
+
+
+def bench_catalog(base: Dict[str, Any], subjects: int) -> Dict[str, Any]:
+    """base copied under subjects QZAA, QZAB, ...; requirement refs point into the copy."""
+    out: Dict[str, Any] = {}
+    for s in range(subjects):
+        code = BENCH_PREFIX + chr(65 + s // 26 % 26) + chr(65 + s % 26)
+        for key, entry in base.items():
+            m = COURSE_KEY_RE.match(key)
+            if not m or not isinstance(entry, dict):
+                continue
+            requirements = re.sub(rf"\b{m.group(1)}\b", code, entry.get("requirements") or "")
+            out[f"{code} {m.group(2)}"] = {**entry, "subject": code, "requirements": requirements}
+    return out
+
+
+def bench_reset(conn) -> None:
+    # Expressions and their nodes cascade from the course
+    with conn.transaction(), conn.cursor() as cur:
+        cur.execute("DELETE FROM courses WHERE subject LIKE %s", (BENCH_PREFIX + "%",))
+
+
+def bench(database_url: str, base_path: Path, subjects: int) -> None:
+    base = json.loads(base_path.read_text(encoding="utf-8"))
+    catalog = bench_catalog(base, subjects)
+    conn = connect(database_url)
+    results: List[Tuple[str, float, str]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # seedCourses.ts reads cs_courses.json from its working directory
+        Path(tmp, "cs_courses.json").write_text(json.dumps(catalog), encoding="utf-8")
+        bench_reset(conn)
+        t = time.perf_counter()
+        try:
+            proc = subprocess.run(["npx", "tsx", str(REPO_ROOT / "prisma" / "seedCourses.ts")], cwd=tmp,
+                                  env={**os.environ, "DATABASE_URL": database_url},
+                                  capture_output=True, text=True)
+            ok = proc.returncode == 0
+            note = "" if ok else proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+        except FileNotFoundError:
+            ok, note = False, "npx not found"
+        if ok:
+            results.append(("seedCourses.ts", time.perf_counter() - t, ""))
+        else:
+            print(f"Seeder run failed ({note}); timing the bulk loader only")
+
+    t = time.perf_counter()
+    staged = staged_rows([catalog], compile_catalog([catalog]))
+    build_s = time.perf_counter() - t
+    for label in ("bulk load (fresh)", "bulk load (reload)"):
+        if label.endswith("(fresh)"):
+            bench_reset(conn)
+        t = time.perf_counter()
+        stats = load(conn, staged)
+        results.append((label, time.perf_counter() - t + build_s,
+                        f"rows+compile {build_s * 1000:.0f} ms, " +
+                        ", ".join(f"{k} {v:.0f}" for k, v in stats["ms"].items() if k != "total")))
+    bench_reset(conn)
+    conn.close()
+
+    n = len(staged["stage_courses"])
+    print(f"{n} courses ({subjects} x {base_path.name}), {len(staged['stage_prereq_nodes'])} prereq nodes")
+    print(f"  {'loader':<20} {'seconds':>9} {'courses/s':>10}  phases (ms)")
+    for label, seconds, detail in results:
+        print(f"  {label:<20} {seconds:9.2f} {n / seconds:10.0f}  {detail}")
+
+
+# -----------------------------
+# Main
+# -----------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load scraped catalogs and prereq trees into Postgres.")
+    parser.add_argument("catalogs", nargs="*", help="<subject>_courses.json exports")
+    parser.add_argument("--prereqs", help="prereqs.json from prereq_compiler.py (default: compile the catalogs)")
+    parser.add_argument("--delta", action="store_true", help="only the added/changed ids of each delta file")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--dump", metavar="DIR", help="write the staging COPY payloads to DIR instead of loading")
+    parser.add_argument("--check", metavar="DIR",
+                        help="load a --dump DIR into a throwaway database on --database-url's server and verify it")
+    parser.add_argument("--bench", type=int, metavar="SUBJECTS",
+                        help="compare against seedCourses.ts on SUBJECTS synthetic copies of --bench-base")
+    parser.add_argument("--bench-base", default=str(REPO_ROOT / "cs_courses.json"))
+    args = parser.parse_args()
+
+    if args.check:
+        if not args.database_url:
+            raise SystemExit("--check needs --database-url or DATABASE_URL")
+        problems = check(args.database_url, Path(args.check))
+        for p in problems:
+            print(f"  ! {p}")
+        print(f"Check: {'OK' if not problems else f'{len(problems)} problems'}")
+        raise SystemExit(1 if problems else 0)
+    if args.bench:
+        if not args.database_url:
+            raise SystemExit("--bench needs --database-url or DATABASE_URL")
+        bench(args.database_url, Path(args.bench_base), args.bench)
+        raise SystemExit(0)
+    if not args.catalogs:
+        parser.error("no catalogs given")
+
+    paths = [Path(p) for p in args.catalogs]
+    catalogs = [json.loads(p.read_text(encoding="utf-8")) for p in paths]
+    t = time.perf_counter()
+    prereqs = (json.loads(Path(args.prereqs).read_text(encoding="utf-8")) if args.prereqs
+               else compile_catalog(catalogs))
+    staged = staged_rows(catalogs, prereqs, delta_keys(paths) if args.delta else None)
+    print(f"Built staging rows in {(time.perf_counter() - t) * 1000:.0f} ms")
+
+    if args.dump:
+        dump_staging(staged, Path(args.dump))
+    else:
+        if not args.database_url:
+            raise SystemExit("No database: pass --database-url, set DATABASE_URL, or use --dump")
+        conn = connect(args.database_url)
+        try:
+            print_stats(load(conn, staged))
+        finally:
+            conn.close()
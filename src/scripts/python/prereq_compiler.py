@@ -0,0 +1,696 @@
+#!/usr/bin/env python3
+"""
+prereq_compiler.py
+
+Compiles the free-text `requirements` of scraped catalog files (cs_courses.json, ...)
+into prerequisite trees using the same node schema as src/types/Prereq.ts and the
+prereq_nodes table:
+
+  {"type": "AND" | "OR", "children": [...]}
+  {"type": "MIN_K", "k": 2, "children": [...]}
+  {"type": "COURSE", "courseId": "CS0015"}
+  {"type": "CONDITION", "text": "graduate standing"}
+
+Course ids use the database form (subject + zero-padded number, "CS 0015" -> "CS0015").
+Cross-listed references ("CS/MATH 61") become an OR of both ids.
+
+How the text is read:
+  - A tokenizer turns the text into courses, bare numbers ("MATH 21, 32 or 34"),
+    parentheses, and/or/&/slash, commas, semicolons, "one of"/"two of" and words.
+  - Commas take the meaning of the conjunction that ends their list
+    ("A, B, and C" -> AND, "A, B, or C" -> OR).
+  - Precedence, loosest first: ";" / sentence break, "and", "or".
+    So "CS 15 and CS 40 or EE 25" is CS 15 AND (CS 40 OR EE 25).
+  - Text after the first sentence that names a course is ignored ("... or graduate
+    standing. First years and sophomores must ..." only restricts some students).
+  - "Two of A, B, and C" is MIN_K(k=2) over the whole list; "one of" is an OR.
+  - Words in front of a course only qualify it ("Completion of CS 15", "A- in CS 116");
+    other words next to a course are conditions of their own ("CS 15 junior standing").
+  - Escape hatches ("or graduate standing", "or permission of instructor") are
+    lifted to the top: "CS 15 and CS 40, or graduate standing" is
+    (CS 15 AND CS 40) OR graduate standing.
+  - Any subtree without a course collapses back into one CONDITION with its text.
+  - Grade qualifiers ("with C- or better") are dropped; the node schema has no grades.
+
+Identical requirement strings are compiled once (memoized on the normalized text).
+
+USAGE:
+  python3 prereq_compiler.py [cs_courses.json ...] [--out prereqs.json]
+  python3 prereq_compiler.py --check      # compile the built-in samples (SELF_CHECK) and compare
+
+OUTPUT (prereqs.json):
+  {"stats": {...}, "unparsed": [...], "courses": {"CS0015": {"rawText": ..., "root": {...}}}}
+  Courses with empty requirements are omitted, like seedCourses.ts does.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def norm_text(s: str) -> str:
+    s = (s or "").replace("\u00a0", " ")
+    return re.sub(r"\s+", " ", s).strip().rstrip(".").strip()
+
+
+def db_course_id(subject: str, number: str) -> str:
+    """"CS", "15" -> "CS0015"; "MATH", "61A" -> "MATH0061A" (same ids seedCourses.ts creates)."""
+    m = re.match(r"^0*(\d+)([A-Z]?)$", number.upper())
+    if not m:
+        return f"{subject.upper()}{number.upper()}"
+    return f"{subject.upper()}{m.group(1).zfill(4)}{m.group(2)}"
+
+
+def catalog_key_to_id(key: str) -> Optional[str]:
+    """Catalog key "CS 0011" -> "CS0011"; None for the template header keys."""
+    m = re.match(r"^([A-Za-z]+)\s+(\d+[A-Za-z]?)$", key)
+    return db_course_id(m.group(1), m.group(2)) if m else None
+
+
+# -----------------------------
+# Tokenizer
+# -----------------------------
+
+GRADE_QUALIFIER_RE = re.compile(
+    r"\b(?:with|for)?\s*(?:an?\s+)?(?:(?:minimum\s+)?grade\s+of\s+)?[A-D][+-]?\s+or\s+(?:better|higher|above)\b",
+    re.IGNORECASE,
+)
+# Sentence break: period followed by a capitalised word ("standing. First years ...")
+SENTENCE_RE = re.compile(r"\.\s+(?=[A-Z])")
+
+TOKEN_RE = re.compile(r"""
+    (?P<choose>\b(?:at\s+least\s+|any\s+)?(?:one|two|three)\s+of(?:\s+the\s+following(?:\s+courses)?)?\b\s*:?)
+  | (?P<initials>\b[A-Z]\s*&\s*[A-Z]\b)
+  | (?P<course>\b[A-Za-z]{2,5}(?:/[A-Za-z]{2,5})*\s*\d{1,4}[A-Za-z]?\b)
+  | (?P<num>\b\d{1,4}[A-Za-z]?\b)
+  | (?P<lp>\()
+  | (?P<rp>\))
+  | (?P<semi>;)
+  | (?P<comma>,)
+  | (?P<amp>&)
+  | (?P<slash>/)
+  | (?P<word>[^\s(),;&/]+)
+""", re.VERBOSE | re.IGNORECASE)
+
+COURSE_PARTS_RE = re.compile(r"^([A-Za-z/]+?)\s*(\d{1,4}[A-Za-z]?)$")
+CHOOSE_K = {"one": 1, "two": 2, "three": 3}
+
+# Words that can look like a subject in front of a number ("or 72", "of 3")
+NOT_SUBJECTS = {"AND", "OR", "OF", "IN", "THE", "WITH", "AT", "TO", "FOR", "ONE", "TWO", "ANY", "ABOVE", "THAN"}
+
+# Words that only qualify a course ("Completion of CS 15", "Enrollment in CS 61")
+FILLER_WORDS = {
+    "prerequisite", "prerequisite:", "prerequisites", "prerequisites:", "requires", "required", "require",
+    "completion", "prior", "previous", "of", "the", "either", "enrollment", "in", "concurrent",
+    "a", "an", "course", "courses", "following", "following:", "must", "have", "completed",
+    "grade", "grades",
+}
+# Letter grades in front of a course ("A- in CS 116")
+LETTER_GRADE_RE = re.compile(r"^[A-F][+-]?$")
+
+# Conditions that are alternatives to the whole requirement, not to the operand next to them
+OVERRIDE_RE = re.compile(r"\b(?:grad(?:uate)?|permission|consent|instructor)\b", re.IGNORECASE)
+
+
+@dataclass
+class Tok:
+    kind: str  # course, num, lp, rp, and, or, comma, semi, choose, word
+    value: Any
+    start: int
+    end: int
+
+
+def tokenize(text: str) -> List[Tok]:
+    toks: List[Tok] = []
+    for m in TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        s, e = m.start(), m.end()
+        val = m.group(kind)
+        if kind == "choose":
+            n = re.search(r"(one|two|three)", val, re.IGNORECASE).group(1).lower()
+            toks.append(Tok("choose", CHOOSE_K[n], s, e))
+        elif kind == "course":
+            subj, num = COURSE_PARTS_RE.match(val).groups()
+            subjects = [x.upper() for x in subj.split("/")]
+            if subjects[0] in NOT_SUBJECTS or not subj[0].isupper():
+                # "or 72", "year 2" -> word + bare number
+                word = subj.split("/")[0]
+                toks.append(word_token(word, s, s + len(word)))
+                toks.append(Tok("num", num.upper(), e - len(num), e))
+            else:
+                toks.append(Tok("course", (tuple(subjects), num.upper()), s, e))
+        elif kind == "amp":
+            toks.append(Tok("and", "&", s, e))
+        elif kind == "slash":
+            toks.append(Tok("or", "/", s, e))
+        elif kind in ("word", "initials"):
+            # "A&S" / "A & S" is a school, not a conjunction
+            toks.append(word_token(val, s, e))
+        else:
+            toks.append(Tok(kind, val, s, e))
+    return toks
+
+
+def word_token(word: str, start: int, end: int) -> Tok:
+    low = word.lower()
+    if low == "and":
+        return Tok("and", word, start, end)
+    if low in ("or", "and/or"):
+        return Tok("or", word, start, end)
+    return Tok("word", word, start, end)
+
+
+def resolve_tokens(toks: List[Tok]) -> List[Tok]:
+    """
+    Second pass over the tokens:
+      - bare numbers right after a course list ("MATH 21, 32, or 34") inherit its subject
+      - commas take the meaning of the conjunction that ends their list
+      - a comma directly followed by a conjunction collapses into it
+    """
+    out: List[Tok] = []
+    last_subjects: Optional[Tuple[str, ...]] = None
+    for i, t in enumerate(toks):
+        if t.kind == "course":
+            last_subjects = t.value[0]
+        elif t.kind == "num":
+            j = len(out) - 1
+            while j >= 0 and out[j].kind in ("comma", "or", "and"):
+                j -= 1
+            if last_subjects and j < len(out) - 1 and j >= 0 and out[j].kind == "course":
+                t = Tok("course", (last_subjects, t.value), t.start, t.end)
+            else:
+                t = Tok("word", t.value, t.start, t.end)
+        elif t.kind not in ("comma", "or", "and"):
+            last_subjects = None if t.kind != "rp" else last_subjects
+        out.append(t)
+
+    resolved: List[Tok] = []
+    for i, t in enumerate(out):
+        if t.kind != "comma":
+            resolved.append(t)
+            continue
+        conj = comma_meaning(out, i)
+        nxt = out[i + 1] if i + 1 < len(out) else None
+        if nxt is not None and nxt.kind in ("and", "or"):
+            continue  # ", or" -> "or"
+        if nxt is None or nxt.kind in ("rp", "semi"):
+            continue  # trailing comma
+        resolved.append(Tok(conj, ",", t.start, t.end))
+    return resolved
+
+
+def comma_meaning(toks: List[Tok], i: int) -> str:
+    """The first and/or after toks[i] at the same paren depth decides what a comma means."""
+    depth = 0
+    for t in toks[i + 1:]:
+        if t.kind == "lp":
+            depth += 1
+        elif t.kind == "rp":
+            if depth == 0:
+                break
+            depth -= 1
+        elif depth == 0 and t.kind == "semi":
+            break
+        elif depth == 0 and t.kind in ("and", "or"):
+            return t.kind
+    return "and"
+
+
+# -----------------------------
+# Parser
+# -----------------------------
+
+class ParseError(ValueError):
+    pass
+
+
+Node = Dict[str, Any]
+
+
+def course_node(subjects: Tuple[str, ...], number: str, start: int, end: int) -> Node:
+    if len(subjects) == 1:
+        return {"type": "COURSE", "courseId": db_course_id(subjects[0], number), "_span": (start, end)}
+    return {
+        "type": "OR",
+        "children": [{"type": "COURSE", "courseId": db_course_id(s, number)} for s in subjects],
+        "_span": (start, end),
+    }
+
+
+def group(kind: str, children: List[Node], k: Optional[int] = None) -> Node:
+    """Build AND/OR/MIN_K, flattening same-type children and unwrapping single children."""
+    flat: List[Node] = []
+    seen = set()
+    for c in children:
+        for child in (c["children"] if c["type"] == kind and kind in ("AND", "OR") else [c]):
+            key = json.dumps(strip_spans(child), sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                flat.append(child)
+    spans = [c["_span"] for c in children if "_span" in c]
+    span = (min(s for s, _ in spans), max(e for _, e in spans)) if spans else None
+    if len(flat) == 1 and kind != "MIN_K":
+        node = dict(flat[0])
+    else:
+        node = {"type": kind, "children": flat}
+        if kind == "MIN_K":
+            node["k"] = k
+    if span:
+        node["_span"] = span
+    return node
+
+
+class Parser:
+    """
+    Recursive descent over resolved tokens.
+
+      top     := clause ((semi [and|or]) clause)*
+      clause  := disj ("and" disj)*
+      disj    := juxt ("or" juxt)*
+      juxt    := atom+                 (words next to a course only qualify it)
+      atom    := course | "(" top ")" | choose (group | list) | word+
+      list    := juxt (("and" | "or") juxt)*   (every item counts toward the choice)
+    """
+
+    def __init__(self, text: str, toks: List[Tok]):
+        self.text = text
+        self.toks = toks
+        self.i = 0
+
+    def peek(self) -> Optional[Tok]:
+        return self.toks[self.i] if self.i < len(self.toks) else None
+
+    def take(self) -> Tok:
+        t = self.toks[self.i]
+        self.i += 1
+        return t
+
+    def at(self, *kinds: str) -> bool:
+        t = self.peek()
+        return t is not None and t.kind in kinds
+
+    def parse(self) -> Node:
+        node = self.parse_top()
+        while self.at("rp"):
+            # Stray closing paren (the catalog has a few); skip it and keep going
+            self.take()
+            if self.peek() is None:
+                break
+            join = self.take().kind if self.at("and", "or") else "and"
+            node = group(join.upper(), [node, self.parse_top()])
+        if self.peek() is not None:
+            raise ParseError(f"unexpected {self.peek().kind} at {self.peek().start}")
+        return node
+
+    def parse_top(self) -> Node:
+        while self.at("and", "or", "semi"):
+            self.take()  # leading "; or graduate standing" / "or ..."
+        clauses = [self.parse_clause()]
+        joins: List[str] = []
+        while self.at("semi"):
+            self.take()
+            join = "and"
+            if self.at("and", "or"):
+                join = self.take().kind
+            if self.peek() is None or self.at("rp"):
+                break
+            joins.append(join)
+            clauses.append(self.parse_clause())
+        if not joins:
+            return clauses[0]
+        # Mixed separators: fold left, each clause joined by the conjunction after its semicolon
+        node = clauses[0]
+        for join, clause in zip(joins, clauses[1:]):
+            node = group(join.upper(), [node, clause])
+        return node
+
+    def parse_clause(self) -> Node:
+        parts = [self.parse_disj()]
+        while self.at("and"):
+            self.take()
+            if self.peek() is None or self.at("rp", "semi"):
+                break
+            parts.append(self.parse_disj())
+        return group("AND", parts)
+
+    def parse_disj(self) -> Node:
+        parts = [self.parse_juxt()]
+        while self.at("or"):
+            self.take()
+            if self.peek() is None or self.at("rp", "semi"):
+                break
+            parts.append(self.parse_juxt())
+        return group("OR", parts)
+
+    def parse_juxt(self) -> Node:
+        atoms: List[Node] = []
+        while self.at("course", "lp", "choose", "word", "num"):
+            atoms.append(self.parse_atom())
+        if not atoms:
+            t = self.peek()
+            raise ParseError(f"expected a course or condition at {t.start if t else len(self.text)}")
+        if len(atoms) == 1:
+            return atoms[0]
+        with_courses = [a for a in atoms if has_course(a)]
+        if with_courses:
+            # "Completion of CS 15", "A- in CS 116": the words qualify the course
+            # ("... must have grades of C- or better in (CS 15 ...)"), but anything
+            # else ("CS 15 junior standing") is a condition of its own
+            kept = [a for i, a in enumerate(atoms) if has_course(a) or not self.qualifies(atoms, i)]
+            return group("AND", kept)
+        return self.condition(atoms[0]["_span"][0], atoms[-1]["_span"][1])
+
+    def parse_atom(self) -> Node:
+        t = self.peek()
+        if t.kind == "course":
+            self.take()
+            return course_node(t.value[0], t.value[1], t.start, t.end)
+        if t.kind == "lp":
+            self.take()
+            if self.at("rp"):
+                raise ParseError(f"empty parentheses at {t.start}")
+            inner = self.parse_top()
+            end = t.end
+            if self.at("rp"):
+                end = self.take().end
+            node = dict(inner)
+            node["_span"] = (t.start, max(end, inner.get("_span", (0, end))[1]))
+            return node
+        if t.kind == "choose":
+            self.take()
+            k = t.value
+            if self.at("lp"):
+                body = self.parse_atom()
+                items = body["children"] if body["type"] in ("AND", "OR") else [body]
+            else:
+                items = self.parse_list()
+            end = max((c["_span"][1] for c in items if "_span" in c), default=t.end)
+            span = (t.start, end)
+            node = group("OR", items) if k == 1 else group("MIN_K", items, k=k)
+            node["_span"] = span
+            return node
+        # run of plain words
+        start = t.start
+        end = t.end
+        while self.at("word", "num"):
+            end = self.take().end
+        return self.condition(start, end)
+
+    def qualifies(self, atoms: List[Node], i: int) -> bool:
+        text = self.span_text(atoms[i])
+        if is_filler(text):
+            return True
+        words = text.split()
+        return i + 1 < len(atoms) and has_course(atoms[i + 1]) and words[-1].lower() in ("in", "of")
+
+    def parse_list(self) -> List[Node]:
+        """Items of an unparenthesised choice ("two of CS 15, CS 40, and CS 61")."""
+        items = [self.parse_juxt()]
+        while self.at("and", "or"):
+            self.take()
+            if self.peek() is None or self.at("rp", "semi"):
+                break
+            items.append(self.parse_juxt())
+        return items
+
+    def span_text(self, node: Node) -> str:
+        s, e = node["_span"]
+        return self.text[s:e]
+
+    def condition(self, start: int, end: int) -> Node:
+        text = condition_text(self.text[start:end])
+        return {"type": "CONDITION", "text": text, "_span": (start, end)}
+
+
+def tree_course_ids(node: Optional[Node]) -> Iterator[str]:
+    """courseId of every COURSE node of a compiled tree, in preorder (repeats included)."""
+    if not node:
+        return
+    if node.get("type") == "COURSE" and node.get("courseId"):
+        yield node["courseId"]
+    for child in node.get("children", []):
+        yield from tree_course_ids(child)
+
+
+def condition_text(text: str) -> str:
+    """Source text of a condition, with the blanked-out grade qualifiers squeezed away."""
+    return " ".join(text.split()).strip(" ,;:()")
+
+
+def has_course(node: Node) -> bool:
+    if node["type"] == "COURSE":
+        return True
+    return any(has_course(c) for c in node.get("children", ()))
+
+
+def is_filler(text: str) -> bool:
+    words = text.split()
+    return bool(words) and all(w.lower() in FILLER_WORDS or LETTER_GRADE_RE.match(w) for w in words)
+
+
+# -----------------------------
+# Post-processing
+# -----------------------------
+
+def collapse_conditions(node: Node, text: str) -> Node:
+    """
+    Replace every AND/OR/MIN_K subtree without a course by one CONDITION with
+    its source text, and merge neighbouring conditions ("CS Majors, CS Minors,
+    and CS Graduate Students") back into one.
+    """
+    if node["type"] in ("COURSE", "CONDITION"):
+        return node
+    if not has_course(node) and "_span" in node:
+        s, e = node["_span"]
+        return {"type": "CONDITION", "text": condition_text(text[s:e]), "_span": node["_span"]}
+    merged: List[Node] = []
+    for c in (collapse_conditions(c, text) for c in node["children"]):
+        prev = merged[-1] if merged else None
+        if (prev is not None and prev["type"] == "CONDITION" and c["type"] == "CONDITION"
+                and "_span" in prev and "_span" in c):
+            s, e = prev["_span"][0], c["_span"][1]
+            merged[-1] = {"type": "CONDITION", "text": condition_text(text[s:e]), "_span": (s, e)}
+        else:
+            merged.append(c)
+    if node["type"] in ("AND", "OR") and len(merged) == 1:
+        return merged[0]
+    out = dict(node)
+    out["children"] = merged
+    return out
+
+
+def is_override(node: Node) -> bool:
+    return node["type"] == "CONDITION" and bool(OVERRIDE_RE.search(node["text"]))
+
+
+def lift_overrides(node: Node) -> Tuple[Node, List[Node]]:
+    """Pull "or graduate standing"-style alternatives out of nested ORs. Returns (node, lifted)."""
+    if node["type"] in ("COURSE", "CONDITION"):
+        return node, []
+    children: List[Node] = []
+    lifted: List[Node] = []
+    for c in node["children"]:
+        c2, up = lift_overrides(c)
+        children.append(c2)
+        lifted.extend(up)
+    if node["type"] == "OR":
+        keep = [c for c in children if not is_override(c)]
+        if keep and len(keep) < len(children):
+            lifted.extend(c for c in children if is_override(c))
+            children = keep
+    if out_type_single(node, children):
+        return children[0], lifted
+    out = group(node["type"], children, k=node.get("k"))
+    return out, lifted
+
+
+def out_type_single(node: Node, children: List[Node]) -> bool:
+    return node["type"] in ("AND", "OR") and len(children) == 1
+
+
+def strip_spans(node: Node) -> Node:
+    out = {k: v for k, v in node.items() if k != "_span"}
+    if "children" in out:
+        out["children"] = [strip_spans(c) for c in out["children"]]
+    return out
+
+
+def without_course(node: Node, course: str) -> Optional[Node]:
+    """Drop references to the course itself (some descriptions mention their own number)."""
+    if node["type"] == "COURSE":
+        return None if node["courseId"] == course else node
+    if node["type"] == "CONDITION":
+        return node
+    kids = [k for k in (without_course(c, course) for c in node["children"]) if k is not None]
+    if not kids:
+        return None
+    if node["type"] in ("AND", "OR") and len(kids) == 1:
+        return kids[0]
+    out = dict(node)
+    out["children"] = kids
+    if out["type"] == "MIN_K":
+        out["k"] = min(out["k"], len(kids))
+    return out
+
+
+# -----------------------------
+# Compiler
+# -----------------------------
+
+def first_course_sentence(text: str) -> str:
+    """
+    Cut the text after the first sentence that names a course. Later sentences
+    qualify it for some students ("First years and sophomores must have ...")
+    and are not part of the requirement; condition-only sentences before it
+    ("Restricted to CS Majors. ...") are kept.
+    """
+    for m in SENTENCE_RE.finditer(text):
+        if any(t.kind == "course" for t in tokenize(text[:m.start()])):
+            return text[:m.start()]
+    return text
+
+
+@lru_cache(maxsize=None)
+def compile_normalized(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Compile one normalized requirement string. Returns (tree_json, error);
+    the tree is returned serialized so cached results can never be mutated.
+    """
+    cleaned = first_course_sentence(GRADE_QUALIFIER_RE.sub(lambda m: " " * len(m.group(0)), text))
+    cleaned = SENTENCE_RE.sub(lambda m: ";" + " " * (len(m.group(0)) - 1), cleaned)
+    try:
+        toks = resolve_tokens(tokenize(cleaned))
+        if not toks:
+            raise ParseError("no tokens")
+        tree = Parser(cleaned, toks).parse()
+    except ParseError as e:
+        return None, str(e)
+    tree, lifted = lift_overrides(tree)
+    if lifted:
+        tree = group("OR", [tree] + lifted)
+    tree = collapse_conditions(tree, cleaned)
+    return json.dumps(strip_spans(tree)), None
+
+
+def compile_requirement(text: str, course: Optional[str] = None) -> Tuple[Optional[Node], Optional[str]]:
+    """Compile a raw requirement string. Returns (root, error); root is None for empty text."""
+    normalized = norm_text(text)
+    if not normalized:
+        return None, None
+    tree_json, error = compile_normalized(normalized)
+    if tree_json is None:
+        # Keep the text so nothing is lost; seeding stores it as a CONDITION like before
+        return {"type": "CONDITION", "text": normalized}, error
+    tree = json.loads(tree_json)
+    if course:
+        tree = without_course(tree, course) or {"type": "CONDITION", "text": normalized}
+    return tree, None
+
+
+def compile_catalog(catalogs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    courses: Dict[str, Any] = {}
+    unparsed: List[Dict[str, str]] = []
+    stats = {"courses": 0, "withRequirements": 0, "uniqueTexts": 0, "withCourseRefs": 0,
+             "conditionOnly": 0, "unparsed": 0}
+    compile_normalized.cache_clear()
+    for catalog in catalogs:
+        for key, entry in catalog.items():
+            course = catalog_key_to_id(key)
+            if course is None or not isinstance(entry, dict):
+                continue
+            stats["courses"] += 1
+            raw = (entry.get("requirements") or "").strip()
+            root, error = compile_requirement(raw, course)
+            if root is None:
+                continue
+            stats["withRequirements"] += 1
+            if error:
+                stats["unparsed"] += 1
+                unparsed.append({"course": course, "text": raw, "error": error})
+            elif has_course(root):
+                stats["withCourseRefs"] += 1
+            else:
+                stats["conditionOnly"] += 1
+            courses[course] = {"rawText": raw, "root": root}
+    stats["uniqueTexts"] = compile_normalized.cache_info().currsize
+    return {"stats": stats, "unparsed": unparsed, "courses": courses}
+
+
+# -----------------------------
+# Self-check
+# -----------------------------
+
+def _c(course: str) -> Node:
+    return {"type": "COURSE", "courseId": course}
+
+
+def _t(text: str) -> Node:
+    return {"type": "CONDITION", "text": text}
+
+
+SELF_CHECK: List[Tuple[str, Node]] = [
+    ("CS 15 and CS 40 or EE 25",
+     {"type": "AND", "children": [_c("CS0015"), {"type": "OR", "children": [_c("CS0040"), _c("EE0025")]}]}),
+    ("Two of the following: CS 15, CS 40, and CS 61",
+     {"type": "MIN_K", "k": 2, "children": [_c("CS0015"), _c("CS0040"), _c("CS0061")]}),
+    ("One of CS 15, CS 40, CS 61",
+     {"type": "OR", "children": [_c("CS0015"), _c("CS0040"), _c("CS0061")]}),
+    ("CS 15 junior standing",
+     {"type": "AND", "children": [_c("CS0015"), _t("junior standing")]}),
+    ("A- in CS 116 or CS 114", {"type": "OR", "children": [_c("CS0116"), _c("CS0114")]}),
+    ("Prior completion of CS 15 and senior standing, or graduate standing",
+     {"type": "OR", "children": [{"type": "AND", "children": [_c("CS0015"), _t("senior standing")]},
+                                 _t("graduate standing")]}),
+    ("CS 15 or graduate standing. First years must have completed CS 15 for a B+ or better",
+     {"type": "OR", "children": [_c("CS0015"), _t("graduate standing")]}),
+]
+
+
+def self_check() -> List[str]:
+    """Compile the SELF_CHECK strings and compare against their expected trees. Returns mismatches."""
+    problems = []
+    for text, want in SELF_CHECK:
+        got, error = compile_requirement(text)
+        if error or got != want:
+            problems.append(f"{text!r}: expected {json.dumps(want)}, got {json.dumps(got)} {error or ''}".rstrip())
+    return problems
+
+
+def main(catalog_paths: List[str], out_path: str) -> None:
+    catalogs = [json.loads(Path(p).read_text(encoding="utf-8")) for p in catalog_paths]
+    result = compile_catalog(catalogs)
+    Path(out_path).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    s = result["stats"]
+    print(f"Compiled {s['withRequirements']} requirement strings ({s['uniqueTexts']} unique) "
+          f"from {s['courses']} courses")
+    print(f"  with course refs: {s['withCourseRefs']}, condition only: {s['conditionOnly']}, "
+          f"unparsed: {s['unparsed']}")
+    for u in result["unparsed"]:
+        print(f"  ! {u['course']}: {u['error']}: {u['text']}")
+    print(f"Wrote JSON to: {out_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile catalog requirement strings into prereq trees.")
+    parser.add_argument("catalogs", nargs="*", default=["cs_courses.json"], help="scraped catalog JSON files")
+    parser.add_argument("--out", default="prereqs.json", help="output path")
+    parser.add_argument("--check", action="store_true",
+                        help="only compile the built-in sample strings and compare the trees")
+    args = parser.parse_args()
+    if args.check:
+        problems = self_check()
+        for p in problems:
+            print(f"  ! {p}")
+        print(f"{len(SELF_CHECK) - len(problems)}/{len(SELF_CHECK)} sample requirements OK")
+        raise SystemExit(1 if problems else 0)
+    main(args.catalogs, args.out)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+prereq_index.py
+
+Precomputed facts about the prerequisite graph, so "what does CS 15 eventually
+unlock", "everything CS 160 depends on" and "how many semesters until I can
+take CS 170" are lookups instead of tree walks.
+
+Graph:
+  Nodes are every catalog course, every course referenced in a prereq tree
+  (MATH0061, ...), and every course named in the degree template (degree.json,
+  the output of parse_degree_pdf.py; "CS/MATH 61" adds both ids).
+  There is an edge A -> B when A appears anywhere in B's prereq tree.
+
+Per course:
+  - unlocks:  every course reachable from it (forward transitive closure)
+  - requires: every course it can reach backwards (reverse transitive closure)
+    Both ignore AND/OR; they answer "is involved at all", not "is mandatory".
+  - depth: minimum number of earlier semesters before the course can be taken,
+    respecting AND (max), OR (min) and MIN_K (k-th smallest). Escape-hatch
+    CONDITIONs ("or graduate standing") are not an option here; a course whose
+    requirement is only conditions has depth 0.
+    "Minimum semesters to reach CS 170" = depth + 1.
+  - chain: longest prereq chain ending at the course over any edge.
+Cycles are found with Tarjan's SCC. Courses on a cycle share the closure of
+their component and depth/chain ignore the edges inside the cycle.
+
+ARTIFACT (two files, same stem):
+  prereq_index.json  ids, depth, chain, topological order, cycles, degree flags, layout
+  prereq_index.bin   forward then reverse closure, one packed bit row per id
+                     (np.packbits order, row length = rowBytes), read with np.memmap
+
+USAGE:
+  python3 prereq_index.py [cs_courses.json ...] [--degree ../../data/degree.json] [--out prereq_index]
+  python3 prereq_index.py --query CS15 --index prereq_index
+
+DEPENDENCIES:
+  pip install numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+from eligibility import canonical_course_id
+from prereq_compiler import catalog_key_to_id, compile_catalog, db_course_id, tree_course_ids
+
+
+DEFAULT_DEGREE = Path(__file__).resolve().parents[2] / "data" / "degree.json"
+TEMPLATE_COURSE_RE = re.compile(r"^([A-Za-z/]+)\s*(\d+[A-Za-z]?)$")
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+
+def template_course_ids(course: str) -> List[str]:
+    """"CS/MATH 61" -> ["CS0061", "MATH0061"]; "EM 52" -> ["EM0052"]."""
+    m = TEMPLATE_COURSE_RE.match(course.strip())
+    if not m:
+        return []
+    return [db_course_id(subj, m.group(2)) for subj in m.group(1).split("/") if subj]
+
+
+def degree_course_ids(template: Dict[str, Any]) -> List[str]:
+    """Every concrete course named by a course / course_or item of the template."""
+    ids: List[str] = []
+    for group in template.get("groups", []):
+        for item in group.get("items", []):
+            data = item.get("data", {})
+            courses = [data.get("course")] + [o.get("course") for o in data.get("options", [])]
+            for c in courses:
+                if c:
+                    ids.extend(template_course_ids(c))
+    return list(dict.fromkeys(ids))
+
+
+# -----------------------------
+# Graph algorithms
+# -----------------------------
+
+def strongly_connected(n: int, succ: List[List[int]]) -> List[List[int]]:
+    """Tarjan's SCC (iterative). Components come out in reverse topological order."""
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    comps: List[List[int]] = []
+    counter = 0
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, i = work.pop()
+            if i == 0:
+                index[v] = low[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = True
+            if i < len(succ[v]):
+                work.append((v, i + 1))
+                w = succ[v][i]
+                if index[w] == -1:
+                    work.append((w, 0))
+                elif on_stack[w]:
+                    low[v] = min(low[v], index[w])
+                continue
+            if low[v] == index[v]:
+                comp = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    comp.append(w)
+                    if w == v:
+                        break
+                comps.append(sorted(comp))
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+    return comps
+
+
+class PrereqGraph:
+    def __init__(self, trees: Dict[str, Optional[Dict[str, Any]]], extra_ids: Iterable[str] = (),
+                 degree_ids: Iterable[str] = ()):
+        ids: Dict[str, None] = {}
+        for course, tree in trees.items():
+            ids[course] = None
+            for ref in tree_course_ids(tree):
+                ids[ref] = None
+        for cid in list(extra_ids) + list(degree_ids):
+            ids[cid] = None
+        self.ids: List[str] = sorted(ids)
+        self.index: Dict[str, int] = {c: i for i, c in enumerate(self.ids)}
+        self.trees = trees
+        self.degree: Set[int] = {self.index[c] for c in degree_ids}
+
+        n = len(self.ids)
+        self.succ: List[List[int]] = [[] for _ in range(n)]
+        self.pred: List[List[int]] = [[] for _ in range(n)]
+        for course, tree in trees.items():
+            b = self.index[course]
+            for ref in dict.fromkeys(tree_course_ids(tree)):
+                a = self.index[ref]
+                if a != b:
+                    self.succ[a].append(b)
+                    self.pred[b].append(a)
+
+        comps = strongly_connected(n, self.succ)
+        comps.reverse()
+        self.components = comps
+        self.comp_of = [0] * n
+        for ci, comp in enumerate(comps):
+            for v in comp:
+                self.comp_of[v] = ci
+        self.cycles = [[self.ids[v] for v in comp] for comp in comps if len(comp) > 1]
+        self.topo_order = [v for comp in comps for v in comp]
+
+    def closures(self) -> "tuple[np.ndarray, np.ndarray]":
+        """(forward, reverse) as n x n bool matrices, computed on the component DAG with int bitsets."""
+        n = len(self.ids)
+        comps = self.components
+        members = [sum(1 << v for v in comp) for comp in comps]
+        comp_succ = [set() for _ in comps]
+        comp_pred = [set() for _ in comps]
+        for a in range(n):
+            for b in self.succ[a]:
+                ca, cb = self.comp_of[a], self.comp_of[b]
+                if ca != cb:
+                    comp_succ[ca].add(cb)
+                    comp_pred[cb].add(ca)
+
+        down = [0] * len(comps)
+        for ci in reversed(range(len(comps))):
+            bits = members[ci] if len(comps[ci]) > 1 else 0
+            for cj in comp_succ[ci]:
+                bits |= members[cj] | down[cj]
+            down[ci] = bits
+        up = [0] * len(comps)
+        for ci in range(len(comps)):
+            bits = members[ci] if len(comps[ci]) > 1 else 0
+            for cj in comp_pred[ci]:
+                bits |= members[cj] | up[cj]
+            up[ci] = bits
+
+        return self._to_matrix(down), self._to_matrix(up)
+
+    def _to_matrix(self, comp_bits: List[int]) -> np.ndarray:
+        n = len(self.ids)
+        out = np.zeros((n, n), dtype=bool)
+        for v in range(n):
+            bits = comp_bits[self.comp_of[v]]
+            cols = [i for i in range(n) if bits >> i & 1]
+            out[v, cols] = True
+            # A course on a cycle reaches its own component, but never lists itself
+            out[v, v] = False
+        return out
+
+    def depths(self) -> List[int]:
+        """Minimum earlier semesters per id (see module docstring)."""
+        depth: Dict[int, int] = {}
+        self._depth = depth
+        for v in self.topo_order:
+            tree = self.trees.get(self.ids[v])
+            value = self._tree_depth(tree, v) if tree else None
+            depth[v] = value or 0
+        return [depth[v] for v in range(len(self.ids))]
+
+    def _tree_depth(self, node: Dict[str, Any], owner: int) -> Optional[int]:
+        """Semesters needed before `owner`; None means 'not a real option' (conditions, cycle edges)."""
+        t = node.get("type")
+        if t == "COURSE":
+            ref = self.index.get(node.get("courseId") or "")
+            if ref is None or self.comp_of[ref] == self.comp_of[owner]:
+                return None
+            return self._depth[ref] + 1
+        if t == "CONDITION":
+            return None
+        values = [self._tree_depth(c, owner) for c in node.get("children", [])]
+        options = sorted(v for v in values if v is not None)
+        if not options:
+            return None
+        if t == "AND":
+            return options[-1]
+        if t == "OR":
+            return options[0]
+        if t == "MIN_K":
+            k = node.get("k") or 1
+            return options[min(k, len(options)) - 1]
+        return None
+
+    def chains(self) -> List[int]:
+        chain = [0] * len(self.ids)
+        for v in self.topo_order:
+            for a in self.pred[v]:
+                if self.comp_of[a] != self.comp_of[v]:
+                    chain[v] = max(chain[v], chain[a] + 1)
+        return chain
+
+
+# -----------------------------
+# Artifact
+# -----------------------------
+
+def build_index(catalog_paths: Sequence[str], degree_path: Optional[str], out_stem: str) -> Dict[str, Any]:
+    catalogs = [json.loads(Path(p).read_text(encoding="utf-8")) for p in catalog_paths]
+    prereqs = compile_catalog(catalogs)
+    trees: Dict[str, Optional[Dict[str, Any]]] = {
+        cid: None for cat in catalogs for cid in map(catalog_key_to_id, cat) if cid
+    }
+    for course, entry in prereqs["courses"].items():
+        trees[course] = entry["root"]
+
+    degree_ids: List[str] = []
+    if degree_path and Path(degree_path).exists():
+        degree_ids = degree_course_ids(json.loads(Path(degree_path).read_text(encoding="utf-8")))
+
+    graph = PrereqGraph(trees, degree_ids=degree_ids)
+    forward, reverse = graph.closures()
+    n = len(graph.ids)
+    row_bytes = math.ceil(n / 8)
+
+    meta = {
+        "version": 1,
+        "ids": graph.ids,
+        "rowBytes": row_bytes,
+        "layout": ["forward", "reverse"],
+        "depth": graph.depths(),
+        "chain": graph.chains(),
+        "topoOrder": [graph.ids[v] for v in graph.topo_order],
+        "cycles": graph.cycles,
+        "inCatalog": [int(c in trees) for c in graph.ids],
+        "inDegree": [int(i in graph.degree) for i in range(n)],
+    }
+    out = Path(out_stem)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out.with_suffix(".bin"), "wb") as f:
+        f.write(np.packbits(forward, axis=1).tobytes())
+        f.write(np.packbits(reverse, axis=1).tobytes())
+    out.with_suffix(".json").write_text(json.dumps(meta, separators=(",", ":")), encoding="utf-8")
+    return meta
+
+
+class PrereqIndex:
+    """Read side: O(1) lookups into a built index."""
+
+    def __init__(self, stem: str):
+        stem_p = Path(stem)
+        self.meta = json.loads(stem_p.with_suffix(".json").read_text(encoding="utf-8"))
+        self.ids: List[str] = self.meta["ids"]
+        self.index = {c: i for i, c in enumerate(self.ids)}
+        n, rb = len(self.ids), self.meta["rowBytes"]
+        bits = np.memmap(stem_p.with_suffix(".bin"), dtype=np.uint8, mode="r", shape=(2, n, rb))
+        self._forward, self._reverse = bits[0], bits[1]
+
+    def _id(self, course: str) -> int:
+        cid = canonical_course_id(course)
+        if cid not in self.index:
+            raise KeyError(course)
+        return self.index[cid]
+
+    def _row(self, bits: np.ndarray, i: int) -> List[str]:
+        row = np.unpackbits(bits[i], count=len(self.ids)).astype(bool)
+        return [self.ids[j] for j in np.flatnonzero(row)]
+
+    def unlocks(self, course: str) -> List[str]:
+        return self._row(self._forward, self._id(course))
+
+    def requires(self, course: str) -> List[str]:
+        return self._row(self._reverse, self._id(course))
+
+    def is_prereq_of(self, course: str, target: str) -> bool:
+        j = self._id(target)
+        return bool(self._forward[self._id(course), j >> 3] & (0x80 >> (j & 7)))
+
+    def depth(self, course: str) -> int:
+        return self.meta["depth"][self._id(course)]
+
+    def chain(self, course: str) -> int:
+        return self.meta["chain"][self._id(course)]
+
+
+# -----------------------------
+# Main
+# -----------------------------
+
+def main(catalog_paths: List[str], degree_path: Optional[str], out_stem: str) -> None:
+    meta = build_index(catalog_paths, degree_path, out_stem)
+    n = len(meta["ids"])
+    size = Path(out_stem).with_suffix(".bin").stat().st_size
+    print(f"Indexed {n} courses ({sum(meta['inDegree'])} on the degree sheet), "
+          f"{len(meta['cycles'])} cycle(s), max depth {max(meta['depth'], default=0)}, "
+          f"max chain {max(meta['chain'], default=0)}")
+    for cycle in meta["cycles"]:
+        print(f"  cycle: {' -> '.join(cycle)}")
+    print(f"Wrote {Path(out_stem).with_suffix('.json')} and {Path(out_stem).with_suffix('.bin')} ({size} bytes)")
+
+
+def query(stem: str, course: str) -> None:
+    idx = PrereqIndex(stem)
+    print(f"{course}: depth {idx.depth(course)} (earliest in semester {idx.depth(course) + 1}), "
+          f"chain {idx.chain(course)}")
+    print(f"  requires: {', '.join(idx.requires(course)) or '-'}")
+    print(f"  unlocks:  {', '.join(idx.unlocks(course)) or '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the prerequisite closure index.")
+    parser.add_argument("catalogs", nargs="*", default=["cs_courses.json"], help="scraped catalog JSON files")
+    parser.add_argument("--degree", default=str(DEFAULT_DEGREE), help="degree template JSON (parse_degree_pdf.py output)")
+    parser.add_argument("--out", default="prereq_index", help="output stem (.json + .bin)")
+    parser.add_argument("--query", default=None, help="print the index entry for a course instead of building")
+    parser.add_argument("--index", default="prereq_index", help="index stem to read with --query")
+    args = parser.parse_args()
+    if args.query:
+        query(args.index, args.query)
+    else:
+        main(args.catalogs, args.degree, args.out)
@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+schedule_planner.py
+
+Plans the remaining semesters of a degree: given the degree template
+(degree.json from parse_degree_pdf.py), the catalog (cs_courses.json) with its
+compiled prereq trees, a student's completed courses and per-semester SHU caps,
+find a feasible plan with the fewest semesters.
+
+Model:
+  - Every `course` item and every `course_or` item (one option to be picked)
+    that isn't already completed is a concrete item. It can go in a semester
+    when the term is one it is typically offered in (Fall/Spring, from
+    cs_courses.json; courses not in the catalog are assumed offered every term)
+    and its prereqs are satisfied by courses completed in earlier semesters.
+  - Prereqs are read strictly: an escape hatch like "or graduate standing" is
+    not an option, and a requirement made only of conditions is satisfied.
+  - Prereqs that aren't on the sheet are pulled in as optional items, so
+    "CS 11 needs CS 10 or ES 2" is planned like everything else.
+  - elective_rule / elective_set slots, course_or items that accept an
+    elective, and the free SHU needed to reach minTotalSHU have no constraints.
+    They are packed into whatever capacity a semester has left: elective slots
+    whole, largest first, then free SHU in any amount.
+
+Search:
+  Iterative deepening on the number of semesters, starting from a lower bound
+  (remaining SHU / cap, longest remaining prereq chain). Each level is a
+  depth-first branch-and-bound over semesters: a semester takes a maximal set
+  of available concrete courses (taking an available course earlier never
+  hurts, the capacity it uses would otherwise go to unconstrained electives),
+  most critical first. States that can't finish in the remaining semesters are
+  memoized by (remaining items, courses done, term, semesters left, electives
+  left). Each level has a node budget; if one runs out the next level is
+  tried and the plan is reported as not proven optimal.
+
+USAGE:
+  python3 schedule_planner.py [--catalog cs_courses.json] [--degree ../../data/degree.json]
+                              [--completed "CS 11,MATH 32"] [--max-shu 18] [--start Fall]
+  python3 schedule_planner.py --bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from eligibility import canonical_course_id
+from prereq_compiler import catalog_key_to_id, compile_catalog, tree_course_ids
+from prereq_index import DEFAULT_DEGREE, template_course_ids
+
+
+TERMS = ("Fall", "Spring")
+DEFAULT_SHU = 3
+FREE_ELECTIVE = "Free Elective"
+
+
+# -----------------------------
+# Model
+# -----------------------------
+
+@dataclass(frozen=True)
+class Option:
+    course: str                     # as written on the sheet, "CS/MATH 61"
+    ids: Tuple[str, ...]            # database ids it satisfies, ("CS0061", "MATH0061")
+    shu: int
+    terms: FrozenSet[str]
+    tree: Optional[str] = None      # JSON of the prereq root (hashable), None = no prereqs
+
+
+@lru_cache(maxsize=None)
+def _tree_course_ids(tree: str) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(tree_course_ids(json.loads(tree))))
+
+
+def option_course_ids(o: Option) -> Tuple[str, ...]:
+    """Distinct course ids in the option's prereq tree, in preorder (parsed once per tree)."""
+    return _tree_course_ids(o.tree) if o.tree else ()
+
+
+@dataclass
+class Slot:
+    label: str
+    shu: int
+
+
+@dataclass
+class Item:
+    label: str
+    group: str
+    options: List[Option]
+    # Optional items are prereqs that aren't on the sheet (CS 11 needs CS 10 or ES 2);
+    # they are only taken when something still on the plan refers to them
+    required: bool = True
+    # Taking this optional item fills that elective slot ("ES 2 OR ENG-CS Elective")
+    replaces: Optional[Slot] = None
+
+
+@dataclass
+class Problem:
+    items: List[Item]
+    slots: List[Slot]
+    completed: FrozenSet[str]
+    free_shu: int = 0                                          # SHU still needed to reach minTotalSHU
+    plannable: Dict[str, int] = field(default_factory=dict)   # course id -> item index
+
+
+def parse_terms(offered: str) -> FrozenSet[str]:
+    """"Fall Term" -> {Fall}; "Various Terms", "All Terms", "" -> both."""
+    found = frozenset(t for t in TERMS if t.lower() in (offered or "").lower())
+    return found or frozenset(TERMS)
+
+
+def parse_units(units: str) -> Optional[int]:
+    """"3.00" -> 3, "2.00 - 3.00" -> 3 (upper end); None for "0.00" / unknown."""
+    nums = [float(x) for x in re.findall(r"\d+(?:\.\d+)?", units or "")]
+    return int(max(nums)) if nums and max(nums) > 0 else None
+
+
+def load_problem(template: Dict[str, Any], catalogs: Sequence[Dict[str, Any]],
+                 completed: Iterable[str]) -> Problem:
+    catalog: Dict[str, Dict[str, Any]] = {}
+    for cat in catalogs:
+        for key, rec in cat.items():
+            cid = catalog_key_to_id(key)
+            if cid and isinstance(rec, dict):
+                catalog[cid] = rec
+    trees = {cid: entry["root"] for cid, entry in compile_catalog(catalogs)["courses"].items()}
+    done = frozenset(c for c in (canonical_course_id(x) for x in completed) if c)
+
+    def option(course: str, shu: Optional[int] = None) -> Option:
+        ids = tuple(template_course_ids(course))
+        rec = next((catalog[i] for i in ids if i in catalog), {})
+        tree = next((trees[i] for i in ids if i in trees), None)
+        return Option(
+            course=course,
+            ids=ids,
+            shu=shu or parse_units(rec.get("units", "")) or DEFAULT_SHU,
+            terms=parse_terms(rec.get("typically_offered", "")) if rec else frozenset(TERMS),
+            tree=json.dumps(tree, sort_keys=True) if tree else None,
+        )
+
+    items: List[Item] = []
+    slots: List[Slot] = []
+    # course id -> optional item for sheet courses that an elective can stand in for
+    standins: Dict[str, Item] = {}
+    for group in template.get("groups", []):
+        gid = group.get("groupId", "")
+        for entry in group.get("items", []):
+            kind, data = entry.get("type"), entry.get("data", {})
+            if kind == "course":
+                items.append(Item(data["course"], gid, [option(data["course"], data.get("shu"))]))
+            elif kind == "course_or":
+                courses = [o for o in data.get("options", []) if o.get("course")]
+                electives = [o for o in data.get("options", []) if not o.get("course")]
+                opts = [option(o["course"], o.get("shu")) for o in courses]
+                if any(set(o.ids) & done for o in opts):
+                    items.append(Item(data["label"], gid, opts))
+                elif electives:
+                    # "ES 2 OR an elective": an unconstrained elective always works
+                    slot = Slot(data["label"], electives[0].get("minSHU") or DEFAULT_SHU)
+                    slots.append(slot)
+                    for o in opts:
+                        standin = Item(o.course, gid, [o], required=False, replaces=slot)
+                        for cid in o.ids:
+                            standins[cid] = standin
+                else:
+                    items.append(Item(data["label"], gid, opts))
+            elif kind in ("elective_rule", "elective_set"):
+                count = data.get("count")
+                if count:
+                    slots.extend(Slot(data["label"], data.get("eachMinSHU") or DEFAULT_SHU) for _ in range(count))
+                else:
+                    slots.append(Slot(data["label"], data.get("minSHU") or DEFAULT_SHU))
+
+    # Completed requirements drop out; everything else completed counts toward free electives
+    remaining = [it for it in items if not any(set(o.ids) & done for o in it.options)]
+    used = {i for it in items for o in it.options if set(o.ids) & done for i in o.ids}
+    completed_shu = sum(
+        next((o.shu for it in items for o in it.options if cid in o.ids), None)
+        or parse_units(catalog.get(cid, {}).get("units", "")) or DEFAULT_SHU
+        for cid in done if cid not in used
+    ) + sum(o.shu for it in items for o in it.options if set(o.ids) & done)
+
+    planned_shu = sum(min(o.shu for o in it.options) for it in remaining) + sum(s.shu for s in slots)
+    free = max(0, int(template.get("minTotalSHU", 0)) - completed_shu - planned_shu)
+
+    problem = Problem(items=remaining, slots=slots, completed=done, free_shu=free)
+    queue = list(remaining)
+    while queue:
+        it = queue.pop(0)
+        idx = problem.items.index(it)
+        for o in it.options:
+            for cid in o.ids:
+                problem.plannable[cid] = idx
+        for o in it.options:
+            for cid in option_course_ids(o):
+                if cid in done or cid in problem.plannable or any(cid in x.options[0].ids for x in queue):
+                    continue
+                extra = standins.get(cid)
+                if extra is None:
+                    name = display_course(cid)
+                    extra = Item(name, "prereq", [option(name)], required=False)
+                problem.items.append(extra)
+                queue.append(extra)
+    return problem
+
+
+def display_course(cid: str) -> str:
+    """"CS0010" -> "CS 10" (the way the degree sheet writes courses)."""
+    m = re.match(r"^([A-Z]+)0*(\d+[A-Z]?)$", cid)
+    return f"{m.group(1)} {m.group(2)}" if m else cid
+
+
+# -----------------------------
+# Prereq checks
+# -----------------------------
+
+def strict_eval(node: Dict[str, Any], done: FrozenSet[str]) -> Optional[bool]:
+    """True/False for the course part of a tree; None when it only holds conditions."""
+    t = node.get("type")
+    if t == "COURSE":
+        return node.get("courseId") in done if node.get("courseId") else None
+    if t == "CONDITION":
+        return None
+    values = [v for v in (strict_eval(c, done) for c in node.get("children", [])) if v is not None]
+    if not values:
+        return None
+    if t == "AND":
+        return all(values)
+    if t == "OR":
+        return any(values)
+    if t == "MIN_K":
+        return sum(values) >= min(node.get("k") or 1, len(values))
+    return None
+
+
+# -----------------------------
+# Search
+# -----------------------------
+
+# One planned semester: (item, option) pairs, elective slot sizes, free SHU
+Semester = Tuple[List[Tuple[int, Option]], List[int], int]
+
+
+class OutOfBudget(Exception):
+    pass
+
+
+class Planner:
+    def __init__(self, problem: Problem, caps: Sequence[int], start: str = "Fall", max_semesters: int = 12,
+                 node_budget: int = 20000):
+        self.p = problem
+        self.caps = list(caps) or [18]
+        self.start = TERMS.index(start)
+        self.max_semesters = max_semesters
+        self._trees: Dict[str, Dict[str, Any]] = {}
+        self._ok_cache: Dict[Tuple[str, FrozenSet[str]], bool] = {}
+        self._failed: Set[Tuple[int, FrozenSet[str], int, int, Tuple[int, ...]]] = set()
+        self.nodes = 0
+        self.node_budget = node_budget
+        self.optimal = True
+        self.slot_shu = sum(s.shu for s in problem.slots) + problem.free_shu
+        self.required = sum(1 << i for i, it in enumerate(problem.items) if it.required)
+        # item -> items whose prereqs mention it
+        self.used_by: List[int] = [0] * len(problem.items)
+        for j, it in enumerate(problem.items):
+            for o in it.options:
+                for cid in option_course_ids(o):
+                    i = problem.plannable.get(cid)
+                    if i is not None and i != j:
+                        self.used_by[i] |= 1 << j
+
+    def cap(self, semester: int) -> int:
+        return self.caps[min(semester, len(self.caps) - 1)]
+
+    def term(self, semester: int) -> str:
+        return TERMS[(self.start + semester) % 2]
+
+    def prereqs_ok(self, opt: Option, done: FrozenSet[str]) -> bool:
+        if opt.tree is None:
+            return True
+        key = (opt.tree, done)
+        hit = self._ok_cache.get(key)
+        if hit is None:
+            tree = self._trees.setdefault(opt.tree, json.loads(opt.tree))
+            hit = self._ok_cache[key] = strict_eval(tree, done) is not False
+        return hit
+
+    # -- bounds --
+
+    def chain_need(self, mask: int, done: FrozenSet[str]) -> int:
+        """Longest chain of remaining required items, in semesters (each item counts 1)."""
+        memo: Dict[int, int] = {}
+
+        def need(idx: int, stack: FrozenSet[int]) -> int:
+            if idx in memo:
+                return memo[idx]
+            best = math.inf
+            for o in self.p.items[idx].options:
+                tree = self._trees.setdefault(o.tree, json.loads(o.tree)) if o.tree else None
+                best = min(best, 1 + (self._tree_need(tree, done, mask, stack | {idx}, need) if tree else 0))
+            memo[idx] = best
+            return best
+
+        todo = mask & self.required
+        return max((need(i, frozenset()) for i in range(len(self.p.items)) if todo >> i & 1), default=0)
+
+    def _tree_need(self, node, done, mask, stack, need) -> float:
+        t = node.get("type")
+        if t == "COURSE":
+            cid = node.get("courseId")
+            if cid in done:
+                return 0
+            idx = self.p.plannable.get(cid)
+            if idx is None or not mask >> idx & 1 or idx in stack:
+                return math.inf
+            return need(idx, stack)
+        if t == "CONDITION":
+            return -1
+        values = [v for v in (self._tree_need(c, done, mask, stack, need) for c in node.get("children", [])) if v != -1]
+        if not values:
+            return 0
+        if t == "AND":
+            return max(values)
+        if t == "OR":
+            return min(values)
+        values.sort()
+        return values[min(node.get("k") or 1, len(values)) - 1]
+
+    def remaining_shu(self, mask: int) -> int:
+        todo = mask & self.required
+        return sum(min(o.shu for o in self.p.items[i].options) for i in range(len(self.p.items)) if todo >> i & 1)
+
+    # -- semesters --
+
+    def still_needed(self, i: int, mask: int, done: FrozenSet[str]) -> bool:
+        """An optional item is worth taking while something that refers to it isn't unlocked yet."""
+        users = self.used_by[i] & mask
+        j = 0
+        while users:
+            if users & 1 and not any(self.prereqs_ok(o, done) for o in self.p.items[j].options):
+                return True
+            users >>= 1
+            j += 1
+        return False
+
+    def semester_choices(self, mask: int, done: FrozenSet[str], semester: int) -> Iterator[List[Tuple[int, Option]]]:
+        """Maximal sets of (item, option) that fit this semester, most promising first (lazily)."""
+        term, cap = self.term(semester), self.cap(semester)
+        avail: List[Tuple[int, List[Option]]] = []
+        for i in range(len(self.p.items)):
+            # Optional items only while something left on the plan still refers to them
+            if mask >> i & 1 and (self.p.items[i].required or self.still_needed(i, mask, done)):
+                opts = [o for o in self.p.items[i].options if term in o.terms and self.prereqs_ok(o, done)]
+                if opts:
+                    avail.append((i, opts))
+        # Items that unlock the most of the remaining plan go first
+        # (and a prereq that also fills an elective slot beats one that doesn't)
+        avail.sort(key=lambda a: (-self._unlock_weight[a[0]], self.p.items[a[0]].replaces is None, a[0]))
+
+        def rec(k: int, used: int, picked: List[Tuple[int, Option]]) -> Iterator[List[Tuple[int, Option]]]:
+            if k == len(avail):
+                # Maximal: no skipped required item would still fit
+                picked_items = {i for i, _ in picked}
+                if all(i in picked_items or not self.p.items[i].required
+                       or used + min(o.shu for o in opts) > cap for i, opts in avail):
+                    yield list(picked)
+                return
+            i, opts = avail[k]
+            if not self.p.items[i].required:
+                # An alternative picked earlier this semester may already cover it
+                taken = done.union(cid for _, o in picked for cid in o.ids)
+                if not self.still_needed(i, mask, frozenset(taken)):
+                    yield from rec(k + 1, used, picked)
+                    return
+            for o in opts:
+                if used + o.shu <= cap:
+                    picked.append((i, o))
+                    yield from rec(k + 1, used + o.shu, picked)
+                    picked.pop()
+            yield from rec(k + 1, used, picked)
+
+        return rec(0, 0, [])
+
+    def solve(self) -> Optional[List[Semester]]:
+        """[(picked (item, option) pairs, elective slot sizes, free SHU), ...] per semester, or None."""
+        full = (1 << len(self.p.items)) - 1
+        self._trees.clear()
+        self._unlock_weight = self._weights()
+        self.sizes = sorted({s.shu for s in self.p.slots}, reverse=True)
+        # Elective slot counts by size, then free SHU
+        flex = tuple(sum(1 for s in self.p.slots if s.shu == z) for z in self.sizes) + (self.p.free_shu,)
+        lower = self.lower_bound(full, self.p.completed, 0)
+        for n in range(max(lower, 1), self.max_semesters + 1):
+            self._level_end = self.nodes + self.node_budget
+            try:
+                plan = self._search(full, self.p.completed, 0, n, flex)
+            except OutOfBudget:
+                self.optimal = False
+                continue
+            if plan is not None:
+                return plan
+        return None
+
+    def lower_bound(self, mask: int, done: FrozenSet[str], semester: int) -> int:
+        need = self.chain_need(mask, done)
+        if need == math.inf:
+            return self.max_semesters + 1
+        total = self.remaining_shu(mask) + self.slot_shu
+        n = 0
+        while total > 0 and n <= self.max_semesters:
+            total -= self.cap(semester + n)
+            n += 1
+        return max(int(need), n)
+
+    def _fits(self, mask: int, done: FrozenSet[str], semester: int, left: int, flex_shu: int) -> bool:
+        need = self.chain_need(mask, done)
+        if need > left:
+            return False
+        capacity = sum(self.cap(semester + k) for k in range(left))
+        return self.remaining_shu(mask) + flex_shu <= capacity
+
+    def fill(self, flex: Tuple[int, ...], room: int) -> Tuple[Tuple[int, ...], List[int], int]:
+        """Pack elective slots into `room` SHU, largest first, then top up with free SHU."""
+        counts = list(flex)
+        taken: List[int] = []
+        for k, size in enumerate(self.sizes):
+            while counts[k] and size <= room:
+                counts[k] -= 1
+                room -= size
+                taken.append(size)
+        free = min(counts[-1], room)
+        counts[-1] -= free
+        return tuple(counts), taken, free
+
+    def use_slot(self, flex: Tuple[int, ...], slot: Optional[Slot]) -> Tuple[int, ...]:
+        if slot is None:
+            return flex
+        k = self.sizes.index(slot.shu)
+        if not flex[k]:
+            return flex
+        return flex[:k] + (flex[k] - 1,) + flex[k + 1:]
+
+    def _search(self, mask: int, done: FrozenSet[str], semester: int, left: int,
+                flex: Tuple[int, ...]) -> Optional[List[Semester]]:
+        self.nodes += 1
+        if self.nodes > self._level_end:
+            raise OutOfBudget()
+        if mask & self.required == 0 and not any(flex):
+            return []
+        if left == 0:
+            return None
+        key = (mask, done, semester % 2, left, flex)
+        flex_shu = sum(n * z for n, z in zip(flex, self.sizes)) + flex[-1]
+        if key in self._failed or not self._fits(mask, done, semester, left, flex_shu):
+            self._failed.add(key)
+            return None
+        cap = self.cap(semester)
+        for picked in self.semester_choices(mask, done, semester):
+            used = sum(o.shu for _, o in picked)
+            new_mask = mask
+            new_done = set(done)
+            new_flex = flex
+            for i, o in picked:
+                new_mask &= ~(1 << i)
+                new_done.update(o.ids)
+                new_flex = self.use_slot(new_flex, self.p.items[i].replaces)
+            new_flex, taken, free = self.fill(new_flex, cap - used)
+            rest = self._search(new_mask, frozenset(new_done), semester + 1, left - 1, new_flex)
+            if rest is not None:
+                return [(picked, taken, free)] + rest
+        self._failed.add(key)
+        return None
+
+    def _weights(self) -> List[int]:
+        """How many remaining items mention each item's courses in their prereqs."""
+        weights = [0] * len(self.p.items)
+        for it in self.p.items:
+            for o in it.options:
+                for cid in option_course_ids(o):
+                    idx = self.p.plannable.get(cid)
+                    if idx is not None:
+                        weights[idx] += 1
+        return weights
+
+
+def plan_to_json(planner: Planner, plan: List[Semester]) -> Dict[str, Any]:
+    # Hand out elective labels in template order, by slot size
+    by_size: Dict[int, List[str]] = {}
+    for s in planner.p.slots:
+        by_size.setdefault(s.shu, []).append(s.label)
+    for picked, _, _ in plan:
+        for i, _ in picked:
+            slot = planner.p.items[i].replaces
+            if slot is not None and slot.label in by_size.get(slot.shu, []):
+                by_size[slot.shu].remove(slot.label)
+    semesters = []
+    for n, (picked, taken, free) in enumerate(plan):
+        courses = [{"course": o.course, "label": planner.p.items[i].label, "shu": o.shu} for i, o in picked]
+        electives = [{"label": by_size[z].pop(0), "shu": z} for z in taken]
+        if free:
+            electives.append({"label": FREE_ELECTIVE, "shu": free})
+        semesters.append({
+            "term": planner.term(n),
+            "courses": courses,
+            "electives": electives,
+            "totalSHU": sum(c["shu"] for c in courses) + sum(e["shu"] for e in electives),
+        })
+    return {"semesters": len(semesters), "optimal": planner.optimal, "plan": semesters}
+
+
+# -----------------------------
+# Main
+# -----------------------------
+
+def plan_student(template: Dict[str, Any], catalogs: Sequence[Dict[str, Any]], completed: Iterable[str],
+                 caps: Sequence[int], start: str = "Fall") -> Optional[Dict[str, Any]]:
+    planner = Planner(load_problem(template, catalogs, completed), caps, start)
+    plan = planner.solve()
+    return plan_to_json(planner, plan) if plan is not None else None
+
+
+def bench(template: Dict[str, Any], catalogs: Sequence[Dict[str, Any]], caps: Sequence[int], repeat: int) -> None:
+    students = {
+        "fresh": [],
+        "first year done": ["CS 11", "MATH 32", "MATH 34", "EN 1", "ENG 1"],
+        "sophomore": ["CS 11", "CS 15", "MATH 32", "MATH 34", "MATH 42", "CS 61", "EN 1", "ENG 1", "ES 2"],
+        "junior": ["CS 11", "CS 15", "CS 40", "MATH 32", "MATH 34", "MATH 42", "MATH 61", "MATH 70",
+                   "EN 1", "ENG 1", "EM 52", "CS 105"],
+    }
+    for name, completed in students.items():
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            planner = Planner(load_problem(template, catalogs, completed), caps)
+            plan = planner.solve()
+            times.append((time.perf_counter() - t0) * 1000)
+        verdict = "ok" if max(times) < 200 else "SLOW"
+        semesters = len(plan) if plan is not None else None
+        print(f"{name:16} semesters={semesters} optimal={planner.optimal} search nodes={planner.nodes:5} "
+              f"median={statistics.median(times):7.1f} ms  max={max(times):7.1f} ms  {verdict}")
+
+
+def parse_caps(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fewest-semester plan for the rest of a degree.")
+    parser.add_argument("--catalog", nargs="+", default=["cs_courses.json"], help="scraped catalog JSON files")
+    parser.add_argument("--degree", default=str(DEFAULT_DEGREE), help="degree template JSON")
+    parser.add_argument("--completed", default="", help='comma-separated completed courses, e.g. "CS 11,MATH 32"')
+    parser.add_argument("--max-shu", default="18", help="SHU cap per semester; a comma list gives one per semester")
+    parser.add_argument("--start", choices=TERMS, default="Fall", help="term of the first planned semester")
+    parser.add_argument("--bench", action="store_true", help="time planning for a few sample transcripts")
+    parser.add_argument("--repeat", type=int, default=5, help="benchmark repetitions")
+    args = parser.parse_args()
+
+    template = json.loads(Path(args.degree).read_text(encoding="utf-8"))
+    catalogs = [json.loads(Path(p).read_text(encoding="utf-8")) for p in args.catalog]
+    caps = parse_caps(args.max_shu)
+    if args.bench:
+        bench(template, catalogs, caps, args.repeat)
+    else:
+        completed = [c for c in args.completed.split(",") if c.strip()]
+        result = plan_student(template, catalogs, completed, caps, args.start)
+        if result is None:
+            print("No feasible plan within 12 semesters")
+            raise SystemExit(1)
+        print(json.dumps(result, indent=2))
@@ -1,194 +1,712 @@
+import argparse
 import asyncio
 import re
 import json
-from playwright.async_api import async_playwright
+import time
+from pathlib import Path
+from playwright.async_api import async_playwright, Error as PlaywrightError
+
+import sis_replay
+import catalog_store
+import catalog_columns
+import course_search
+import course_registry
+import crawl_metrics
+from catalog_store import Checkpoint, checkpoint_path, export_path
+from sis_replay import DETAIL_FIELDS
 
 URL = "https://sis.it.tufts.edu/psp/paprd/EMPLOYEE/HRMS/c/COMMUNITY_ACCESS.SSS_BROWSE_CATLG.GBL?pslnkid=TFP_COURSE_CATALOG"
 
-async def main():
-    def parse_course(course_id):
-        # Example course_id: "CS 001 - Introduction to Computer Science"
-        parts = course_id.split(" - ")
-        if len(parts) != 2:
-            return course_id, "", ""  # fallback if format is unexpected
-        subject_num, title = parts
-        subject_parts = subject_num.split()
-        if len(subject_parts) < 2:
-            return course_id, "", ""  # fallback if format is unexpected
-        subject = subject_parts[0]
-        num = " ".join(subject_parts[1:])
-        return f"{subject} {num}", subject, title
-    
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-
-        context = await browser.new_context(
-            # Helps with some sites that behave differently for automation
-            user_agent=(
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/122.0.0.0 Safari/537.36"
-            ),
-            viewport={"width": 1400, "height": 900},
-            locale="en-US",
-        )
+MODAL_IFRAME = 'iframe[name^="ptModFrame_"]'
+# Subject group headers under an alpha letter are DERIVED_SSS_BCC_GROUP_BOX_1$147$$<n>,
+# and the course list they expand is COURSE_LIST$scroll$<n>
+GROUP_BOX_PREFIX = "DERIVED_SSS_BCC_GROUP_BOX_1$147$$"
+GROUP_TITLE_RE = re.compile(r"^\s*([A-Z][A-Z0-9]*)\s+-\s")
+
+# -----------------------------
+# Crawl profiles
+# -----------------------------
+# lean: headless, heavy resources aborted, every Nth SIS response logged and each
+#       worker page replaced every N courses (the modal iframes PeopleSoft leaves
+#       behind otherwise pile up for the whole crawl). Between subjects the browser
+#       context is replaced too, carrying the session over via storage_state.
+# full: the old behaviour, a visible window that loads and logs everything.
+# Stylesheets are never blocked: the readiness waits read computed styles.
+CRAWL_PROFILES = {
+    "lean": {"headless": True, "block": True, "log_every": 20, "recycle_every": 40},
+    "full": {"headless": False, "block": False, "log_every": 1, "recycle_every": 0},
+}
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_URL_RE = re.compile(
+    r"google-analytics\.com|googletagmanager\.com|doubleclick\.net|hotjar\.com|"
+    r"nr-data\.net|newrelic\.com|siteimprove|segment\.(?:io|com)",
+    re.I,
+)
+
+# -----------------------------
+# Readiness waits
+# -----------------------------
+# Each step waits on something concrete (an element, the modal iframe count,
+# PeopleSoft's processing spinner) instead of sleeping. The fallback bound is
+# the fixed sleep the step used to take, so a missing signal is never slower
+# than before.
+
+# PeopleSoft shows WAIT_win0 (page) / processing (modal) while an ICAction is in flight
+SPINNER_GONE_JS = """() => {
+    const w = document.getElementById('WAIT_win0') || document.getElementById('processing');
+    if (!w) return true;
+    const s = window.getComputedStyle(w);
+    return s.display === 'none' || s.visibility === 'hidden';
+}"""
+
+MODAL_COUNT_ABOVE_JS = "n => document.querySelectorAll('iframe[name^=\"ptModFrame_\"]').length > n"
+MODAL_COUNT_AT_MOST_JS = "n => document.querySelectorAll('iframe[name^=\"ptModFrame_\"]').length <= n"
+
+# Modal is usable once it shows either the course id or the campus chooser
+MODAL_READY_JS = """() => {
+    const el = document.getElementById('DERIVED_CRSECAT_DESCR200');
+    if (el && el.innerText.trim()) return true;
+    return [...document.querySelectorAll('a')].some(a => /Medford|Somerville/i.test(a.innerText));
+}"""
+
+COURSE_ID_READY_JS = """() => {
+    const el = document.getElementById('DERIVED_CRSECAT_DESCR200');
+    return !!(el && el.innerText.trim());
+}"""
+
+DETAIL_GONE_JS = "() => !document.getElementById('DERIVED_CRSECAT_DESCR200')"
+
+# step name -> list of observed wait times (ms)
+wait_stats = {}
+# Per-phase timing spans for the run report (see crawl_metrics.py)
+metrics = crawl_metrics.CrawlMetrics()
+
+
+async def wait_until(step, signal, fallback_ms):
+    """
+    Await a readiness signal for one step. `signal` is called with the timeout
+    in ms and must raise a Playwright error if it gives up. Returns True if the
+    signal fired, False if we fell through on the bound.
+    """
+    start = time.perf_counter()
+    try:
+        await signal(fallback_ms)
+        fired = True
+    except PlaywrightError:
+        fired = False
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    wait_stats.setdefault(step, []).append(elapsed_ms)
+    if not fired:
+        # Timings go to wait_stats and the metrics spans; only a fallback is worth a line
+        metrics.fallback(f"timeout:{step}")
+        print(f"[wait] {step}: {elapsed_ms:.0f} ms (fallback timeout)")
+    return fired
+
+
+def print_wait_summary():
+    print("Readiness waits (ms):")
+    for step, times in wait_stats.items():
+        print(f"  {step:<16} n={len(times):<4} mean={sum(times) / len(times):7.0f} max={max(times):7.0f}")
+
+
+async def ajax_settled(frame, selector, timeout):
+    """Wait for selector to be attached and the processing spinner to be gone."""
+    await frame.wait_for_selector(selector, state="attached", timeout=timeout)
+    await frame.wait_for_function(SPINNER_GONE_JS, timeout=timeout)
+
+
+async def catalog_ready(page, timeout):
+    iframe = await page.wait_for_selector('iframe[name="TargetContent"]', state="attached", timeout=timeout)
+    frame = await iframe.content_frame()
+    if frame is None:
+        # Attached but its document isn't there yet; a Playwright error lets wait_until fall through
+        raise PlaywrightError("TargetContent iframe has no content frame yet")
+    await ajax_settled(frame, "#DERIVED_SSS_BCC_SSR_ALPHANUM_C", timeout)
+
+
+async def detail_closed(frame, timeout):
+    """Modal left the detail view, either by navigating or by being torn down."""
+    try:
+        await frame.wait_for_function(DETAIL_GONE_JS, timeout=timeout)
+    except PlaywrightError:
+        if not frame.is_detached():
+            raise
+
+
+async def latest_modal_frame(page):
+    handles = await page.query_selector_all(MODAL_IFRAME)
+    if not handles:
+        return None
+    return await handles[-1].content_frame()
+
+
+def parse_course(course_id):
+    # Example course_id: "CS 001 - Introduction to Computer Science"
+    parts = course_id.split(" - ")
+    if len(parts) != 2:
+        return course_id, "", ""  # fallback if format is unexpected
+    subject_num, title = parts
+    subject_parts = subject_num.split()
+    if len(subject_parts) < 2:
+        return course_id, "", ""  # fallback if format is unexpected
+    subject = subject_parts[0]
+    num = " ".join(subject_parts[1:])
+    return f"{subject} {num}", subject, title
+
 
-        page = await context.new_page()
+def build_record(course_id, fields):
+    """Turn the detail page fields into (id, record) for the courses dict."""
+    id, subject, title = parse_course(course_id)
+    return id, {
+        'subject': subject,
+        'title': title,
+        'units': fields['units'],
+        'typically_offered': fields['typically_offered'],
+        'requirements': fields['requirements'],
+        'attributes': fields['attributes'],
+        'description': fields['description'],
+        'grading_basis': fields['grading_basis']
+    }
 
-        # Optional: print where it ends up after redirects
-        page.on("response", lambda r: print("RESP", r.status, r.url) if r.url.startswith("https://sis.it.tufts.edu") else None)
 
+async def safe_text(locator):
+    """Get inner_text if element exists, else empty string."""
+    if await locator.count() > 0:
+        return (await locator.inner_text()).strip()
+    return ""
+
+
+async def open_catalog_letter(page, letter):
+    """Navigate to the catalog and open one alpha letter. Returns the TargetContent frame."""
+    with metrics.span("navigate", subject=letter.upper()):
         await page.goto(URL, wait_until="domcontentloaded", timeout=60000)
 
         # PeopleSoft pages often keep loading XHRs; networkidle can be too strict,
-        # so do a short extra wait as well.
-        await page.wait_for_timeout(3000)
+        # so wait for the alpha bar inside TargetContent instead.
+        await wait_until("catalog_load", lambda t: catalog_ready(page, t), 3000)
 
         print("Final URL:", page.url)
         print("Title:", await page.title())
 
-        # click on c
         frame = page.frame(name="TargetContent")
-        await frame.locator("#DERIVED_SSS_BCC_SSR_ALPHANUM_C").click()
-        # await page.wait_for_timeout(3000)
-        await page.wait_for_timeout(5000)
-
-        # click on CS - computer science dropdown
-        await frame.locator(
-            '[id="DERIVED_SSS_BCC_GROUP_BOX_1$147$$21"]'
-        ).click()
-        await page.wait_for_timeout(5000)
-        
-        # locate container table
-        cs_table = frame.locator("#COURSE_LIST\\$scroll\\$21")
-        second_row = cs_table.locator("tr").nth(1)
-        cell = second_row.locator("td").nth(0)
-        inner_table = cell.locator("table")
-        rows = inner_table.locator("tbody tr")
-        count = await rows.count() # count rows
-        print("Number of courses:", count)
-
-        # Create hash table for courses:
-        courses = {
-            'subject': '',
-            'title': '',
-            'units': '',
-            'typically_offered': '',
-            'requirements': '',
-            'attributes': '',
-            'description': '',
-            'grading_basis': ''
-        }
-
-        # Iterate through rows and click on each course 
-        for i in range(1, count):  # skip header row, process all courses
-            nested = False
-            course_row = rows.nth(i)
-            course_link = course_row.locator("td").nth(0).locator("a")
-            course_num= await course_link.inner_text()
-            print(f"Clicking on course: {course_num}")
-            await course_link.click()
-            await page.wait_for_timeout(3000)  # wait for details to load
-
-            # Wait for modal frame to appear
-            await page.wait_for_selector('[name^="ptModFrame_"]', timeout=15000)
-            await page.wait_for_timeout(2000)  # extra wait for modal content to load
-
-            # Extract frame - use last one (most recent modal) when multiple modals exist
-            inner_frame = page.frame_locator('iframe[name^="ptModFrame_"] >> nth=-1')
-
-            # Check if course ID is already visible (single session) or need to click a campus link
-            course_id_locator = inner_frame.locator("#DERIVED_CRSECAT_DESCR200")
-            if await course_id_locator.count() > 0:
-                course_id_text = (await course_id_locator.inner_text()).strip()
-                if course_id_text:
-                    # directly assign course Id
-                    course_id = course_id_text
-                else:
-                    nested = True
-                    # need to click session - try flexible link match
-                    campus_link = inner_frame.get_by_role("link").filter(has_text=re.compile(r"Medford|Somerville", re.I)).first
-                    await campus_link.click(timeout=15000)
-                    await page.wait_for_timeout(3000)
-                    course_id = await inner_frame.locator("#DERIVED_CRSECAT_DESCR200").inner_text()
-            else:
-                nested = True
-                # click on session to get course id - try flexible link match
-                campus_link = inner_frame.get_by_role("link").filter(has_text=re.compile(r"Medford|Somerville", re.I)).first
-                await campus_link.click(timeout=15000)
-                await page.wait_for_timeout(3000)
-                course_id = await inner_frame.locator("#DERIVED_CRSECAT_DESCR200").inner_text()
-
-            id, subject, title = parse_course(course_id)
-            print(f"Course ID: {course_id}")
-
-            async def safe_text(locator):
-                """Get inner_text if element exists, else empty string."""
-                if await locator.count() > 0:
-                    return (await locator.inner_text()).strip()
-                return ""
-
-            # extract fields (some may be missing for certain courses)
-            units = await safe_text(inner_frame.locator("#DERIVED_CRSECAT_UNITS_RANGE\\$0"))
-            typically_offered = await safe_text(inner_frame.locator("#DERIVED_CRSECAT_SSR_TYP_OFFERED\\$0"))
-            requirements = await safe_text(inner_frame.locator("#DERIVED_CRSECAT_DESCR254A\\$0"))
-            attributes = await safe_text(inner_frame.locator("#DERIVED_CRSECAT_SSR_CRSE_ATTR_LONG\\$0"))
-            grading_basis = await safe_text(inner_frame.locator("#SSR_CRSE_OFF_VW_GRADING_BASIS\\$0"))
-            description = await safe_text(inner_frame.locator("#SSR_CRSE_OFF_VW_DESCRLONG\\$0"))
-
-            print(f"Units: {units}")
-            print(f"Typically Offered: {typically_offered}")
-            print(f"Requirements: {requirements}")
-            # print(f"Attributes: {attribute}")
-            print(f"Grading Basis: {grading_basis}")
-            print(f"Description: {description}")
-
-            # attributes = attribute.split(", ") if attribute else []
-            # await page.screenshot(path=f"sis_catalog_{course_num}.png", full_page=True)
-
-            courses[id] = {
-                'subject': subject,
-                'title': title,
-                'units': units,
-                'typically_offered': typically_offered,
-                'requirements': requirements,
-                'attributes': attributes,
-                'description': description,
-                'grading_basis': grading_basis
-            }
-
-            # close details and go back to course list
-            # Multi-offering: "Return to Select Course Offering" -> offering list, then "Return to Browse Catalog" -> catalog
-            # Single offering: "Return to Browse Catalog" (or similar) -> catalog
-            back_pattern = re.compile(
-                r"return to select course offering|return to .* catalog|browse catalog|course catalog|Medford|Somerville",
-                re.I
-            )
-            try:
-                # First click: from course detail to offering list (multi) or to catalog (single)
-                back_link = inner_frame.get_by_role("link").filter(has_text=back_pattern).first
-                await back_link.click(timeout=15000)
-                await page.wait_for_timeout(1500)
-                # Second click: from offering list to catalog (only needed for multi-offering)
+        await frame.locator(f"#DERIVED_SSS_BCC_SSR_ALPHANUM_{letter.upper()}").click()
+        group_boxes = f'[id^="{GROUP_BOX_PREFIX}"]'
+        await wait_until("alpha_click", lambda t: ajax_settled(frame, group_boxes, t), 5000)
+    return frame
+
+
+async def list_subjects(page, letter):
+    """Subject codes listed under an alpha letter, e.g. "M" -> ["MATH", "ME", ...]."""
+    frame = await open_catalog_letter(page, letter)
+    titles = await frame.locator(f'[id^="{GROUP_BOX_PREFIX}"]').all_inner_texts()
+    subjects = []
+    for title in titles:
+        m = GROUP_TITLE_RE.match(title)
+        if m and m.group(1) not in subjects:
+            subjects.append(m.group(1))
+    return subjects
+
+
+async def open_course_list(page, subject="CS"):
+    """
+    Navigate a fresh page to one subject's course list and return the row locator.
+    Every worker page has its own PeopleSoft component state, so each one
+    has to walk the alpha -> group navigation itself.
+    """
+    frame = await open_catalog_letter(page, subject[0])
+
+    # click on the subject dropdown, e.g. "CS - Computer Science"
+    group = frame.locator(f'[id^="{GROUP_BOX_PREFIX}"]').filter(
+        has_text=re.compile(rf"(?:^|\s){re.escape(subject)}\s+-\s", re.I)
+    ).first
+    with metrics.span("expand_group", subject=subject):
+        group_n = (await group.get_attribute("id")).rsplit("$", 1)[1]
+        course_list = f'[id="COURSE_LIST$scroll${group_n}"]'
+        await group.click()
+        await wait_until("group_expand", lambda t: ajax_settled(frame, course_list, t), 5000)
+
+    # locate container table
+    subject_table = frame.locator(course_list)
+    second_row = subject_table.locator("tr").nth(1)
+    cell = second_row.locator("td").nth(0)
+    inner_table = cell.locator("table")
+    return inner_table.locator("tbody tr")
+
+
+async def row_keys(rows):
+    """
+    (course number, list title) of every row, in one round trip. The header
+    row has no link, so its number is None.
+    """
+    keys = await rows.evaluate_all("""rows => rows.map(r => {
+        const a = r.querySelector('td a');
+        const cells = r.querySelectorAll('td');
+        return [a ? a.innerText.trim() : null, cells.length > 1 ? cells[1].innerText.trim() : ''];
+    })""")
+    return [tuple(k) for k in keys]
+
+
+async def pick_campus(inner_frame, modal):
+    """Multi-offering course: click the Medford/Somerville offering and return the course id."""
+    with metrics.span("campus_link"):
+        campus_link = inner_frame.get_by_role("link").filter(has_text=re.compile(r"Medford|Somerville", re.I)).first
+        await campus_link.click(timeout=15000)
+        await wait_until("campus_link", lambda t: modal.wait_for_function(COURSE_ID_READY_JS, timeout=t), 3000)
+        return await inner_frame.locator("#DERIVED_CRSECAT_DESCR200").inner_text()
+
+
+async def scrape_course(page, rows, i):
+    """Open the details modal for row i, extract its fields and return (nbr, id, record)."""
+    nested = False
+    course_row = rows.nth(i)
+    course_link = course_row.locator("td").nth(0).locator("a")
+    course_num = await course_link.inner_text()
+    print(f"Clicking on course: {course_num}")
+    with metrics.span("open_modal"):
+        modals_before = await page.locator(MODAL_IFRAME).count()
+        await course_link.click()
+
+        # Wait for a new modal frame to appear, then for it to show content
+        await wait_until(
+            "modal_open",
+            lambda t: page.wait_for_function(MODAL_COUNT_ABOVE_JS, arg=modals_before, timeout=t),
+            15000,
+        )
+        modal = await latest_modal_frame(page)
+        if modal is None:
+            raise RuntimeError(f"details modal for {course_num} never opened")
+        await wait_until("modal_content", lambda t: modal.wait_for_function(MODAL_READY_JS, timeout=t), 5000)
+
+    # Extract frame - use last one (most recent modal) when multiple modals exist
+    inner_frame = page.frame_locator('iframe[name^="ptModFrame_"] >> nth=-1')
+
+    # Check if course ID is already visible (single session) or need to click a campus link
+    course_id_locator = inner_frame.locator("#DERIVED_CRSECAT_DESCR200")
+    if await course_id_locator.count() > 0:
+        course_id_text = (await course_id_locator.inner_text()).strip()
+        if course_id_text:
+            # directly assign course Id
+            course_id = course_id_text
+        else:
+            nested = True
+            # need to click session - try flexible link match
+            course_id = await pick_campus(inner_frame, modal)
+    else:
+        nested = True
+        # click on session to get course id - try flexible link match
+        course_id = await pick_campus(inner_frame, modal)
+
+    print(f"Course ID: {course_id}")
+
+    # extract fields (some may be missing for certain courses)
+    fields = {}
+    with metrics.span("extract_fields"):
+        for key, dom_id in DETAIL_FIELDS.items():
+            if key != "course_id":
+                fields[key] = await safe_text(inner_frame.locator(f'[id="{dom_id}"]'))
+
+    print(f"Units: {fields['units']}")
+    print(f"Typically Offered: {fields['typically_offered']}")
+    print(f"Requirements: {fields['requirements']}")
+    # print(f"Attributes: {attribute}")
+    print(f"Grading Basis: {fields['grading_basis']}")
+    print(f"Description: {fields['description']}")
+
+    # attributes = attribute.split(", ") if attribute else []
+    # await page.screenshot(path=f"sis_catalog_{course_num}.png", full_page=True)
+
+    id, record = build_record(course_id, fields)
+    nbr = course_num.strip()
+
+    # close details and go back to course list
+    # Multi-offering: "Return to Select Course Offering" -> offering list, then "Return to Browse Catalog" -> catalog
+    # Single offering: "Return to Browse Catalog" (or similar) -> catalog
+    back_pattern = re.compile(
+        r"return to select course offering|return to .* catalog|browse catalog|course catalog|Medford|Somerville",
+        re.I
+    )
+    with metrics.span("back_navigation") as span:
+        try:
+            # First click: from course detail to offering list (multi) or to catalog (single)
+            span.path = "back_link"
+            back_link = inner_frame.get_by_role("link").filter(has_text=back_pattern).first
+            await back_link.click(timeout=15000)
+            await wait_until("back_offering", lambda t: detail_closed(modal, t), 1500)
+            # Second click: from offering list to catalog (only needed for multi-offering,
+            # single offering already tore the modal down)
+            if await page.locator(MODAL_IFRAME).count() > modals_before:
+                span.path = "back_link_x2"
                 inner_frame = page.frame_locator('iframe[name^="ptModFrame_"] >> nth=-1')
                 back_link = inner_frame.get_by_role("link").filter(has_text=back_pattern).first
                 await back_link.click(timeout=8000)
-            except Exception:
-                # Fallback: use JS click (bypasses visibility) or Escape key
-                close_btn = page.locator('#ptpopupclose').last
-                if await close_btn.count() > 0:
-                    await close_btn.evaluate("el => el.click()")
-                else:
-                    await page.keyboard.press("Escape")
-            await page.wait_for_timeout(2000)
+        except Exception:
+            # Fallback: use JS click (bypasses visibility) or Escape key
+            close_btn = page.locator('#ptpopupclose').last
+            if await close_btn.count() > 0:
+                span.path = "ptpopupclose"
+                await close_btn.evaluate("el => el.click()")
+            else:
+                span.path = "escape"
+                await page.keyboard.press("Escape")
+            metrics.fallback(span.path)
+        await wait_until(
+            "back_catalog",
+            lambda t: page.wait_for_function(MODAL_COUNT_AT_MOST_JS, arg=modals_before, timeout=t),
+            2000,
+        )
+
+    return nbr, id, record
+
+
+def log_responses(page, tag, every=1):
+    """Print every `every`-th SIS response, and every error response."""
+    seen = [0]
+
+    def on_response(r):
+        if not r.url.startswith("https://sis.it.tufts.edu"):
+            return
+        seen[0] += 1
+        if r.status >= 400 or seen[0] % every == 0:
+            print(tag, "RESP", r.status, r.url)
+
+    page.on("response", on_response)
+
+
+async def block_heavy(route):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or BLOCKED_URL_RE.search(request.url):
+        metrics.count("blockedRequests")
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def new_context(browser, settings, storage_state=None):
+    context = await browser.new_context(
+        # Helps with some sites that behave differently for automation
+        user_agent=(
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/122.0.0.0 Safari/537.36"
+        ),
+        viewport={"width": 1400, "height": 900},
+        locale="en-US",
+        storage_state=storage_state,
+    )
+    if settings["block"]:
+        await context.route("**/*", block_heavy)
+    return context
+
+
+async def new_page(context, settings, tag):
+    page = await context.new_page()
+    log_responses(page, tag, settings["log_every"])
+    return page
+
+
+async def recycle_context(browser, context, settings):
+    """Replace the browser context, keeping the SIS session (cookies, storage)."""
+    state = await context.storage_state()
+    await context.close()
+    metrics.count("contextRecycles")
+    context = await new_context(browser, settings, storage_state=state)
+    return context, await new_page(context, settings, "[worker 0]")
+
+
+async def scrape_row(page, rows, i, subject, retries=0):
+    """scrape_course inside a "course" span; retries is how many earlier attempts failed."""
+    with metrics.span("course", subject=subject, retries=retries) as span:
+        nbr, id, record = await scrape_course(page, rows, i)
+        span.course = id
+    return nbr, id, record
+
+
+async def worker(worker_id, page, rows, queue, save, reload, subject="", row_retries=0,
+                 recycle=None, recycle_every=0):
+    """
+    Pull (row index, attempt) pairs off the shared queue until it is drained.
+    With recycle_every, the page is swapped for a fresh one (recycle(page, worker_id))
+    after that many courses. Returns the page the worker ended on.
+    """
+    done = 0
+    while True:
+        try:
+            i, attempt = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        try:
+            save(*await scrape_row(page, rows, i, subject, retries=attempt))
+            done += 1
+        except Exception as e:
+            # Requeue the row for another attempt on a fresh list, then leave it
+            # out rather than killing the whole pool; the modal may still be
+            # open, so reload the list for the next row.
+            print(f"[worker {worker_id}] row {i} failed (attempt {attempt + 1}): {e}")
+            if attempt < row_retries:
+                queue.put_nowait((i, attempt + 1))
+            try:
+                rows = await reload(page)
+            except Exception as e:
+                print(f"[worker {worker_id}] could not reload course list, stopping: {e}")
+                return page
+        finally:
+            queue.task_done()
+        if recycle_every and done and done % recycle_every == 0 and not queue.empty():
+            done = 0
+            try:
+                page = await recycle(page, worker_id)
+                rows = await reload(page)
+            except Exception as e:
+                print(f"[worker {worker_id}] could not recycle the page, stopping: {e}")
+                return page
+    return page
+
+
+async def replay_rows(context, page, rows, pending, save, subject=""):
+    """
+    Scrape the first pending row through the UI while recording its POST, then
+    fetch the other pending rows over HTTP (see sis_replay.py). Rows the replay
+    cannot fetch are returned so the caller can fall back to the UI for them.
+    """
+    first, rest = pending[0], pending[1:]
+    result, recorded = await sis_replay.record_course_post(page, lambda: scrape_row(page, rows, first, subject))
+    save(*result)
 
+    frame = page.frame(name="TargetContent")
+    list_html = await frame.content()
+    list_page = sis_replay.parse_ps_page(list_html, frame.url)
+    count = await rows.count()
+    # The row list sits inside COURSE_LIST$scroll$<n>; every row but the header has one link
+    actions = sis_replay.list_row_actions(list_html, await rows.first.evaluate(
+        "r => r.closest('[id^=\"COURSE_LIST$scroll$\"]').id"
+    ))
+    if len(actions) != count - 1:
+        print(f"Replay: found {len(actions)} row actions for {count - 1} rows, using the UI instead")
+        return rest
 
-        # Open a json file to write to 
-        with open("cs_courses.json", "w") as f:
-            json.dump(courses, f, indent=2)
-        
+    nbrs = [nbr for nbr, _ in await row_keys(rows)]
+    session = sis_replay.ReplaySession(recorded, list_page, sis_replay.cookies_for_httpx(await context.cookies()))
+    failed = []
+    try:
+        for i in rest:
+            try:
+                with metrics.span("replay_fetch", subject=subject, course=nbrs[i]):
+                    fields = await session.fetch_course(actions[i - 1])
+            except Exception as e:
+                print(f"Replay: row {i} failed: {e}")
+                failed.append(i)
+                continue
+            save(nbrs[i], *build_record(fields["course_id"], fields))
+            print(f"Replayed {fields['course_id']}")
+    finally:
+        await session.aclose()
+    return failed
+
+
+async def crawl_subject(context, page, subject, checkpoint, workers=1, mode="ui",
+                        previous=None, fresh_seconds=0, row_retries=1, settings=CRAWL_PROFILES["full"]):
+    """
+    Scrape every course of one subject that the checkpoint doesn't have yet.
+    With `previous` (a refresh), rows whose number and list title match the
+    previous checkpoint and that were scraped less than `fresh_seconds` ago are
+    carried over instead of re-opened. Returns (complete, page): complete is
+    True once every row is checkpointed, and page is worker 0's page, which
+    may have been recycled along the way.
+    """
+    rows = await open_course_list(page, subject)
+    count = await rows.count() # count rows
+    keys = await row_keys(rows)
+    list_titles = dict(keys[1:])
+    # skip header row and anything finished on a previous run
+    pending = [i for i in range(1, count) if keys[i][0] not in checkpoint.done_nbrs]
+    print(f"{subject}: {count - 1} courses, {count - 1 - len(pending)} already checkpointed")
+
+    if previous:
+        now = time.time()
+        still_pending = []
+        for i in pending:
+            nbr, title = keys[i]
+            entry = previous.get(nbr)
+            if entry and entry.get("title") == title and now - entry.get("scraped_at", 0) < fresh_seconds:
+                checkpoint.carry(entry)
+            else:
+                still_pending.append(i)
+        print(f"{subject}: reused {len(pending) - len(still_pending)} unchanged rows, fetching {len(still_pending)}")
+        pending = still_pending
+
+    if not pending:
+        return True, page
+    metrics.start_subject(subject, len(pending))
+
+    def save(nbr, id, record):
+        checkpoint.append(nbr, id, record, title=list_titles.get(nbr, ""))
+        metrics.course_done()
+
+    def reload(pg):
+        return open_course_list(pg, subject)
+
+    async def recycle(pg, worker_id):
+        fresh = await new_page(context, settings, f"[worker {worker_id}]")
+        await pg.close()
+        metrics.count("pageRecycles")
+        return fresh
+
+    if mode == "replay":
+        pending = await replay_rows(context, page, rows, pending, save, subject)
+        if pending:
+            # The replayed requests moved the server-side state on; start the UI from a fresh list
+            rows = await reload(page)
+
+    # Hand row indices to the pool
+    queue = asyncio.Queue()
+    for i in pending:
+        queue.put_nowait((i, 0))
+
+    # All pages share one context, so the SIS session cookies are reused.
+    pages = [(page, rows)]
+    for w in range(1, max(1, min(workers, len(pending)))):
+        extra = await new_page(context, settings, f"[worker {w}]")
+        pages.append((extra, await reload(extra)))
+
+    final = await asyncio.gather(*(
+        worker(w, pg, pg_rows, queue, save, reload, subject, row_retries, recycle, settings["recycle_every"])
+        for w, (pg, pg_rows) in enumerate(pages)
+    ))
+    for extra in final[1:]:
+        await extra.close()
+    return all(k[0] in checkpoint.done_nbrs for k in keys[1:]), final[0]
+
+
+async def main(subjects=("CS",), letters=(), workers=1, mode="ui", profile="lean", headless=None,
+               checkpoint_dir="catalog_checkpoints", out_dir=".", refresh=False, fresh_days=7.0,
+               row_retries=1, progress=False, metrics_stem=None, log_every=None, recycle_every=None,
+               registry_path=course_registry.DEFAULT_REGISTRY):
+    settings = dict(CRAWL_PROFILES[profile])
+    for key, value in (("headless", headless), ("log_every", log_every), ("recycle_every", recycle_every)):
+        if value is not None:
+            settings[key] = value
+    metrics.show_progress = progress
+    metrics.meta.update(profile=profile, **settings)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=settings["headless"])
+        context = await new_context(browser, settings)
+
+        # The first page drives navigation and is worker 0 for every subject.
+        page = await new_page(context, settings, "[worker 0]")
+
+        subjects = [s.upper() for s in subjects]
+        for letter in letters:
+            for subject in await list_subjects(page, letter):
+                if subject not in subjects:
+                    subjects.append(subject)
+
+        for i, subject in enumerate(subjects):
+            if i and settings["recycle_every"]:
+                context, page = await recycle_context(browser, context, settings)
+            previous = catalog_store.rotate_for_refresh(checkpoint_dir, subject) if refresh else None
+            checkpoint = Checkpoint(checkpoint_path(checkpoint_dir, subject))
+            complete = False
+            try:
+                complete, page = await crawl_subject(
+                    context, page, subject, checkpoint, workers=workers, mode=mode,
+                    previous=previous, fresh_seconds=fresh_days * 86400, row_retries=row_retries,
+                    settings=settings,
+                )
+            except Exception as e:
+                # Whatever finished is already checkpointed; the next run picks up from there
+                print(f"{subject}: crawl aborted: {e}")
+            finally:
+                checkpoint.close()
+
+            # Open a json file to write to
+            out_path = export_path(out_dir, subject)
+            if previous:
+                # Diff against the pre-refresh generation, not the last export: an interrupted
+                # refresh may already have written a partial one
+                before = catalog_store.generation_records(previous)
+            else:
+                before = catalog_store.load_snapshot(out_path)
+            # Until the refresh completes, rows not refetched yet come from the previous generation
+            base = before if previous and not complete else None
+            n = checkpoint.export(out_path, base=base)
+            records = {**base, **checkpoint.records} if base else checkpoint.records
+            catalog_columns.write_columns(records, catalog_store.columns_path(out_dir, subject))
+            course_search.build_index(records, catalog_store.search_path(out_dir, subject))
+            delta = catalog_store.diff_snapshots(before, records, complete=complete)
+            delta_out = catalog_store.delta_path(out_dir, subject)
+            with open(delta_out, "w") as f:
+                json.dump(delta, f, indent=2)
+            print(f"{subject}: wrote {n} courses to {out_path} "
+                  f"(+{len(delta['added'])} ~{len(delta['changed'])} -{len(delta['removed'])} in {delta_out})")
+            if refresh and complete:
+                catalog_store.finish_refresh(checkpoint_dir, subject)
+
+        # One id registry over every export in out_dir plus the degree templates
+        course_registry.build_from_files(sorted(Path(out_dir).glob("*_courses.json")), out_path=registry_path)
+
+        print_wait_summary()
+        crawl_metrics.print_report(metrics.write_report(metrics_stem or Path(out_dir) / "crawl_metrics"))
 
         # await page.screenshot(path="sis_catalog.png", full_page=True)
         await browser.close()
 
-asyncio.run(main())
\ No newline at end of file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape the Tufts SIS course catalog.")
+    parser.add_argument("--subjects", nargs="*", default=None,
+                        help="subject codes to crawl, e.g. CS MATH EE (default: CS unless --letters is given)")
+    parser.add_argument("--letters", nargs="*", default=[],
+                        help="crawl every subject listed under these alpha letters, e.g. M P")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of browser pages scraping in parallel (default: 1)")
+    parser.add_argument("--checkpoint-dir", default="catalog_checkpoints",
+                        help="where the per-subject JSONL checkpoints live")
+    parser.add_argument("--out-dir", default=".", help="where <subject>_courses.json exports are written")
+    parser.add_argument("--mode", choices=["ui", "replay"], default="ui",
+                        help="ui: open every course modal; replay: browser only bootstraps the session, "
+                             "details are fetched over HTTP (see sis_replay.py)")
+    parser.add_argument("--profile", choices=sorted(CRAWL_PROFILES), default="lean",
+                        help="lean: headless, images/fonts/media/analytics blocked, sampled response log, "
+                             "pages recycled; full: visible window, everything loaded and logged (default: lean)")
+    parser.add_argument("--headless", action=argparse.BooleanOptionalAction, default=None,
+                        help="override the profile's window setting")
+    parser.add_argument("--log-every", type=int, default=None,
+                        help="print every Nth SIS response (errors always); overrides the profile")
+    parser.add_argument("--recycle-every", type=int, default=None,
+                        help="replace each worker page after N courses, 0 to never; overrides the profile")
+    parser.add_argument("--refresh", action="store_true",
+                        help="start a new checkpoint generation, re-fetching only rows that changed on the "
+                             "list or are older than --fresh-days, and write <subject>_courses.delta.json")
+    parser.add_argument("--fresh-days", type=float, default=7.0,
+                        help="with --refresh, reuse unchanged rows scraped within this many days (default: 7)")
+    parser.add_argument("--row-retries", type=int, default=1,
+                        help="re-attempt a failed row this many times on a freshly loaded list (default: 1)")
+    parser.add_argument("--progress", action="store_true", help="print a progress line with an ETA after every course")
+    parser.add_argument("--metrics", default=None,
+                        help="write the timing report to METRICS.json / METRICS.csv "
+                             "(default: <out-dir>/crawl_metrics)")
+    parser.add_argument("--registry", default=str(course_registry.DEFAULT_REGISTRY),
+                        help="where the course-id registry is rebuilt after the crawl "
+                             "(default: src/data/course_registry.json)")
+    args = parser.parse_args()
+    if args.log_every is not None and args.log_every < 1:
+        parser.error("--log-every must be at least 1")
+    subjects = args.subjects if args.subjects is not None else ([] if args.letters else ["CS"])
+    asyncio.run(main(
+        subjects=subjects,
+        letters=args.letters,
+        workers=args.workers,
+        mode=args.mode,
+        profile=args.profile,
+        headless=args.headless,
+        checkpoint_dir=Path(args.checkpoint_dir),
+        out_dir=Path(args.out_dir),
+        refresh=args.refresh,
+        fresh_days=args.fresh_days,
+        row_retries=args.row_retries,
+        progress=args.progress,
+        metrics_stem=Path(args.metrics) if args.metrics else None,
+        log_every=args.log_every,
+        recycle_every=args.recycle_every,
+        registry_path=Path(args.registry),
+    ))
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+sis_replay.py
+
+Fetch course details from the SIS catalog by replaying PeopleSoft form POSTs
+over HTTP instead of rendering the details modal in Chromium.
+
+How it fits with scrape.py (--mode replay):
+  1. The browser opens the course list and scrapes the first row through the UI.
+     record_course_post() captures the ICAction POST that course link fires.
+  2. The list page HTML gives us every row's ICAction (submitAction_win0 hrefs)
+     and the current win0 hidden fields (ICSID, ICStateNum, ...).
+  3. ReplaySession re-posts the recorded form for every other row, with the
+     row's ICAction and the tracked ICStateNum, over one keep-alive httpx client
+     using the browser's session cookies, follows the modal URL if the response
+     opens one, clicks the campus link when there are several offerings, and
+     posts the "Return to ..." actions so the server-side component ends up
+     back on the list.
+
+PeopleSoft keeps component state on the server, so requests for one session
+are issued strictly in order; the win comes from skipping rendering, not from
+parallel requests.
+
+OFFLINE HARNESS:
+  python3 sis_replay.py --fixtures fixtures/sis
+  Parses every saved *.html response in the directory and compares the result
+  with the sibling *.json (only the keys present in the JSON are checked).
+
+DEPENDENCIES:
+  pip install httpx selectolax
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urljoin
+
+import httpx
+from selectolax.lexbor import LexborHTMLParser as HTMLParser
+
+
+# -----------------------------
+# Parsing
+# -----------------------------
+
+# record key -> DOM id on the course detail page
+DETAIL_FIELDS = {
+    "course_id": "DERIVED_CRSECAT_DESCR200",
+    "units": "DERIVED_CRSECAT_UNITS_RANGE$0",
+    "typically_offered": "DERIVED_CRSECAT_SSR_TYP_OFFERED$0",
+    "requirements": "DERIVED_CRSECAT_DESCR254A$0",
+    "attributes": "DERIVED_CRSECAT_SSR_CRSE_ATTR_LONG$0",
+    "grading_basis": "SSR_CRSE_OFF_VW_GRADING_BASIS$0",
+    "description": "SSR_CRSE_OFF_VW_DESCRLONG$0",
+}
+
+ACTION_RE = re.compile(r"submitAction_win0\(\s*document\.win0\s*,\s*'([^']+)'")
+# PeopleSoft AJAX responses wrap each page fragment in <FIELD><![CDATA[...]]></FIELD>
+CDATA_RE = re.compile(r"<!\[CDATA\[(.*?)\]\]>", re.S)
+BR_RE = re.compile(r"<br\s*/?>", re.I)
+STATE_SCRIPT_RE = re.compile(r"ICStateNum\.value\s*=\s*(\d+)")
+MODAL_URL_RE = re.compile(r"(?:showModal|openModal\w*)\(\s*['\"]([^'\"]+)['\"]", re.I)
+CAMPUS_RE = re.compile(r"Medford|Somerville", re.I)
+RETURN_RE = re.compile(r"^\s*return to", re.I)
+
+# Headers worth carrying over from the recorded browser request
+REPLAY_HEADERS = ("user-agent", "referer", "accept", "accept-language", "origin")
+
+
+@dataclass
+class PsPage:
+    """One PeopleSoft response: the win0 form state plus any detail fields on it."""
+    url: str
+    form_action: str
+    hidden: Dict[str, str]
+    fields: Dict[str, str]
+    campus_action: Optional[str] = None
+    return_actions: List[str] = field(default_factory=list)
+    modal_url: Optional[str] = None
+
+
+def unwrap_ajax(body: str) -> str:
+    """Return the HTML inside an AJAX XML response, or the body unchanged if it is plain HTML."""
+    chunks = CDATA_RE.findall(body)
+    return "\n".join(chunks) if chunks else body
+
+
+def parse_ps_page(body: str, url: str, inherit: Optional[PsPage] = None) -> PsPage:
+    """
+    Parse a PeopleSoft response. AJAX responses only carry the parts of the
+    form that changed, so hidden fields and the form action fall back to
+    `inherit` (the page the request was posted from).
+    """
+    # innerText turns <br> into newlines; keep the same text as the UI scraper
+    tree = HTMLParser(BR_RE.sub("\n", unwrap_ajax(body)))
+
+    fields: Dict[str, str] = {}
+    for key, dom_id in DETAIL_FIELDS.items():
+        node = tree.css_first(f'[id="{dom_id}"]')
+        fields[key] = node.text().strip() if node is not None else ""
+
+    hidden: Dict[str, str] = dict(inherit.hidden) if inherit else {}
+    for node in tree.css('input[type="hidden"]'):
+        name = node.attributes.get("name")
+        if name:
+            hidden[name] = node.attributes.get("value") or ""
+    m = STATE_SCRIPT_RE.search(body)
+    if m:
+        hidden["ICStateNum"] = m.group(1)
+
+    form = tree.css_first('form[name="win0"]')
+    if form is not None:
+        form_action = urljoin(url, form.attributes.get("action") or url)
+    else:
+        form_action = inherit.form_action if inherit else url
+
+    campus_action = None
+    return_actions: List[str] = []
+    for a in tree.css("a"):
+        m = ACTION_RE.search(a.attributes.get("href") or "")
+        if not m:
+            continue
+        text = a.text().strip()
+        if RETURN_RE.search(text):
+            return_actions.append(m.group(1))
+        elif campus_action is None and CAMPUS_RE.search(text):
+            campus_action = m.group(1)
+
+    m = MODAL_URL_RE.search(body)
+    modal_url = urljoin(url, m.group(1)) if m else None
+
+    return PsPage(
+        url=url,
+        form_action=form_action,
+        hidden=hidden,
+        fields=fields,
+        campus_action=campus_action,
+        return_actions=return_actions,
+        modal_url=modal_url,
+    )
+
+
+def list_row_actions(body: str, container_id: str) -> List[str]:
+    """ICAction of each course link in the course list table, in row order."""
+    tree = HTMLParser(unwrap_ajax(body))
+    container = tree.css_first(f'[id="{container_id}"]')
+    if container is None:
+        return []
+    actions = []
+    for a in container.css("a"):
+        m = ACTION_RE.search(a.attributes.get("href") or "")
+        if m:
+            actions.append(m.group(1))
+    return actions
+
+
+def next_state(page: PsPage, before: Optional[str]) -> Optional[str]:
+    """PeopleSoft bumps ICStateNum by one per request when the response doesn't say otherwise."""
+    after = page.hidden.get("ICStateNum")
+    if after is not None and after != before:
+        return after
+    if before is not None and before.isdigit():
+        return str(int(before) + 1)
+    return before
+
+
+# -----------------------------
+# Recording (browser side)
+# -----------------------------
+
+@dataclass
+class RecordedPost:
+    url: str
+    form: Dict[str, str]
+    headers: Dict[str, str]
+
+
+async def record_course_post(page, click: Callable[[], Awaitable[Any]]) -> Tuple[Any, RecordedPost]:
+    """
+    Run click() (which opens a course modal through the UI) and capture the
+    first ICAction POST it sends. Returns click()'s result and the recording.
+    """
+    async with page.expect_request(
+        lambda r: r.method == "POST" and "ICAction=" in (r.post_data or ""),
+        timeout=15000,
+    ) as info:
+        result = await click()
+    req = await info.value
+    headers = {k: v for k, v in (await req.all_headers()).items() if k.lower() in REPLAY_HEADERS}
+    form = dict(parse_qsl(req.post_data or "", keep_blank_values=True))
+    return result, RecordedPost(url=req.url, form=form, headers=headers)
+
+
+def cookies_for_httpx(browser_cookies: List[Dict[str, Any]]) -> httpx.Cookies:
+    jar = httpx.Cookies()
+    for c in browser_cookies:
+        jar.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+    return jar
+
+
+# -----------------------------
+# Replay (HTTP side)
+# -----------------------------
+
+class ReplaySession:
+    """Replays course link POSTs against one PeopleSoft session."""
+
+    def __init__(self, recorded: RecordedPost, list_page: PsPage, cookies: httpx.Cookies,
+                 max_connections: int = 4, timeout: float = 30.0):
+        self.recorded = recorded
+        self.list_page = list_page
+        self.client = httpx.AsyncClient(
+            headers=recorded.headers,
+            cookies=cookies,
+            follow_redirects=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _post(self, url: str, form: Dict[str, str], inherit: PsPage) -> PsPage:
+        resp = await self.client.post(url, data=form)
+        resp.raise_for_status()
+        return parse_ps_page(resp.text, str(resp.url), inherit=inherit)
+
+    async def _get(self, url: str) -> PsPage:
+        resp = await self.client.get(url)
+        resp.raise_for_status()
+        return parse_ps_page(resp.text, str(resp.url))
+
+    async def post_action(self, page: PsPage, action: str) -> PsPage:
+        """Submit the win0 form of `page` with the given ICAction."""
+        form = dict(page.hidden)
+        form["ICAction"] = action
+        return await self._post(page.form_action, form, inherit=page)
+
+    async def fetch_course(self, action: str) -> Dict[str, str]:
+        """Fetch the detail fields for the course list row whose link fires `action`."""
+        form = dict(self.recorded.form)
+        form.update({k: v for k, v in self.list_page.hidden.items() if k in form})
+        form["ICAction"] = action
+        before = self.list_page.hidden.get("ICStateNum")
+        page = await self._post(self.recorded.url, form, inherit=self.list_page)
+        self.list_page.hidden["ICStateNum"] = next_state(page, before)
+
+        if page.modal_url and not page.fields["course_id"]:
+            page = await self._get(page.modal_url)
+        if not page.fields["course_id"] and page.campus_action:
+            page = await self.post_action(page, page.campus_action)
+        if not page.fields["course_id"]:
+            raise RuntimeError(f"no course details in response to {action}")
+        fields = page.fields
+
+        # Unwind offering list / detail so the component is back on the catalog
+        for _ in range(2):
+            if not page.return_actions:
+                break
+            page = await self.post_action(page, page.return_actions[-1])
+        return fields
+
+
+# -----------------------------
+# Offline harness
+# -----------------------------
+
+FIXTURE_URL = "https://sis.it.tufts.edu/psc/paprd/EMPLOYEE/HRMS/c/COMMUNITY_ACCESS.SSS_BROWSE_CATLG.GBL"
+
+
+def check_fixture(html_path: Path) -> List[str]:
+    """Parse one saved response and diff it against its expected JSON. Returns mismatch messages."""
+    expected = json.loads(html_path.with_suffix(".json").read_text(encoding="utf-8"))
+    body = html_path.read_text(encoding="utf-8")
+    page = parse_ps_page(body, FIXTURE_URL)
+    actual: Dict[str, Any] = {
+        "fields": page.fields,
+        "campus_action": page.campus_action,
+        "return_actions": page.return_actions,
+        "modal_url": page.modal_url,
+        "state_num": page.hidden.get("ICStateNum"),
+    }
+    if "row_actions" in expected:
+        actual["row_actions"] = list_row_actions(body, expected.get("container_id", "COURSE_LIST$scroll$21"))
+
+    problems = []
+    for key, want in expected.items():
+        if key == "container_id":
+            continue
+        got = actual.get(key)
+        if isinstance(want, dict):
+            for sub, sub_want in want.items():
+                if got.get(sub) != sub_want:
+                    problems.append(f"{key}.{sub}: expected {sub_want!r}, got {got.get(sub)!r}")
+        elif got != want:
+            problems.append(f"{key}: expected {want!r}, got {got!r}")
+    return problems
+
+
+def main(fixtures_dir: str) -> int:
+    paths = sorted(Path(fixtures_dir).glob("*.html"))
+    if not paths:
+        print(f"No *.html fixtures in {fixtures_dir}")
+        return 1
+    failed = 0
+    for path in paths:
+        problems = check_fixture(path)
+        print(f"{'FAIL' if problems else 'ok  '} {path.name}")
+        for p in problems:
+            print(f"     {p}")
+        failed += bool(problems)
+    print(f"{len(paths) - failed}/{len(paths)} fixtures passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline check of the SIS replay parser against saved responses.")
+    parser.add_argument("--fixtures", default=str(Path(__file__).parent / "fixtures" / "sis"),
+                        help="directory of saved *.html responses with expected *.json")
+    args = parser.parse_args()
+    sys.exit(main(args.fixtures))